@@ -3,13 +3,16 @@ Endpoints de Contratos
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from typing import List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import date
 from app.core.dependencies import get_db, get_current_active_user
+from app.core.http_cache import condicional
 from app.models.contrato import Contrato
 from app.models.propiedad import Propiedad
+from app.services.alta_masiva import LOTE_MAXIMO, crear_contratos
 
 router = APIRouter()
 
@@ -27,6 +30,11 @@ class ContratoCreate(BaseModel):
     tasa_mora_diaria: float = 0.5
 
 
+class ContratosLoteRequest(BaseModel):
+    items: List[ContratoCreate] = Field(..., min_length=1, max_length=LOTE_MAXIMO)
+    todo_o_nada: bool = Field(False, description="Con un solo rechazo no se crea ninguno")
+
+
 class ContratoResponse(BaseModel):
     id: int
     numero_contrato: str
@@ -79,7 +87,22 @@ def crear_contrato(
     return nuevo_contrato
 
 
-@router.get("/contratos", response_model=List[ContratoResponse])
+@router.post("/contratos/lote")
+def crear_contratos_lote(
+    req: ContratosLoteRequest,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """Crear muchos contratos en una transacción, con el resultado de cada uno"""
+    try:
+        resultado = crear_contratos(db, [item.model_dump() for item in req.items], req.todo_o_nada)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return ORJSONResponse(resultado)
+
+
+@router.get("/contratos", response_model=List[ContratoResponse],
+            dependencies=[Depends(condicional(Contrato))])
 def listar_contratos(
     skip: int = 0,
     limit: int = 100,
@@ -94,7 +117,8 @@ def listar_contratos(
     return contratos
 
 
-@router.get("/contratos/{contrato_id}", response_model=ContratoResponse)
+@router.get("/contratos/{contrato_id}", response_model=ContratoResponse,
+            dependencies=[Depends(condicional(Contrato))])
 def obtener_contrato(
     contrato_id: int,
     db: Session = Depends(get_db),
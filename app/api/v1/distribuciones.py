@@ -0,0 +1,129 @@
+"""
+API de Distribuciones a copropietarios
+Lote de pago: archivo de transferencias para el banco y confirmación en bloque
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from pydantic import BaseModel, Field
+from typing import Dict, Optional
+from datetime import date
+
+from app.core.dependencies import get_db, get_current_user
+from app.database.session import SessionLocal
+from app.models.lote_pago import LotePago
+from app.models.user import User
+from app.services.lote_pago import anular_lote, confirmar_lote, exportar_lote, generar_lote, resumen_lote
+
+router = APIRouter(prefix="/distribuciones", tags=["Distribuciones"])
+
+
+# ── SCHEMAS ──────────────────────────────────────────────────────────────────
+
+class ConfirmarLoteRequest(BaseModel):
+    fecha_pago: Optional[date] = Field(None, description="Default: hoy")
+    transferencias: Optional[Dict[int, str]] = Field(
+        None,
+        description="{copropietario_id: número de transferencia}. Sin él se confirma todo el lote",
+        example={"12": "TRF-000123"}
+    )
+
+
+# ── ENDPOINTS ────────────────────────────────────────────────────────────────
+
+@router.get("/lote-pago", summary="Resumen de lo pendiente y lotes abiertos")
+def obtener_lote_pago(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Distribuciones PENDIENTE que todavía no están en un lote, con y sin
+    cuenta bancaria, y los lotes generados que falta confirmar.
+    """
+    return resumen_lote(db)
+
+
+@router.post("/lote-pago", summary="Generar un lote de pago", status_code=201)
+def generar_lote_pago(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Guarda el lote: sus distribuciones y, por beneficiario, la cuenta y el
+    monto. El archivo y la confirmación usan exactamente lo guardado.
+    """
+    try:
+        return generar_lote(db)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/lote-pago/{lote_id}/archivo", summary="Archivo de transferencias del lote (CSV/TXT)")
+def exportar_lote_pago(
+    lote_id: int,
+    formato: str = Query("csv", pattern="^(csv|txt)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Una línea por copropietario y cuenta con la cantidad y el monto de sus
+    distribuciones en el lote. Descargarlo de nuevo da el mismo archivo.
+    """
+    _obtener_lote(db, lote_id)
+
+    def generar():
+        # Sesión propia: la de get_db se cierra antes de terminar de enviar
+        sesion = SessionLocal()
+        try:
+            yield from exportar_lote(sesion, lote_id, formato)
+        finally:
+            sesion.close()
+
+    return StreamingResponse(
+        generar(),
+        media_type="text/csv" if formato == "csv" else "text/plain",
+        headers={"Content-Disposition": f'attachment; filename="lote_pago_{lote_id}.{formato}"'}
+    )
+
+
+@router.post("/lote-pago/{lote_id}/confirmar", summary="Confirmar el lote: marcar pagadas sus distribuciones")
+def confirmar_lote_pago(
+    lote_id: int,
+    req: ConfirmarLoteRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Un solo UPDATE marca PAGADO las distribuciones del lote que siguen
+    pendientes. Los beneficiarios cuyo pendiente ya no coincide con el
+    archivo vuelven en `rechazados`. Repetir la confirmación no vuelve a
+    marcar nada.
+    """
+    _obtener_lote(db, lote_id)
+    return confirmar_lote(db, lote_id, req.fecha_pago, req.transferencias)
+
+
+@router.post("/lote-pago/{lote_id}/anular", summary="Anular lo que falta confirmar del lote")
+def anular_lote_pago(
+    lote_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Cierra el lote: las distribuciones sin confirmar vuelven a quedar
+    disponibles para un lote nuevo.
+    """
+    _obtener_lote(db, lote_id)
+    try:
+        return anular_lote(db, lote_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+# ── FUNCIONES AUXILIARES ─────────────────────────────────────────────────────
+
+def _obtener_lote(db: Session, lote_id: int) -> LotePago:
+    lote = db.get(LotePago, lote_id)
+    if not lote:
+        raise HTTPException(status_code=404, detail="Lote de pago no encontrado")
+    return lote
@@ -2,18 +2,36 @@
 API de Impuestos Bolivianos
 Endpoints para calcular, registrar y consultar impuestos
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import date
 
 from app.core.dependencies import get_db, get_current_user
+from app.core.http_cache import condicional
+from app.database.session import SessionLocal
+from app.models.contrato import Contrato
+from app.models.impuesto import ImpuestoAlquiler, ReglaImpuesto
+from app.models.propiedad import Propiedad
 from app.models.user import User
-from app.services.tax_calculator import calcular_impuestos, calcular_solo_determinado
+from app.services.asignacion_facturas import VENTANA_COMPENSACION_MESES, asignar_facturas
+from app.services.base_trimestral import obtener_base_trimestral
+from app.services.cierre_impuestos import cerrar_periodo
+from app.services.exportacion_sin import exportar_declaracion
+from app.services.reglas_impuesto import regla_para, reglas_vigentes
+from app.services.tax_calculator import (
+    MESES_TRIMESTRALES, calcular_impuestos, calcular_impuestos_lote, calcular_solo_determinado,
+    campos_registro
+)
 
 router = APIRouter(prefix="/impuestos", tags=["Impuestos"])
 
+PATRON_PERIODO = r"^\d{4}-(0[1-9]|1[0-2])$"
+
 
 # ── SCHEMAS ──────────────────────────────────────────────────────────────────
 
@@ -29,6 +47,14 @@ class CalcularRequest(BaseModel):
         example=9000
     )
 
+class CalcularLoteRequest(BaseModel):
+    items: List[CalcularRequest] = Field(..., max_length=50000, description="Cálculos a realizar")
+    formato: str = Field(
+        "filas",
+        pattern="^(filas|columnas)$",
+        description="filas: resultados idénticos a /calcular | columnas: solo montos, una lista por columna"
+    )
+
 class RegistrarImpuestoRequest(BaseModel):
     pago_id: int
     contrato_id: int
@@ -37,10 +63,34 @@ class RegistrarImpuestoRequest(BaseModel):
     anio: int
     facturas_iva: float = 0.0
     facturas_rc_iva: float = 0.0
-    monto_acumulado_trimestre: Optional[float] = None
+    monto_acumulado_trimestre: Optional[float] = None  # None: se suma lo cobrado en el trimestre
     observaciones: Optional[str] = None
     fecha_declaracion: Optional[date] = None
 
+class CierrePeriodoRequest(BaseModel):
+    anio: int = Field(..., description="Año", example=2026)
+    mes: int  = Field(..., ge=1, le=12, description="Mes (1-12)", example=5)
+    fecha_declaracion: Optional[date] = None
+    simular: bool = Field(False, description="Calcular sin guardar")
+
+class AsignarFacturasRequest(BaseModel):
+    contrato_id: Optional[int] = Field(None, description="Sin contrato: todo el portafolio")
+    ventana_meses: int = Field(
+        VENTANA_COMPENSACION_MESES, ge=0, le=12,
+        description="Meses posteriores al de la factura en los que puede compensar"
+    )
+    simular: bool = Field(False, description="Calcular sin guardar")
+
+class ReglaImpuestoRequest(BaseModel):
+    vigente_desde: date = Field(..., description="Rige desde el periodo de esta fecha", example="2027-01-01")
+    alicuota_iva: float       = Field(..., ge=0, le=100, example=13.0)
+    alicuota_it: float        = Field(..., ge=0, le=100, example=3.0)
+    alicuota_rc_iva: float    = Field(..., ge=0, le=100, example=12.5)
+    limite_comp_iva: float    = Field(..., ge=0, le=100, description="% del alquiler", example=30.0)
+    limite_comp_rc_iva: float = Field(..., ge=0, le=100, description="% del RC-IVA determinado", example=100.0)
+    norma: Optional[str] = None
+    descripcion: Optional[str] = None
+
 class RegistrarFacturaRequest(BaseModel):
     contrato_id: int
     numero_factura: str
@@ -82,6 +132,26 @@ def calcular(
     )
 
 
+@router.post("/calcular/lote", summary="Calcular impuestos en lote (sin guardar)")
+def calcular_lote(
+    req: CalcularLoteRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Calcula IVA, IT y RC-IVA para muchos alquileres y meses en una sola llamada
+    (por ejemplo todos los contratos de un año).
+
+    - formato=filas    → lista de resultados idénticos a POST /calcular
+    - formato=columnas → solo montos, una lista por columna (respuesta compacta)
+
+    NO guarda en base de datos.
+    """
+    return ORJSONResponse(calcular_impuestos_lote(
+        [item.model_dump() for item in req.items],
+        columnar=req.formato == "columnas",
+    ))
+
+
 @router.post("/calcular/sin-facturas", summary="Ver impuesto determinado puro (sin compensación)")
 def calcular_sin_facturas(
     req: CalcularRequest,
@@ -105,11 +175,18 @@ def registrar_impuesto(
     current_user: User = Depends(get_current_user)
 ):
     """
-    Calcula Y guarda el registro de impuestos en la base de datos.
-    Se llama después de registrar el pago del alquiler.
+    Calcula Y guarda el registro de impuestos de un pago que no lo tiene.
+    Los pagos registrados con POST /pagos/{id}/registrar ya lo reciben del
+    worker (y los del periodo, del cierre mensual): para esos responde 409.
+
+    En meses de cierre trimestral, si no se envía monto_acumulado_trimestre,
+    la base de RC-IVA se calcula con lo cobrado en el trimestre.
     """
-    from app.models.impuesto import ImpuestoAlquiler, EstadoImpuesto
-    from app.services.tax_calculator import get_trimestre, MESES_TRIMESTRALES
+    _verificar_sin_impuesto(db, req.pago_id)
+
+    monto_acumulado_trimestre = req.monto_acumulado_trimestre
+    if monto_acumulado_trimestre is None and req.mes in MESES_TRIMESTRALES:
+        monto_acumulado_trimestre = obtener_base_trimestral(db, req.contrato_id, req.anio, req.mes)
 
     calculo = calcular_impuestos(
         monto_alquiler=req.monto_alquiler,
@@ -117,55 +194,25 @@ def registrar_impuesto(
         anio=req.anio,
         facturas_iva=req.facturas_iva,
         facturas_rc_iva=req.facturas_rc_iva,
-        monto_acumulado_trimestre=req.monto_acumulado_trimestre,
+        monto_acumulado_trimestre=monto_acumulado_trimestre,
     )
 
     impuesto = ImpuestoAlquiler(
         pago_id     = req.pago_id,
         contrato_id = req.contrato_id,
-        periodo     = calculo["periodo"],
-        anio        = req.anio,
-        mes         = req.mes,
-        trimestre   = calculo["trimestre"],
-        monto_alquiler = req.monto_alquiler,
-
-        # IVA
-        iva_alicuota             = calculo["iva"]["alicuota"],
-        iva_pct_max_compensacion = calculo["iva"]["pct_max_compensacion"],
-        iva_determinado          = calculo["iva"]["determinado"],
-        iva_limite_compensacion  = calculo["iva"]["limite_compensacion"],
-        iva_facturas_presentadas = calculo["iva"]["facturas_presentadas"],
-        iva_facturas_aplicadas   = calculo["iva"]["facturas_aplicadas"],
-        iva_efectivo             = calculo["iva"]["efectivo"],
-
-        # IT
-        it_alicuota    = calculo["it"]["alicuota"],
-        it_determinado = calculo["it"]["determinado"],
-        it_efectivo    = calculo["it"]["efectivo"],
-
-        # RC-IVA
-        rc_iva_alicuota              = calculo["rc_iva"]["alicuota"],
-        rc_iva_pct_max_compensacion  = calculo["rc_iva"]["pct_max_compensacion"],
-        rc_iva_base_trimestral       = calculo["rc_iva"]["base_trimestral"],
-        rc_iva_determinado           = calculo["rc_iva"]["determinado"],
-        rc_iva_facturas_presentadas  = calculo["rc_iva"]["facturas_presentadas"],
-        rc_iva_facturas_aplicadas    = calculo["rc_iva"]["facturas_aplicadas"],
-        rc_iva_efectivo              = calculo["rc_iva"]["efectivo"],
-        es_mes_trimestral            = calculo["es_mes_trimestral"],
-
-        # Totales
-        total_determinado        = calculo["resumen"]["total_determinado"],
-        total_facturas_aplicadas = calculo["resumen"]["total_facturas_aplicadas"],
-        total_efectivo           = calculo["resumen"]["total_efectivo"],
-        total_ahorro             = calculo["resumen"]["total_ahorro_con_facturas"],
-        monto_neto_distribuir    = calculo["resumen"]["monto_neto_distribuir"],
-
+        **campos_registro(calculo),
         observaciones    = req.observaciones,
         fecha_declaracion= req.fecha_declaracion,
     )
 
     db.add(impuesto)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # El worker lo registró entre la verificación y el commit
+        db.rollback()
+        _verificar_sin_impuesto(db, req.pago_id)
+        raise
     db.refresh(impuesto)
 
     return {
@@ -175,8 +222,86 @@ def registrar_impuesto(
     }
 
 
+@router.post("/cierre", summary="Cierre mensual: registrar impuestos de todos los pagos del periodo")
+def cierre_periodo(
+    req: CierrePeriodoRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Registra en una sola transacción el impuesto de cada pago PAGADO del
+    periodo que aún no lo tiene, aplicando las facturas de compensación
+    disponibles del contrato (IVA del mes, RC-IVA del trimestre).
+
+    Equivale a `python -m app.cli.cierre_impuestos --periodo YYYY-MM`.
+    """
+    return cerrar_periodo(db, req.anio, req.mes, req.fecha_declaracion, req.simular)
+
+
+@router.post("/facturas/asignar", summary="Asignar facturas libres a los periodos pendientes")
+def asignar_facturas_pendientes(
+    req: AsignarFacturasRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Reparte las facturas de compensación sin usar entre los impuestos
+    registrados y aún no declarados del mismo contrato, buscando el mayor
+    ahorro dentro de los límites (IVA hasta su determinado, RC-IVA 100%).
+    Recalcula y guarda los impuestos afectados; `compensacion_adicional` es
+    lo que bajó el impuesto efectivo.
+    """
+    return asignar_facturas(db, req.contrato_id, req.ventana_meses, req.simular)
+
+
+@router.get("/reglas", summary="Reglas de alícuotas y límites por vigencia")
+def listar_reglas(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Reglas en memoria ordenadas por vigencia. La primera es la regla base,
+    que rige para los periodos anteriores a cualquier fila de la tabla.
+    """
+    hoy = date.today()
+    return {
+        "vigente": regla_para(hoy.year, hoy.month)._asdict(),
+        "reglas": [regla._asdict() for regla in reglas_vigentes()],
+    }
+
+
+@router.post("/reglas", summary="Registrar una nueva regla de impuestos", status_code=201)
+def crear_regla(
+    req: ReglaImpuestoRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Agrega alícuotas/límites que rigen desde el periodo de `vigente_desde`.
+    Se aplican sin reiniciar: en este proceso al confirmar, y en los demás
+    dentro de REGLAS_IMPUESTO_TTL segundos. Los impuestos ya registrados no
+    se recalculan.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Solo un administrador puede modificar las reglas de impuestos")
+
+    vigente_desde = req.vigente_desde.replace(day=1)
+    existe = db.query(ReglaImpuesto.id).filter(
+        ReglaImpuesto.vigente_desde == vigente_desde,
+        ReglaImpuesto.deleted_at == None
+    ).first()
+    if existe:
+        raise HTTPException(status_code=400, detail=f"Ya existe una regla vigente desde {vigente_desde}")
+
+    regla = ReglaImpuesto(**req.model_dump(exclude={"vigente_desde"}), vigente_desde=vigente_desde)
+    db.add(regla)
+    db.commit()
+    db.refresh(regla)
+    return {"id": regla.id, "vigente_desde": regla.vigente_desde, "mensaje": "Regla registrada"}
+
+
 @router.get("/contrato/{contrato_id}/anio/{anio}",
-            summary="Resumen anual de impuestos de un contrato")
+            summary="Resumen anual de impuestos de un contrato",
+            dependencies=[Depends(condicional(ImpuestoAlquiler))])
 def resumen_anual(
     contrato_id: int,
     anio: int,
@@ -189,9 +314,8 @@ def resumen_anual(
     - Ahorro acumulado con facturas
     - Totales anuales
     """
-    from app.models.impuesto import ImpuestoAlquiler
-
-    registros = db.query(ImpuestoAlquiler).filter(
+    # Solo las columnas del reporte: filas livianas en vez de entidades ORM
+    registros = db.query(*_COLUMNAS_RESUMEN).filter(
         ImpuestoAlquiler.contrato_id == contrato_id,
         ImpuestoAlquiler.anio == anio,
         ImpuestoAlquiler.deleted_at == None
@@ -206,87 +330,217 @@ def resumen_anual(
             "totales": {}
         }
 
-    detalle = []
-    for r in registros:
-        detalle.append({
-            "mes": r.mes,
-            "periodo": r.periodo,
-            "es_trimestral": r.es_mes_trimestral,
-            "monto_alquiler": r.monto_alquiler,
-
-            "iva": {
-                "alicuota": r.iva_alicuota,
-                "pct_max_compensacion": r.iva_pct_max_compensacion,
-                "determinado": r.iva_determinado,
-                "limite_compensacion": r.iva_limite_compensacion,
-                "facturas_presentadas": r.iva_facturas_presentadas,
-                "facturas_aplicadas": r.iva_facturas_aplicadas,
-                "efectivo": r.iva_efectivo,
-                "ahorro": r.iva_facturas_aplicadas,
-            },
-            "it": {
-                "alicuota": r.it_alicuota,
-                "determinado": r.it_determinado,
-                "efectivo": r.it_efectivo,
-                "compensable": False,
-            },
-            "rc_iva": {
-                "alicuota": r.rc_iva_alicuota,
-                "aplico": r.es_mes_trimestral,
-                "base_trimestral": r.rc_iva_base_trimestral,
-                "determinado": r.rc_iva_determinado,
-                "facturas_presentadas": r.rc_iva_facturas_presentadas,
-                "facturas_aplicadas": r.rc_iva_facturas_aplicadas,
-                "efectivo": r.rc_iva_efectivo,
-                "ahorro": r.rc_iva_facturas_aplicadas,
-            },
-            "totales_mes": {
-                "determinado": r.total_determinado,
-                "facturas_aplicadas": r.total_facturas_aplicadas,
-                "efectivo": r.total_efectivo,
-                "ahorro": r.total_ahorro,
-                "neto_distribuido": r.monto_neto_distribuir,
-            },
-        })
-
-    # Totales anuales
-    sum_det   = round(sum(r.total_determinado for r in registros), 2)
-    sum_efect = round(sum(r.total_efectivo for r in registros), 2)
-    sum_ahorro= round(sum(r.total_ahorro for r in registros), 2)
-    sum_neto  = round(sum(r.monto_neto_distribuir for r in registros), 2)
-    sum_iva_d = round(sum(r.iva_determinado for r in registros), 2)
-    sum_iva_e = round(sum(r.iva_efectivo for r in registros), 2)
-    sum_it    = round(sum(r.it_monto for r in registros), 2)
-    sum_rciva_d = round(sum(r.rc_iva_determinado for r in registros), 2)
-    sum_rciva_e = round(sum(r.rc_iva_efectivo for r in registros), 2)
+    totales = db.query(*_TOTALES_ANUALES).filter(
+        ImpuestoAlquiler.contrato_id == contrato_id,
+        ImpuestoAlquiler.anio == anio,
+        ImpuestoAlquiler.deleted_at == None
+    ).one()
 
-    return {
+    return ORJSONResponse({
         "contrato_id": contrato_id,
         "anio": anio,
         "total_meses_registrados": len(registros),
-        "registros": detalle,
-        "totales_anuales": {
-            "iva": {
-                "determinado": sum_iva_d,
-                "efectivo": sum_iva_e,
-                "ahorro_facturas": round(sum_iva_d - sum_iva_e, 2),
-            },
-            "it": {
-                "determinado": sum_it,
-                "efectivo": sum_it,
-                "ahorro_facturas": 0.0,
-                "nota": "No compensable"
-            },
-            "rc_iva": {
-                "determinado": sum_rciva_d,
-                "efectivo": sum_rciva_e,
-                "ahorro_facturas": round(sum_rciva_d - sum_rciva_e, 2),
-            },
-            "total": {
-                "determinado": sum_det,
-                "efectivo": sum_efect,
-                "ahorro_total_facturas": sum_ahorro,
-                "neto_distribuido_copropietarios": sum_neto,
+        "registros": [_detalle_mes(r) for r in registros],
+        "totales_anuales": _totales_anuales(totales),
+    })
+
+
+@router.get("/declaracion/exportar", summary="Exportar la declaración al SIN (CSV/TXT)")
+def exportar_declaracion_sin(
+    desde: str = Query(..., pattern=PATRON_PERIODO, description="Periodo inicial YYYY-MM"),
+    hasta: str = Query(..., pattern=PATRON_PERIODO, description="Periodo final YYYY-MM"),
+    formato: str = Query("csv", pattern="^(csv|txt)$"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Una línea por impuesto registrado de todos los contratos en el rango de
+    periodos, en el orden (periodo, contrato). Se transmite a medida que se
+    lee de la base, sin armar el archivo en memoria.
+
+    Equivale a `python -m app.cli.exportar_sin --desde YYYY-MM --hasta YYYY-MM`.
+    """
+    if desde > hasta:
+        raise HTTPException(status_code=400, detail="El periodo 'desde' no puede ser posterior a 'hasta'")
+
+    def generar():
+        # Sesión propia: la de get_db se cierra antes de terminar de enviar
+        db = SessionLocal()
+        try:
+            yield from exportar_declaracion(db, desde, hasta, formato)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        generar(),
+        media_type="text/csv; charset=utf-8" if formato == "csv" else "text/plain; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="declaracion_sin_{desde}_{hasta}.{formato}"'},
+    )
+
+
+@router.get("/portafolio/anio/{anio}",
+            summary="Resumen anual de impuestos de todo el portafolio",
+            dependencies=[Depends(condicional(ImpuestoAlquiler, Contrato, Propiedad))])
+def resumen_anual_portafolio(
+    anio: int,
+    agrupar: str = Query("contrato", pattern="^(contrato|propiedad)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Totales anuales de IVA, IT y RC-IVA de todos los contratos, agrupados
+    por contrato o por propiedad, más el total del portafolio.
+    """
+    if agrupar == "contrato":
+        nombres, claves = ("contrato_id", "numero_contrato"), [Contrato.id, Contrato.numero_contrato]
+    else:
+        nombres, claves = ("propiedad_id", "direccion"), [Propiedad.id, Propiedad.direccion]
+
+    filtros = [ImpuestoAlquiler.anio == anio, ImpuestoAlquiler.deleted_at == None]
+    grupos = db.query(*claves, *_TOTALES_ANUALES).select_from(ImpuestoAlquiler).join(
+        Contrato, Contrato.id == ImpuestoAlquiler.contrato_id
+    ).join(
+        Propiedad, Propiedad.id == Contrato.propiedad_id
+    ).filter(*filtros).group_by(*claves).order_by(claves[0]).all()
+
+    total = db.query(*_TOTALES_ANUALES).filter(*filtros).one()
+
+    return ORJSONResponse({
+        "anio": anio,
+        "agrupado_por": agrupar,
+        "total_grupos": len(grupos),
+        "grupos": [
+            {
+                nombres[0]: g[0],
+                nombres[1]: g[1],
+                "meses_registrados": g.meses_registrados,
+                "totales": _totales_anuales(g),
             }
+            for g in grupos
+        ],
+        "totales_portafolio": _totales_anuales(total),
+    })
+
+
+# ── FUNCIONES AUXILIARES ─────────────────────────────────────────────────────
+
+def _verificar_sin_impuesto(db: Session, pago_id: int) -> None:
+    existente = db.query(ImpuestoAlquiler.id).filter(
+        ImpuestoAlquiler.pago_id == pago_id,
+        ImpuestoAlquiler.deleted_at == None
+    ).scalar()
+    if existente:
+        raise HTTPException(
+            status_code=409,
+            detail=f"El pago {pago_id} ya tiene su impuesto registrado (id {existente})"
+        )
+
+
+_COLUMNAS_RESUMEN = [
+    getattr(ImpuestoAlquiler, nombre) for nombre in (
+        "mes", "periodo", "es_mes_trimestral", "monto_alquiler",
+        "iva_alicuota", "iva_pct_max_compensacion", "iva_determinado",
+        "iva_limite_compensacion", "iva_facturas_presentadas",
+        "iva_facturas_aplicadas", "iva_efectivo",
+        "it_alicuota", "it_determinado", "it_efectivo",
+        "rc_iva_alicuota", "rc_iva_base_trimestral", "rc_iva_determinado",
+        "rc_iva_facturas_presentadas", "rc_iva_facturas_aplicadas", "rc_iva_efectivo",
+        "total_determinado", "total_facturas_aplicadas", "total_efectivo",
+        "total_ahorro", "monto_neto_distribuir",
+    )
+]
+
+
+def _detalle_mes(r) -> dict:
+    """Detalle de un mes del resumen anual a partir de una fila de columnas"""
+    return {
+        "mes": r.mes,
+        "periodo": r.periodo,
+        "es_trimestral": r.es_mes_trimestral,
+        "monto_alquiler": r.monto_alquiler,
+
+        "iva": {
+            "alicuota": r.iva_alicuota,
+            "pct_max_compensacion": r.iva_pct_max_compensacion,
+            "determinado": r.iva_determinado,
+            "limite_compensacion": r.iva_limite_compensacion,
+            "facturas_presentadas": r.iva_facturas_presentadas,
+            "facturas_aplicadas": r.iva_facturas_aplicadas,
+            "efectivo": r.iva_efectivo,
+            "ahorro": r.iva_facturas_aplicadas,
+        },
+        "it": {
+            "alicuota": r.it_alicuota,
+            "determinado": r.it_determinado,
+            "efectivo": r.it_efectivo,
+            "compensable": False,
+        },
+        "rc_iva": {
+            "alicuota": r.rc_iva_alicuota,
+            "aplico": r.es_mes_trimestral,
+            "base_trimestral": r.rc_iva_base_trimestral,
+            "determinado": r.rc_iva_determinado,
+            "facturas_presentadas": r.rc_iva_facturas_presentadas,
+            "facturas_aplicadas": r.rc_iva_facturas_aplicadas,
+            "efectivo": r.rc_iva_efectivo,
+            "ahorro": r.rc_iva_facturas_aplicadas,
+        },
+        "totales_mes": {
+            "determinado": r.total_determinado,
+            "facturas_aplicadas": r.total_facturas_aplicadas,
+            "efectivo": r.total_efectivo,
+            "ahorro": r.total_ahorro,
+            "neto_distribuido": r.monto_neto_distribuir,
+        },
+    }
+
+
+def _suma(columna):
+    return func.coalesce(func.sum(columna), 0.0)
+
+
+# Totales anuales en un solo agregado SQL (por contrato, grupo o portafolio)
+_TOTALES_ANUALES = [
+    func.count(ImpuestoAlquiler.id).label("meses_registrados"),
+    _suma(ImpuestoAlquiler.monto_alquiler).label("monto_alquiler"),
+    _suma(ImpuestoAlquiler.iva_determinado).label("iva_determinado"),
+    _suma(ImpuestoAlquiler.iva_efectivo).label("iva_efectivo"),
+    _suma(ImpuestoAlquiler.it_determinado).label("it_determinado"),
+    _suma(ImpuestoAlquiler.it_efectivo).label("it_efectivo"),
+    _suma(ImpuestoAlquiler.rc_iva_determinado).label("rc_iva_determinado"),
+    _suma(ImpuestoAlquiler.rc_iva_efectivo).label("rc_iva_efectivo"),
+    _suma(ImpuestoAlquiler.total_determinado).label("total_determinado"),
+    _suma(ImpuestoAlquiler.total_efectivo).label("total_efectivo"),
+    _suma(ImpuestoAlquiler.total_ahorro).label("total_ahorro"),
+    _suma(ImpuestoAlquiler.monto_neto_distribuir).label("monto_neto_distribuir"),
+]
+
+
+def _totales_anuales(t) -> dict:
+    """Bloque "totales_anuales" a partir de una fila de _TOTALES_ANUALES"""
+    iva_d, iva_e = round(t.iva_determinado, 2), round(t.iva_efectivo, 2)
+    rc_d, rc_e = round(t.rc_iva_determinado, 2), round(t.rc_iva_efectivo, 2)
+    return {
+        "iva": {
+            "determinado": iva_d,
+            "efectivo": iva_e,
+            "ahorro_facturas": round(iva_d - iva_e, 2),
+        },
+        "it": {
+            "determinado": round(t.it_determinado, 2),
+            "efectivo": round(t.it_efectivo, 2),
+            "ahorro_facturas": 0.0,
+            "nota": "No compensable"
+        },
+        "rc_iva": {
+            "determinado": rc_d,
+            "efectivo": rc_e,
+            "ahorro_facturas": round(rc_d - rc_e, 2),
+        },
+        "total": {
+            "monto_alquiler": round(t.monto_alquiler, 2),
+            "determinado": round(t.total_determinado, 2),
+            "efectivo": round(t.total_efectivo, 2),
+            "ahorro_total_facturas": round(t.total_ahorro, 2),
+            "neto_distribuido_copropietarios": round(t.monto_neto_distribuir, 2),
         }
     }
@@ -2,12 +2,16 @@
 Endpoints de Inquilinos
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from typing import List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from app.core.dependencies import get_db, get_current_active_user
+from app.core.http_cache import condicional
 from app.models.inquilino import Inquilino
+from app.services import busqueda
+from app.services.alta_masiva import LOTE_MAXIMO, crear_inquilinos
 
 router = APIRouter()
 
@@ -21,6 +25,11 @@ class InquilinoCreate(BaseModel):
     ocupacion: str = None
 
 
+class InquilinosLoteRequest(BaseModel):
+    items: List[InquilinoCreate] = Field(..., min_length=1, max_length=LOTE_MAXIMO)
+    todo_o_nada: bool = Field(False, description="Con un solo rechazo no se crea ninguno")
+
+
 class InquilinoResponse(BaseModel):
     id: int
     nombre_completo: str
@@ -56,7 +65,22 @@ def crear_inquilino(
     return nuevo_inquilino
 
 
-@router.get("/inquilinos", response_model=List[InquilinoResponse])
+@router.post("/inquilinos/lote")
+def crear_inquilinos_lote(
+    req: InquilinosLoteRequest,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """Crear muchos inquilinos en una transacción, con el resultado de cada uno"""
+    try:
+        resultado = crear_inquilinos(db, [item.model_dump() for item in req.items], req.todo_o_nada)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return ORJSONResponse(resultado)
+
+
+@router.get("/inquilinos", response_model=List[InquilinoResponse],
+            dependencies=[Depends(condicional(Inquilino))])
 def listar_inquilinos(
     skip: int = 0,
     limit: int = 100,
@@ -71,7 +95,23 @@ def listar_inquilinos(
     return inquilinos
 
 
-@router.get("/inquilinos/{inquilino_id}", response_model=InquilinoResponse)
+@router.get("/inquilinos/buscar", dependencies=[Depends(condicional(Inquilino))])
+def buscar_inquilinos(
+    q: str = Query(..., min_length=busqueda.LARGO_MINIMO, description="Nombre parcial, CI o teléfono"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """Buscar inquilinos por nombre parcial, CI o teléfono, los más parecidos primero"""
+    try:
+        resultados = busqueda.buscar_inquilinos(db, q, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    return ORJSONResponse({"q": q, "resultados": resultados})
+
+
+@router.get("/inquilinos/{inquilino_id}", response_model=InquilinoResponse,
+            dependencies=[Depends(condicional(Inquilino))])
 def obtener_inquilino(
     inquilino_id: int,
     db: Session = Depends(get_db),
@@ -0,0 +1,102 @@
+"""
+API de Liquidaciones a copropietarios
+Neto mensual de cada copropietario: su parte de lo cobrado menos impuestos y gastos
+"""
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from pydantic import BaseModel, Field
+from typing import Optional
+
+from app.core.dependencies import get_db, get_current_user
+from app.core.http_cache import condicional
+from app.models.copropietario import Copropietario
+from app.models.liquidacion import LiquidacionCopropietario
+from app.models.user import User
+from app.services.liquidacion_copropietarios import liquidar_periodo
+
+router = APIRouter(prefix="/liquidaciones", tags=["Liquidaciones"])
+
+
+# ── SCHEMAS ──────────────────────────────────────────────────────────────────
+
+class LiquidarPeriodoRequest(BaseModel):
+    anio: int = Field(..., description="Año", example=2026)
+    mes: int  = Field(..., ge=1, le=12, description="Mes (1-12)", example=5)
+    propiedad_id: Optional[int] = Field(None, description="Sin propiedad: todas las copropiedades")
+    simular: bool = Field(False, description="Calcular sin guardar")
+
+
+# ── ENDPOINTS ────────────────────────────────────────────────────────────────
+
+@router.post("", summary="Liquidar el periodo a los copropietarios")
+def liquidar(
+    req: LiquidarPeriodoRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Calcula con una sola consulta, para cada copropietario, su parte de lo
+    cobrado en el periodo menos impuestos efectivos y gastos de la
+    propiedad. Repetirlo reemplaza las liquidaciones del periodo (por
+    ejemplo, después de registrar un gasto tardío).
+
+    También se puede encolar como trabajo `liquidacion_copropietarios`.
+    """
+    return liquidar_periodo(db, req.anio, req.mes, req.propiedad_id, req.simular)
+
+
+@router.get("", summary="Listar liquidaciones",
+            dependencies=[Depends(condicional(LiquidacionCopropietario, Copropietario))])
+def listar_liquidaciones(
+    anio: int,
+    mes: Optional[int] = Query(None, ge=1, le=12),
+    propiedad_id: Optional[int] = None,
+    copropietario_id: Optional[int] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    query = db.query(
+        LiquidacionCopropietario, Copropietario.nombre
+    ).join(
+        Copropietario, Copropietario.id == LiquidacionCopropietario.copropietario_id
+    ).filter(LiquidacionCopropietario.anio == anio)
+    if mes:
+        query = query.filter(LiquidacionCopropietario.mes == mes)
+    if propiedad_id:
+        query = query.filter(LiquidacionCopropietario.propiedad_id == propiedad_id)
+    if copropietario_id:
+        query = query.filter(LiquidacionCopropietario.copropietario_id == copropietario_id)
+
+    total = query.count()
+    filas = query.order_by(
+        LiquidacionCopropietario.mes,
+        LiquidacionCopropietario.propiedad_id,
+        LiquidacionCopropietario.copropietario_id
+    ).offset(skip).limit(limit).all()
+
+    return {
+        "total": total,
+        "skip": skip,
+        "limit": limit,
+        "liquidaciones": [_liquidacion_dict(l, nombre) for l, nombre in filas],
+    }
+
+
+# ── FUNCIONES AUXILIARES ─────────────────────────────────────────────────────
+
+def _liquidacion_dict(l: LiquidacionCopropietario, copropietario: str) -> dict:
+    return {
+        "id": l.id,
+        "copropietario_id": l.copropietario_id,
+        "copropietario": copropietario,
+        "propiedad_id": l.propiedad_id,
+        "periodo": l.periodo,
+        "porcentaje_participacion": l.porcentaje_participacion,
+        "ingresos_brutos": l.ingresos_brutos,
+        "impuestos": l.impuestos,
+        "gastos": l.gastos,
+        "monto_neto": l.monto_neto,
+        "calculado_en": l.updated_at.isoformat() if l.updated_at else None,
+    }
@@ -8,11 +8,13 @@ from typing import List
 from pydantic import BaseModel
 from datetime import date
 from app.core.dependencies import get_db, get_current_active_user
-from app.models.pago import Pago, EstadoPago, FormaPago
+from app.core.http_cache import condicional
+from app.models.pago import Pago, FormaPago
 from app.models.contrato import Contrato
 from app.models.propiedad import Propiedad
+from app.services import eventos_tablero
+from app.services.eventos_pago import registrar_pago as registrar_pago_con_eventos
 from app.services.mora_calculator import MoraCalculator
-from app.services.payment_distributor import PaymentDistributor
 
 router = APIRouter()
 
@@ -81,6 +83,10 @@ def crear_pago(
     db.commit()
     db.refresh(nuevo_pago)
     
+    cambios = eventos_tablero.Cambios()
+    cambios.agregar(anio, mes, (None, 0, 0), (nuevo_pago.estado, nuevo_pago.monto_pagado, nuevo_pago.mora_calculada))
+    cambios.publicar("pago_creado", pago_id=nuevo_pago.id, contrato_id=nuevo_pago.contrato_id)
+    
     return nuevo_pago
 
 
@@ -92,56 +98,31 @@ def registrar_pago(
     current_user = Depends(get_current_active_user)
 ):
     """
-    Registrar un pago efectuado y distribuir automáticamente a copropietarios
+    Registrar un pago efectuado.
+
+    El pago, su estado y la mora se guardan con un solo UPDATE; la
+    distribución a copropietarios y el registro del impuesto quedan
+    encolados (tareas_pendientes) y los procesa el worker por lotes.
     """
-    # Obtener pago
-    pago = db.query(Pago).join(Contrato).join(Propiedad).filter(
-        Pago.id == pago_id,
-    ).first()
-    
-    if not pago:
+    resultado = registrar_pago_con_eventos(
+        db,
+        pago_id,
+        monto_pagado=pago_data.monto_pagado,
+        fecha_pago=pago_data.fecha_pago,
+        forma_pago=pago_data.forma_pago,
+        numero_comprobante=pago_data.numero_comprobante,
+        nota=pago_data.nota
+    )
+    if resultado is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Pago no encontrado"
         )
-    
-    # Actualizar información del pago
-    pago.monto_pagado = pago_data.monto_pagado
-    pago.fecha_pago = pago_data.fecha_pago
-    pago.forma_pago = pago_data.forma_pago
-    pago.numero_comprobante = pago_data.numero_comprobante
-    pago.nota = pago_data.nota
-    
-    # Determinar estado
-    if pago.monto_pagado >= pago.monto_esperado:
-        pago.estado = EstadoPago.PAGADO
-    elif pago.monto_pagado > 0:
-        pago.estado = EstadoPago.PARCIAL
-    
-    db.commit()
-    
-    # Calcular mora
-    mora_info = MoraCalculator.actualizar_mora_pago(db, pago_id)
-    
-    # Distribuir a copropietarios si aplica
-    try:
-        distribucion_info = PaymentDistributor.distribuir_pago(db, pago_id)
-    except ValueError as e:
-        distribucion_info = {"error": str(e)}
-    
-    return {
-        "pago": {
-            "id": pago.id,
-            "periodo": pago.periodo,
-            "monto_pagado": pago.monto_pagado,
-            "estado": pago.estado.value
-        },
-        "mora": mora_info,
-        "distribucion": distribucion_info
-    }
-
-
-@router.get("/pagos/contrato/{contrato_id}", response_model=List[PagoResponse])
+    return resultado
+
+
+@router.get("/pagos/contrato/{contrato_id}", response_model=List[PagoResponse],
+            dependencies=[Depends(condicional(Pago, Contrato))])
 def listar_pagos_contrato(
     contrato_id: int,
     db: Session = Depends(get_db),
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from typing import List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 
 from app.core.dependencies import get_db, get_current_user
+from app.core.http_cache import condicional
 from app.models.user import User
 from app.models.propiedad import Propiedad
 from app.models.copropietario import Copropietario
+from app.services import busqueda
+from app.services.alta_masiva import LOTE_MAXIMO, crear_propiedades
 
 router = APIRouter(prefix="/propiedades", tags=["Propiedades"])
 
@@ -33,6 +37,10 @@ class PropiedadCreate(BaseModel):
     # numero_copropietarios: int = 1
     copropietarios: List[CopropietarioCreate] = []
 
+class PropiedadesLoteRequest(BaseModel):
+    items: List[PropiedadCreate] = Field(..., min_length=1, max_length=LOTE_MAXIMO)
+    todo_o_nada: bool = Field(False, description="Con un solo rechazo no se crea ninguna")
+
 class PropiedadResponse(BaseModel):
     id: int
     direccion: str
@@ -68,7 +76,7 @@ def crear_propiedad(propiedad: PropiedadCreate, db: Session = Depends(get_db), c
     for coprop_data in propiedad.copropietarios:
         copropietario = Copropietario(
             propiedad_id=nueva_propiedad.id,
-            nombre_completo=coprop_data.nombre_completo,
+            nombre=coprop_data.nombre_completo,
             ci=coprop_data.ci,
             telefono=coprop_data.telefono,
             email=coprop_data.email,
@@ -83,12 +91,35 @@ def crear_propiedad(propiedad: PropiedadCreate, db: Session = Depends(get_db), c
     db.refresh(nueva_propiedad)
     return nueva_propiedad
 
-@router.get("/", response_model=List[PropiedadResponse])
+@router.post("/lote")
+def crear_propiedades_lote(req: PropiedadesLoteRequest, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """Crear muchas propiedades (con sus copropietarios) en una transacción, con el resultado de cada una"""
+    try:
+        resultado = crear_propiedades(db, [item.model_dump() for item in req.items], req.todo_o_nada)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return ORJSONResponse(resultado)
+
+@router.get("/", response_model=List[PropiedadResponse], dependencies=[Depends(condicional(Propiedad))])
 def listar_propiedades(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     propiedades = db.query(Propiedad).filter(Propiedad.deleted_at == None).offset(skip).limit(limit).all()
     return propiedades
 
-@router.get("/{propiedad_id}", response_model=PropiedadResponse)
+@router.get("/buscar", dependencies=[Depends(condicional(Propiedad))])
+def buscar_propiedades(
+    q: str = Query(..., min_length=busqueda.LARGO_MINIMO, description="Dirección, zona o ciudad"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Buscar propiedades por dirección, zona o ciudad, las más parecidas primero"""
+    try:
+        resultados = busqueda.buscar_propiedades(db, q, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    return ORJSONResponse({"q": q, "resultados": resultados})
+
+@router.get("/{propiedad_id}", response_model=PropiedadResponse, dependencies=[Depends(condicional(Propiedad))])
 def obtener_propiedad(propiedad_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     propiedad = db.query(Propiedad).filter(Propiedad.id == propiedad_id, Propiedad.deleted_at == None).first()
     if not propiedad:
@@ -2,22 +2,33 @@
 Endpoints de Reportes y Analytics
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func, extract
 from datetime import datetime
-from app.core.dependencies import get_db, get_current_active_user
+from typing import Optional
+from app.core.config import settings
+from app.core.dependencies import get_db, get_current_active_user, usuario_por_token
+from app.core.http_cache import condicional
+from app.core.security import ALCANCE_TABLERO, crear_ticket_tablero
+from app.database.session import SessionLocal
 from app.models.pago import Pago, EstadoPago
 from app.models.contrato import Contrato
 from app.models.propiedad import Propiedad
 from app.models.copropietario import Copropietario
 from app.models.distribucion_pago import DistribucionPago
+from app.models.impuesto import ImpuestoAlquiler
+from app.models.unidad_gasto import GastoPropiedad
+from app.services import eventos_tablero
+from app.services.estado_resultados import MONTOS, estado_resultados, exportar_estado_resultados
 from app.services.payment_distributor import PaymentDistributor
 
 router = APIRouter()
 
 
-@router.get("/reportes/dashboard")
+@router.get("/reportes/dashboard", dependencies=[Depends(condicional(Propiedad, Contrato, Pago))])
 def dashboard_general(
     anio: int = None,
     db: Session = Depends(get_db),
@@ -29,58 +40,50 @@ def dashboard_general(
     if anio is None:
         anio = datetime.now().year
     
-    # Total propiedades
-    total_propiedades = db.query(Propiedad).filter(
-        Propiedad.empresa_id == current_user.empresa_id,
-        Propiedad.deleted_at == None
-    ).count()
-    
-    # Ingresos del año
-    ingresos_anio = db.query(func.sum(Pago.monto_pagado)).join(Contrato).join(Propiedad).filter(
-        Propiedad.empresa_id == current_user.empresa_id,
-        Pago.anio == anio,
-        Pago.estado.in_([EstadoPago.PAGADO, EstadoPago.PARCIAL])
-    ).scalar() or 0
-    
-    # Mora acumulada
-    mora_total = db.query(func.sum(Pago.mora_calculada)).join(Contrato).join(Propiedad).filter(
-        Propiedad.empresa_id == current_user.empresa_id,
-        Pago.estado.in_([EstadoPago.VENCIDO, EstadoPago.PARCIAL])
-    ).scalar() or 0
-    
-    # Pagos pendientes
-    pagos_pendientes = db.query(func.count(Pago.id)).join(Contrato).join(Propiedad).filter(
-        Propiedad.empresa_id == current_user.empresa_id,
-        Pago.estado.in_([EstadoPago.PENDIENTE, EstadoPago.VENCIDO])
-    ).scalar() or 0
-    
-    # Ingresos por mes
-    ingresos_mensuales = db.query(
-        Pago.mes,
-        func.sum(Pago.monto_pagado).label('total')
-    ).join(Contrato).join(Propiedad).filter(
-        Propiedad.empresa_id == current_user.empresa_id,
-        Pago.anio == anio,
-        Pago.estado.in_([EstadoPago.PAGADO, EstadoPago.PARCIAL])
-    ).group_by(Pago.mes).all()
-    
-    ingresos_por_mes = {mes: 0 for mes in range(1, 13)}
-    for mes, total in ingresos_mensuales:
-        ingresos_por_mes[mes] = float(total)
+    # Respuesta directa: evita el paso de jsonable_encoder
+    return ORJSONResponse(_resumen_dashboard(db, anio))
+
+
+@router.post("/reportes/dashboard/stream/ticket")
+def ticket_dashboard_en_vivo(current_user = Depends(get_current_active_user)):
+    """
+    Ticket para abrir GET /reportes/dashboard/stream: vale
+    TABLERO_TICKET segundos y solo para el flujo. Se pide uno nuevo antes de
+    cada conexión (también al reconectar tras un error 401).
+    """
+    return {"ticket": crear_ticket_tablero(current_user.id), "expira_en": settings.TABLERO_TICKET}
+
+
+@router.get("/reportes/dashboard/stream", summary="Dashboard en vivo (Server-Sent Events)")
+async def dashboard_en_vivo(
+    token: str = Query(..., description="Ticket de POST /reportes/dashboard/stream/ticket"),
+    anio: int = None,
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    Flujo text/event-stream: primero un evento `resumen` con los mismos datos
+    de GET /reportes/dashboard y después solo deltas (`pago_creado`,
+    `pago_registrado`, `mora_recalculada`, `distribucion_pagada`). Si el
+    cliente se atrasa o se reconecta fuera del historial recibe otro
+    `resumen`. EventSource no admite Authorization, así que la query lleva
+    un ticket de vida corta (POST .../stream/ticket), nunca el token de
+    acceso: este se rechaza aquí.
+    """
+    if anio is None:
+        anio = datetime.now().year
+    usuario_valido = await run_in_threadpool(_token_valido, token)
+    if not usuario_valido:
+        raise HTTPException(status_code=401, detail="No se pudo validar las credenciales")
     
-    return {
-        "anio": anio,
-        "resumen": {
-            "total_propiedades": total_propiedades,
-            "ingresos_anio": round(float(ingresos_anio), 2),
-            "mora_acumulada": round(float(mora_total), 2),
-            "pagos_pendientes": pagos_pendientes
-        },
-        "ingresos_mensuales": ingresos_por_mes
-    }
+    return StreamingResponse(
+        _flujo_dashboard(anio, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
-@router.get("/reportes/copropietarios/{copropietario_id}")
+@router.get("/reportes/copropietarios/{copropietario_id}",
+            dependencies=[Depends(condicional(Copropietario, DistribucionPago, Pago))])
 def reporte_copropietario(
     copropietario_id: int,
     anio: int = None,
@@ -101,7 +104,7 @@ def reporte_copropietario(
         raise HTTPException(status_code=404, detail=str(e))
 
 
-@router.get("/reportes/morosidad")
+@router.get("/reportes/morosidad", dependencies=[Depends(condicional(Propiedad, Contrato, Pago))])
 def reporte_morosidad(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
@@ -109,45 +112,44 @@ def reporte_morosidad(
     """
     Reporte de morosidad por contrato
     """
+    mora_total = func.sum(Pago.mora_calculada).label('mora_total')
     contratos_mora = db.query(
         Contrato.id,
         Contrato.numero_contrato,
         Propiedad.direccion,
-        func.sum(Pago.mora_calculada).label('mora_total'),
+        mora_total,
         func.sum(Pago.monto_esperado - Pago.monto_pagado).label('monto_pendiente'),
         func.count(Pago.id).label('pagos_atrasados')
     ).join(Propiedad).join(Pago).filter(
-        Propiedad.empresa_id == current_user.empresa_id,
         Pago.estado.in_([EstadoPago.VENCIDO, EstadoPago.PARCIAL, EstadoPago.PENDIENTE]),
         Pago.dias_atraso > 0
     ).group_by(
         Contrato.id,
         Contrato.numero_contrato,
         Propiedad.direccion
-    ).all()
+    ).order_by(mora_total.desc()).all()  # Ordenar por mora total descendente
     
-    resultados = []
-    for item in contratos_mora:
-        resultados.append({
+    resultados = [
+        {
             "contrato_id": item[0],
             "numero_contrato": item[1],
             "propiedad": item[2],
             "mora_total": round(float(item[3] or 0), 2),
             "monto_pendiente": round(float(item[4] or 0), 2),
             "pagos_atrasados": item[5]
-        })
-    
-    # Ordenar por mora total descendente
-    resultados.sort(key=lambda x: x['mora_total'], reverse=True)
+        }
+        for item in contratos_mora
+    ]
     
-    return {
+    return ORJSONResponse({
         "total_contratos_mora": len(resultados),
         "mora_total_sistema": sum(r['mora_total'] for r in resultados),
         "contratos": resultados
-    }
+    })
 
 
-@router.get("/reportes/rendimiento-propiedades")
+@router.get("/reportes/rendimiento-propiedades",
+            dependencies=[Depends(condicional(Propiedad, Contrato, Pago))])
 def rendimiento_propiedades(
     anio: int = None,
     db: Session = Depends(get_db),
@@ -160,7 +162,6 @@ def rendimiento_propiedades(
         anio = datetime.now().year
     
     propiedades = db.query(Propiedad).filter(
-        Propiedad.empresa_id == current_user.empresa_id,
         Propiedad.deleted_at == None
     ).all()
     
@@ -183,7 +184,7 @@ def rendimiento_propiedades(
         resultados.append({
             "propiedad_id": prop.id,
             "direccion": prop.direccion,
-            "tipo": prop.tipo.value,
+            "tipo": prop.tipo,
             "canon_base": prop.canon_base,
             "ingresos_anio": round(float(ingresos), 2),
             "mora_pendiente": round(float(mora), 2),
@@ -197,3 +198,150 @@ def rendimiento_propiedades(
         "anio": anio,
         "propiedades": resultados
     }
+
+
+@router.get("/reportes/estado-resultados/{anio}", summary="Estado de resultados por propiedad y unidad",
+            dependencies=[Depends(condicional(Pago, ImpuestoAlquiler, GastoPropiedad, Contrato, Propiedad))])
+def reporte_estado_resultados(
+    anio: int,
+    propiedad_id: Optional[int] = None,
+    por_unidad: bool = True,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """
+    Ingresos, mora, impuestos efectivos, gastos y neto por mes de cada
+    propiedad (y de cada unidad), calculados en una sola consulta.
+    Sin propiedad_id abarca todo el portafolio; para exportarlo completo
+    usar /reportes/estado-resultados/{anio}/exportar.
+    """
+    propiedades = estado_resultados(db, anio, propiedad_id, por_unidad)
+    totales = {nombre: 0.0 for nombre in MONTOS}
+    for propiedad in propiedades:
+        for nombre in MONTOS:
+            totales[nombre] += propiedad["totales"][nombre]
+    
+    return ORJSONResponse({
+        "anio": anio,
+        "total_propiedades": len(propiedades),
+        "totales": {nombre: round(valor, 2) for nombre, valor in totales.items()},
+        "propiedades": propiedades
+    })
+
+
+@router.get("/reportes/estado-resultados/{anio}/exportar", summary="Exportar estado de resultados del portafolio (CSV)")
+def exportar_estado_resultados_csv(
+    anio: int,
+    por_unidad: bool = True,
+    current_user = Depends(get_current_active_user)
+):
+    """
+    Una línea por (propiedad, unidad, mes) de todo el portafolio. Se
+    transmite a medida que se lee de la base, sin armar el archivo en memoria.
+    """
+    def generar():
+        # Sesión propia: la de get_db se cierra antes de terminar de enviar
+        db = SessionLocal()
+        try:
+            yield from exportar_estado_resultados(db, anio, por_unidad)
+        finally:
+            db.close()
+    
+    return StreamingResponse(
+        generar(),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="estado_resultados_{anio}.csv"'}
+    )
+
+
+# ── FUNCIONES AUXILIARES ─────────────────────────────────────────────────────
+
+def _resumen_dashboard(db: Session, anio: int) -> dict:
+    """Indicadores de GET /reportes/dashboard"""
+    # Total propiedades
+    total_propiedades = db.query(Propiedad).filter(
+        Propiedad.deleted_at == None
+    ).count()
+    
+    # Ingresos del año
+    ingresos_anio = db.query(func.sum(Pago.monto_pagado)).join(Contrato).filter(
+        Pago.anio == anio,
+        Pago.estado.in_([EstadoPago.PAGADO, EstadoPago.PARCIAL])
+    ).scalar() or 0
+    
+    # Mora acumulada
+    mora_total = db.query(func.sum(Pago.mora_calculada)).join(Contrato).filter(
+        Pago.estado.in_([EstadoPago.VENCIDO, EstadoPago.PARCIAL])
+    ).scalar() or 0
+    
+    # Pagos pendientes
+    pagos_pendientes = db.query(func.count(Pago.id)).join(Contrato).filter(
+        Pago.estado.in_([EstadoPago.PENDIENTE, EstadoPago.VENCIDO])
+    ).scalar() or 0
+    
+    # Ingresos por mes
+    ingresos_mensuales = db.query(
+        Pago.mes,
+        func.sum(Pago.monto_pagado).label('total')
+    ).join(Contrato).filter(
+        Pago.anio == anio,
+        Pago.estado.in_([EstadoPago.PAGADO, EstadoPago.PARCIAL])
+    ).group_by(Pago.mes).all()
+    
+    ingresos_por_mes = {mes: 0 for mes in range(1, 13)}
+    for mes, total in ingresos_mensuales:
+        ingresos_por_mes[mes] = float(total)
+    
+    return {
+        "anio": anio,
+        "resumen": {
+            "total_propiedades": total_propiedades,
+            "ingresos_anio": round(float(ingresos_anio), 2),
+            "mora_acumulada": round(float(mora_total), 2),
+            "pagos_pendientes": pagos_pendientes
+        },
+        "ingresos_mensuales": ingresos_por_mes
+    }
+
+
+def _token_valido(token: str) -> bool:
+    db = SessionLocal()
+    try:
+        usuario = usuario_por_token(db, token, ALCANCE_TABLERO)
+        return usuario is not None and usuario.is_active
+    finally:
+        db.close()
+
+
+def _resumen_en_sesion(anio: int) -> dict:
+    # El flujo dura más que la petición: abre su propia sesión
+    db = SessionLocal()
+    try:
+        return _resumen_dashboard(db, anio)
+    finally:
+        db.close()
+
+
+async def _flujo_dashboard(anio: int, last_event_id: Optional[str]):
+    # Suscribirse dentro del generador garantiza que el finally la libere
+    suscripcion = eventos_tablero.suscribir(last_event_id)
+    try:
+        if suscripcion.necesita_resumen:
+            yield await _evento_resumen(anio)
+        while True:
+            evento = await suscripcion.siguiente(settings.TABLERO_KEEPALIVE)
+            if evento is None:
+                yield b": keepalive\n\n"
+            elif evento.tipo == eventos_tablero.RESINCRONIZAR:
+                yield await _evento_resumen(anio)
+            else:
+                yield eventos_tablero.formato_sse(evento)
+    finally:
+        eventos_tablero.desuscribir(suscripcion)
+
+
+async def _evento_resumen(anio: int) -> bytes:
+    # El id es el del último delta ya incluido (o en cola), para reanudar desde ahí
+    desde = eventos_tablero.ultimo_id()
+    resumen = await run_in_threadpool(_resumen_en_sesion, anio)
+    return eventos_tablero.formato_sse(eventos_tablero.Evento(desde, "resumen", resumen))
@@ -0,0 +1,151 @@
+"""
+API de Trabajos en segundo plano
+Encolar operaciones largas y consultar su avance (las ejecuta app.cli.worker)
+"""
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from pydantic import BaseModel, Field, ValidationError
+from typing import Optional
+
+from app.core.dependencies import get_db, get_current_user
+from app.models.trabajo import EstadoTrabajo, Trabajo
+from app.models.user import User
+from app.services import tareas  # noqa: F401  (registra las tareas)
+from app.services.trabajos import TAREAS, cancelar, encolar
+
+router = APIRouter(prefix="/trabajos", tags=["Trabajos"])
+
+
+# ── SCHEMAS ──────────────────────────────────────────────────────────────────
+
+class EncolarTrabajoRequest(BaseModel):
+    tipo: str = Field(..., description="Ver GET /trabajos/tipos", example="cierre_impuestos")
+    parametros: dict = Field(default_factory=dict, example={"anio": 2026, "mes": 5})
+    max_intentos: int = Field(3, ge=1, le=10)
+
+
+# ── ENDPOINTS ────────────────────────────────────────────────────────────────
+
+@router.get("/tipos", summary="Tipos de trabajo y sus parámetros")
+def listar_tipos(
+    current_user: User = Depends(get_current_user)
+):
+    return {
+        tipo: {"descripcion": definicion.descripcion, "parametros": definicion.parametros.model_json_schema()}
+        for tipo, definicion in sorted(TAREAS.items())
+    }
+
+
+@router.post("", summary="Encolar un trabajo", status_code=202)
+def encolar_trabajo(
+    req: EncolarTrabajoRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Registra el trabajo y responde de inmediato; el worker lo ejecuta.
+    Consultar el avance con GET /trabajos/{id}.
+    """
+    try:
+        trabajo = encolar(db, req.tipo, req.parametros, current_user.id, req.max_intentos)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _trabajo_dict(trabajo)
+
+
+@router.get("", summary="Listar trabajos")
+def listar_trabajos(
+    estado: Optional[str] = Query(None, pattern="^(pendiente|en_curso|completado|fallido|cancelado)$"),
+    tipo: Optional[str] = None,
+    limite: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Los más recientes primero"""
+    query = db.query(Trabajo).filter(Trabajo.deleted_at == None)
+    if estado:
+        query = query.filter(Trabajo.estado == estado)
+    if tipo:
+        query = query.filter(Trabajo.tipo == tipo)
+    return [_trabajo_dict(t) for t in query.order_by(Trabajo.id.desc()).limit(limite).all()]
+
+
+@router.get("/{trabajo_id}", summary="Estado y avance de un trabajo")
+def obtener_trabajo(
+    trabajo_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return _trabajo_dict(_obtener_o_404(db, trabajo_id), detalle=True)
+
+
+@router.post("/{trabajo_id}/cancelar", summary="Cancelar un trabajo")
+def cancelar_trabajo(
+    trabajo_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Un trabajo pendiente se cancela de inmediato. Uno en curso se detiene en
+    su próximo reporte de avance (lo que ya confirmó queda guardado).
+    """
+    try:
+        trabajo = cancelar(db, _obtener_o_404(db, trabajo_id))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _trabajo_dict(trabajo)
+
+
+@router.get("/{trabajo_id}/archivo", summary="Descargar el archivo generado por un trabajo")
+def descargar_archivo(
+    trabajo_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    trabajo = _obtener_o_404(db, trabajo_id)
+    ruta = (trabajo.resultado or {}).get("archivo")
+    if trabajo.estado != EstadoTrabajo.COMPLETADO.value or not ruta:
+        raise HTTPException(status_code=404, detail="El trabajo no generó un archivo")
+    if not os.path.exists(ruta):
+        raise HTTPException(status_code=410, detail="El archivo ya no está disponible")
+    return FileResponse(ruta, filename=os.path.basename(ruta))
+
+
+# ── FUNCIONES AUXILIARES ─────────────────────────────────────────────────────
+
+def _obtener_o_404(db: Session, trabajo_id: int) -> Trabajo:
+    trabajo = db.query(Trabajo).filter(Trabajo.id == trabajo_id, Trabajo.deleted_at == None).first()
+    if not trabajo:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return trabajo
+
+
+def _trabajo_dict(t: Trabajo, detalle: bool = False) -> dict:
+    datos = {
+        "id": t.id,
+        "tipo": t.tipo,
+        "estado": t.estado,
+        "progreso": t.progreso,
+        "mensaje": t.mensaje,
+        "intentos": t.intentos,
+        "max_intentos": t.max_intentos,
+        "cancelacion_solicitada": t.cancelacion_solicitada,
+        "creado": t.created_at,
+        "iniciado": t.iniciado_en,
+        "finalizado": t.finalizado_en,
+    }
+    if detalle:
+        datos.update({
+            "parametros": t.parametros,
+            "resultado": t.resultado,
+            "error": t.error,
+            "trabajador": t.trabajador,
+            "disponible_desde": t.disponible_desde,
+            "latido": t.latido_en,
+        })
+    return datos
@@ -1,17 +1,26 @@
 """
 API Router para Unidades de Alquiler y Gastos de Propiedades
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import date
 
 from app.core.dependencies import get_db, get_current_user
+from app.core.http_cache import condicional
+from app.models.propiedad import Propiedad
+from app.models.unidad_gasto import UnidadAlquiler, GastoPropiedad
 from app.models.user import User
+from app.services import resumen_gastos
+from app.services.alta_masiva import LOTE_MAXIMO, crear_unidades
 
 router = APIRouter(prefix="/unidades-gastos", tags=["Unidades y Gastos"])
 
+ESTADO_OCUPADO = "ocupado"
+
 
 # ── SCHEMAS ──────────────────────────────────────────────────────────────────
 
@@ -30,6 +39,11 @@ class CrearUnidadRequest(BaseModel):
     observaciones: Optional[str] = None
 
 
+class CrearUnidadesLoteRequest(BaseModel):
+    items: List[CrearUnidadRequest] = Field(..., min_length=1, max_length=LOTE_MAXIMO)
+    todo_o_nada: bool = Field(False, description="Con un solo rechazo no se crea ninguna")
+
+
 class ActualizarEstadoUnidadRequest(BaseModel):
     estado: str = Field(..., description="disponible, ocupado, mantenimiento, reservado")
 
@@ -108,7 +122,26 @@ def crear_unidad(
     }
 
 
-@router.get("/unidades/propiedad/{propiedad_id}", summary="Listar unidades de una propiedad")
+@router.post("/unidades/lote", summary="Crear unidades de alquiler en lote")
+def crear_unidades_lote(
+    req: CrearUnidadesLoteRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Crea muchas unidades en una sola transacción (por ejemplo, al incorporar
+    la cartera de un cliente). Las propiedades se verifican con una sola
+    consulta; cada ítem vuelve con su id o con el motivo del rechazo.
+    """
+    try:
+        resultado = crear_unidades(db, [item.model_dump() for item in req.items], req.todo_o_nada)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return ORJSONResponse(resultado)
+
+
+@router.get("/unidades/propiedad/{propiedad_id}", summary="Listar unidades de una propiedad",
+            dependencies=[Depends(condicional(UnidadAlquiler))])
 def listar_unidades_propiedad(
     propiedad_id: int,
     db: Session = Depends(get_db),
@@ -117,36 +150,58 @@ def listar_unidades_propiedad(
     """
     Lista todas las unidades de una propiedad específica.
     """
-    from app.models.unidad_gasto import UnidadAlquiler
-    
-    unidades = db.query(UnidadAlquiler).filter(
+    unidades = db.query(
+        UnidadAlquiler.id, UnidadAlquiler.numero_unidad, UnidadAlquiler.nombre, UnidadAlquiler.tipo,
+        UnidadAlquiler.superficie, UnidadAlquiler.piso, UnidadAlquiler.canon_base, UnidadAlquiler.estado,
+        UnidadAlquiler.dormitorios, UnidadAlquiler.banos
+    ).filter(
         UnidadAlquiler.propiedad_id == propiedad_id,
         UnidadAlquiler.deleted_at == None
     ).all()
+    grupos = _grupos_unidades(db, UnidadAlquiler.propiedad_id == propiedad_id)
     
     return {
         "propiedad_id": propiedad_id,
         "total_unidades": len(unidades),
-        "unidades": [
-            {
-                "id": u.id,
-                "numero_unidad": u.numero_unidad,
-                "nombre": u.nombre,
-                "tipo": u.tipo,
-                "superficie": u.superficie,
-                "piso": u.piso,
-                "canon_base": u.canon_base,
-                "estado": u.estado,
-                "dormitorios": u.dormitorios,
-                "banos": u.banos
-            }
-            for u in unidades
-        ],
-        "resumen_por_tipo": _resumen_por_tipo(unidades),
-        "resumen_por_estado": _resumen_por_estado(unidades)
+        "unidades": [u._asdict() for u in unidades],
+        **_resumen_unidades(grupos)
     }
 
 
+@router.get("/unidades/ocupacion", summary="Ocupación de unidades del portafolio",
+            dependencies=[Depends(condicional(UnidadAlquiler, Propiedad))])
+def ocupacion_portafolio(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Ocupación por propiedad (unidades, canon y superficie ocupados) y total
+    del portafolio, a partir de una sola consulta agrupada por propiedad,
+    tipo y estado.
+    """
+    grupos = _grupos_unidades(db, Propiedad.deleted_at == None)
+    
+    por_propiedad = {}
+    for g in grupos:
+        por_propiedad.setdefault((g.propiedad_id, g.direccion), []).append(g)
+    
+    propiedades = []
+    for (propiedad_id, direccion), filas in por_propiedad.items():
+        resumen = _resumen_unidades(filas)
+        propiedades.append({
+            "propiedad_id": propiedad_id,
+            "direccion": direccion,
+            **resumen["ocupacion"],
+            "resumen_por_estado": resumen["resumen_por_estado"]
+        })
+    
+    return ORJSONResponse({
+        "total_propiedades": len(propiedades),
+        "portafolio": _resumen_unidades(grupos)["ocupacion"],
+        "propiedades": propiedades
+    })
+
+
 @router.patch("/unidades/{unidad_id}/estado", summary="Cambiar estado de unidad")
 def cambiar_estado_unidad(
     unidad_id: int,
@@ -239,145 +294,186 @@ def crear_gasto(
     }
 
 
-@router.get("/gastos/propiedad/{propiedad_id}", summary="Listar gastos de una propiedad")
+@router.get("/gastos/propiedad/{propiedad_id}", summary="Listar gastos de una propiedad",
+            dependencies=[Depends(condicional(GastoPropiedad))])
 def listar_gastos_propiedad(
     propiedad_id: int,
     anio: Optional[int] = None,
     tipo_gasto: Optional[str] = None,
+    incluir_gastos: bool = True,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Lista todos los gastos de una propiedad.
+    Lista los gastos de una propiedad (paginado, más recientes primero).
     Opcionalmente filtrar por año y/o tipo de gasto.
-    """
-    from app.models.unidad_gasto import GastoPropiedad
-    
-    query = db.query(GastoPropiedad).filter(
-        GastoPropiedad.propiedad_id == propiedad_id,
-        GastoPropiedad.deleted_at == None
-    )
     
-    if anio:
-        from sqlalchemy import extract
-        query = query.filter(extract('year', GastoPropiedad.fecha_gasto) == anio)
-    
-    if tipo_gasto:
-        query = query.filter(GastoPropiedad.tipo_gasto == tipo_gasto)
-    
-    gastos = query.order_by(GastoPropiedad.fecha_gasto.desc()).all()
+    Totales y resumen por tipo salen del resumen mensual, no de la página;
+    con incluir_gastos=false solo se devuelven los totales.
+    """
+    totales = resumen_gastos.totales_por_tipo(db, propiedad_id, anio, tipo_gasto)
     
-    total_gastos = sum(g.monto for g in gastos)
+    gastos = []
+    if incluir_gastos:
+        gastos = _consulta_gastos(db, propiedad_id, anio, tipo_gasto).offset(skip).limit(limit).all()
     
-    return {
+    return ORJSONResponse({
         "propiedad_id": propiedad_id,
         "filtros": {"anio": anio, "tipo_gasto": tipo_gasto},
-        "total_gastos": len(gastos),
-        "monto_total": round(total_gastos, 2),
-        "gastos": [
-            {
-                "id": g.id,
-                "tipo_gasto": g.tipo_gasto,
-                "descripcion": g.descripcion,
-                "monto": g.monto,
-                "fecha": str(g.fecha_gasto),
-                "proveedor": g.proveedor,
-                "numero_factura": g.numero_factura,
-                "periodo": g.periodo
-            }
-            for g in gastos
-        ],
-        "resumen_por_tipo": _resumen_gastos_por_tipo(gastos)
-    }
+        "total_gastos": sum(t.cantidad for t in totales),
+        "monto_total": round(sum(t.monto_total for t in totales), 2),
+        "paginacion": {"skip": skip, "limit": limit, "devueltos": len(gastos)},
+        "gastos": [_gasto_dict(g) for g in gastos],
+        "resumen_por_tipo": {
+            t.tipo_gasto: {"cantidad": t.cantidad, "monto_total": round(t.monto_total, 2)}
+            for t in totales
+        }
+    })
 
 
-@router.get("/gastos/resumen/{propiedad_id}/{anio}", summary="Resumen anual de gastos")
+@router.get("/gastos/resumen/{propiedad_id}/{anio}", summary="Resumen anual de gastos",
+            dependencies=[Depends(condicional(GastoPropiedad))])
 def resumen_gastos_anual(
     propiedad_id: int,
     anio: int,
+    incluir_gastos: bool = False,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Resumen de gastos anuales de una propiedad, agrupado por tipo.
-    """
-    from app.models.unidad_gasto import GastoPropiedad
-    from sqlalchemy import extract
-    
-    gastos = db.query(GastoPropiedad).filter(
-        GastoPropiedad.propiedad_id == propiedad_id,
-        extract('year', GastoPropiedad.fecha_gasto) == anio,
-        GastoPropiedad.deleted_at == None
-    ).all()
+    Resumen de gastos anuales de una propiedad, agrupado por tipo y por mes.
     
-    total = sum(g.monto for g in gastos)
+    Se lee del resumen mensual (a lo sumo 12 filas por tipo). El detalle de
+    gastos es opcional (incluir_gastos=true) y paginado.
+    """
+    filas = resumen_gastos.resumen_anual(db, propiedad_id, anio)
     
-    # Agrupar por tipo
     por_tipo = {}
-    for g in gastos:
-        tipo = g.tipo_gasto
-        if tipo not in por_tipo:
-            por_tipo[tipo] = {"cantidad": 0, "monto_total": 0, "gastos": []}
-        por_tipo[tipo]["cantidad"] += 1
-        por_tipo[tipo]["monto_total"] += g.monto
-        por_tipo[tipo]["gastos"].append({
-            "descripcion": g.descripcion,
-            "monto": g.monto,
-            "fecha": str(g.fecha_gasto)
-        })
+    por_mes = {mes: 0 for mes in range(1, 13)}
+    for f in filas:
+        datos = por_tipo.setdefault(f.tipo_gasto, {"cantidad": 0, "monto_total": 0})
+        datos["cantidad"] += f.cantidad
+        datos["monto_total"] += f.monto_total
+        por_mes[f.mes] += f.monto_total
     
-    return {
+    respuesta = {
         "propiedad_id": propiedad_id,
         "anio": anio,
-        "total_gastos": len(gastos),
-        "monto_total": round(total, 2),
+        "total_gastos": sum(d["cantidad"] for d in por_tipo.values()),
+        "monto_total": round(sum(d["monto_total"] for d in por_tipo.values()), 2),
         "por_tipo": {
             tipo: {
-                "cantidad": data["cantidad"],
-                "monto_total": round(data["monto_total"], 2),
-                "promedio": round(data["monto_total"] / data["cantidad"], 2),
-                "gastos": data["gastos"]
+                "cantidad": datos["cantidad"],
+                "monto_total": round(datos["monto_total"], 2),
+                "promedio": round(datos["monto_total"] / datos["cantidad"], 2)
             }
-            for tipo, data in por_tipo.items()
-        }
+            for tipo, datos in por_tipo.items()
+        },
+        "por_mes": {mes: round(monto, 2) for mes, monto in por_mes.items()}
     }
+    if incluir_gastos:
+        gastos = _consulta_gastos(db, propiedad_id, anio).offset(skip).limit(limit).all()
+        respuesta["paginacion"] = {"skip": skip, "limit": limit, "devueltos": len(gastos)}
+        respuesta["gastos"] = [_gasto_dict(g) for g in gastos]
+    
+    return ORJSONResponse(respuesta)
 
 
 # ── FUNCIONES AUXILIARES ─────────────────────────────────────────────────────
 
-def _resumen_por_tipo(unidades):
-    """Cuenta unidades por tipo"""
-    resumen = {}
-    for u in unidades:
-        tipo = u.tipo
-        if tipo not in resumen:
-            resumen[tipo] = 0
-        resumen[tipo] += 1
-    return resumen
-
-
-def _resumen_por_estado(unidades):
-    """Cuenta unidades por estado"""
-    resumen = {}
-    for u in unidades:
-        estado = u.estado
-        if estado not in resumen:
-            resumen[estado] = 0
-        resumen[estado] += 1
-    return resumen
-
-
-def _resumen_gastos_por_tipo(gastos):
-    """Agrupa gastos por tipo y suma montos"""
-    resumen = {}
-    for g in gastos:
-        tipo = g.tipo_gasto
-        if tipo not in resumen:
-            resumen[tipo] = {"cantidad": 0, "monto_total": 0}
-        resumen[tipo]["cantidad"] += 1
-        resumen[tipo]["monto_total"] += g.monto
+def _grupos_unidades(db: Session, *filtros):
+    """
+    Unidades vigentes agrupadas por (propiedad, tipo, estado) con cantidad,
+    canon y superficie. Usa ix_unidades_alquiler_propiedad_estado.
+    """
+    return db.query(
+        UnidadAlquiler.propiedad_id,
+        Propiedad.direccion,
+        UnidadAlquiler.tipo,
+        UnidadAlquiler.estado,
+        func.count(UnidadAlquiler.id).label("cantidad"),
+        func.sum(UnidadAlquiler.canon_base).label("canon"),
+        func.sum(UnidadAlquiler.superficie).label("superficie")
+    ).join(Propiedad, Propiedad.id == UnidadAlquiler.propiedad_id).filter(
+        UnidadAlquiler.deleted_at == None,
+        *filtros
+    ).group_by(
+        UnidadAlquiler.propiedad_id, Propiedad.direccion, UnidadAlquiler.tipo, UnidadAlquiler.estado
+    ).order_by(UnidadAlquiler.propiedad_id).all()
+
+
+def _resumen_unidades(grupos):
+    """Conteos por tipo y estado, canon total y superficie ocupada de los grupos"""
+    por_tipo = {}
+    por_estado = {}
+    total = ocupadas = 0
+    canon_total = canon_ocupado = superficie_total = superficie_ocupada = 0.0
+    for g in grupos:
+        por_tipo[g.tipo] = por_tipo.get(g.tipo, 0) + g.cantidad
+        por_estado[g.estado] = por_estado.get(g.estado, 0) + g.cantidad
+        total += g.cantidad
+        canon_total += g.canon or 0
+        superficie_total += g.superficie or 0
+        if g.estado == ESTADO_OCUPADO:
+            ocupadas += g.cantidad
+            canon_ocupado += g.canon or 0
+            superficie_ocupada += g.superficie or 0
+    
+    return {
+        "resumen_por_tipo": por_tipo,
+        "resumen_por_estado": por_estado,
+        "ocupacion": {
+            "total_unidades": total,
+            "unidades_ocupadas": ocupadas,
+            "tasa_ocupacion": round(ocupadas * 100 / total, 2) if total else 0,
+            "canon_total": round(canon_total, 2),
+            "canon_ocupado": round(canon_ocupado, 2),
+            "superficie_total": round(superficie_total, 2),
+            "superficie_ocupada": round(superficie_ocupada, 2)
+        }
+    }
+
+
+def _consulta_gastos(db: Session, propiedad_id: int, anio: Optional[int] = None, tipo_gasto: Optional[str] = None):
+    """Gastos vigentes de la propiedad, más recientes primero (ix_gastos_propiedad_propiedad_fecha)"""
+    # Solo las columnas listadas: filas livianas en vez de entidades ORM
+    query = db.query(
+        GastoPropiedad.id,
+        GastoPropiedad.tipo_gasto,
+        GastoPropiedad.descripcion,
+        GastoPropiedad.monto,
+        GastoPropiedad.fecha_gasto,
+        GastoPropiedad.proveedor,
+        GastoPropiedad.numero_factura,
+        GastoPropiedad.periodo
+    ).filter(
+        GastoPropiedad.propiedad_id == propiedad_id,
+        GastoPropiedad.deleted_at == None
+    )
+    
+    if anio:
+        # Rango de fechas en vez de extract(year): así se usa el índice
+        desde, hasta = resumen_gastos.rango_anio(anio)
+        query = query.filter(GastoPropiedad.fecha_gasto >= desde, GastoPropiedad.fecha_gasto < hasta)
     
-    for tipo in resumen:
-        resumen[tipo]["monto_total"] = round(resumen[tipo]["monto_total"], 2)
+    if tipo_gasto:
+        query = query.filter(GastoPropiedad.tipo_gasto == tipo_gasto)
     
-    return resumen
+    return query.order_by(GastoPropiedad.fecha_gasto.desc(), GastoPropiedad.id.desc())
+
+
+def _gasto_dict(g) -> dict:
+    return {
+        "id": g.id,
+        "tipo_gasto": g.tipo_gasto,
+        "descripcion": g.descripcion,
+        "monto": g.monto,
+        "fecha": str(g.fecha_gasto),
+        "proveedor": g.proveedor,
+        "numero_factura": g.numero_factura,
+        "periodo": g.periodo
+    }
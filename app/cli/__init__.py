@@ -0,0 +1,4 @@
+"""
+Comandos de línea para tareas de mantenimiento y carga de datos.
+Se ejecutan con: python -m app.cli.<comando> --help
+"""
@@ -0,0 +1,61 @@
+"""
+Cierre mensual de impuestos desde la línea de comandos
+======================================================
+Registra el ImpuestoAlquiler de todos los pagos cobrados del periodo que aún
+no lo tienen, aplicando las facturas de compensación disponibles.
+
+Uso:
+    python -m app.cli.cierre_impuestos --periodo 2026-05
+    python -m app.cli.cierre_impuestos --periodo 2026-06 --simular
+"""
+import argparse
+from datetime import date
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401  (registra todas las tablas en Base.metadata)
+from app.core.config import settings
+from app.services import reglas_impuesto
+from app.services.cierre_impuestos import cerrar_periodo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cierre mensual de impuestos de alquileres")
+    parser.add_argument("--periodo", required=True, help="Periodo a cerrar (YYYY-MM)")
+    parser.add_argument("--fecha-declaracion", type=date.fromisoformat, help="YYYY-MM-DD")
+    parser.add_argument("--simular", action="store_true", help="Calcular sin guardar")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    args = parser.parse_args()
+
+    try:
+        anio, mes = (int(parte) for parte in args.periodo.split("-"))
+        if not 1 <= mes <= 12:
+            raise ValueError
+    except ValueError:
+        parser.error("--periodo debe tener formato YYYY-MM")
+
+    engine = create_engine(args.database_url)
+    fabrica = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    reglas_impuesto.configurar(fabrica)
+    db = fabrica()
+    try:
+        resultado = cerrar_periodo(db, anio, mes, args.fecha_declaracion, args.simular)
+    finally:
+        db.close()
+        engine.dispose()
+
+    totales = resultado["totales"]
+    print(f"Periodo {resultado['periodo']}{' (simulado)' if resultado['simulado'] else ''}")
+    print(f"  impuestos registrados  {resultado['impuestos_registrados']:>10,}")
+    print(f"  facturas aplicadas     {resultado['facturas_aplicadas']:>10,}")
+    print(f"  alquiler declarado     {totales['monto_alquiler']:>14,.2f}")
+    print(f"  impuesto determinado   {totales['determinado']:>14,.2f}")
+    print(f"  impuesto efectivo      {totales['efectivo']:>14,.2f}")
+    for etapa, segundos in resultado["etapas_s"].items():
+        print(f"  {etapa:<22} {segundos:>10.3f} s")
+    print(f"✅ Cierre en {resultado['duracion_s']:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Exportación de la declaración al SIN desde la línea de comandos
+===============================================================
+Escribe una línea por impuesto registrado de todos los contratos en el rango
+de periodos, leyendo con un cursor del lado del servidor (memoria constante).
+
+Uso:
+    python -m app.cli.exportar_sin --desde 2026-01 --hasta 2026-03 --salida t1.csv
+    python -m app.cli.exportar_sin --desde 2026-03 --hasta 2026-03 --formato txt > marzo.txt
+"""
+import argparse
+import re
+import sys
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401  (registra todas las tablas en Base.metadata)
+from app.core.config import settings
+from app.services.exportacion_sin import FORMATOS, LOTE_EXPORTACION, escribir_declaracion
+
+PATRON_PERIODO = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportar la declaración de impuestos al SIN")
+    parser.add_argument("--desde", required=True, help="Periodo inicial (YYYY-MM)")
+    parser.add_argument("--hasta", required=True, help="Periodo final (YYYY-MM)")
+    parser.add_argument("--formato", choices=FORMATOS, default="csv")
+    parser.add_argument("--salida", help="Archivo de salida (por defecto la salida estándar)")
+    parser.add_argument("--lote", type=int, default=LOTE_EXPORTACION, help="Filas por lectura del cursor")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    args = parser.parse_args()
+
+    if not (PATRON_PERIODO.match(args.desde) and PATRON_PERIODO.match(args.hasta)):
+        parser.error("--desde y --hasta deben tener formato YYYY-MM")
+    if args.desde > args.hasta:
+        parser.error("--desde no puede ser posterior a --hasta")
+
+    inicio = time.perf_counter()
+    engine = create_engine(args.database_url)
+    db = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    destino = open(args.salida, "w", encoding="utf-8", newline="") if args.salida else sys.stdout
+    try:
+        registros = escribir_declaracion(db, args.desde, args.hasta, args.formato, destino, args.lote)
+    finally:
+        if args.salida:
+            destino.close()
+        db.close()
+        engine.dispose()
+
+    # El resumen va a stderr para no mezclarse con el archivo en stdout
+    print(f"✅ {registros:,} registros {args.desde}..{args.hasta} "
+          f"en {time.perf_counter() - inicio:.2f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,563 @@
+"""
+Generador de portafolio sintético
+=================================
+Crea un portafolio realista y reproducible (semilla fija) para benchmarks,
+pruebas de carga y revisión de planes de consulta:
+
+  propiedades → unidades + copropietarios + gastos
+  inquilinos  → contratos plurianuales → pagos mensuales
+                (a tiempo, atrasados, parciales e impagos)
+  pagos       → distribuciones, impuestos y facturas de compensación
+
+En PostgreSQL se carga con COPY; en otros motores con inserts por lotes
+(executemany). Los IDs se asignan en memoria a partir del máximo existente,
+así las relaciones se arman sin RETURNING y se puede cargar sobre una base
+que ya tiene datos.
+
+Uso:
+    python -m app.cli.generar_datos --escala mediana
+    python -m app.cli.generar_datos --contratos 5000 --meses 36 --semilla 7 \\
+        --database-url sqlite:///./bench.db --crear-tablas
+"""
+import argparse
+import csv
+import io
+import random
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import Session
+
+import app.models  # noqa: F401  (registra todas las tablas en Base.metadata)
+from app.core.config import settings
+from app.database.base import Base
+from app.models.distribucion_pago import EstadoDistribucion
+from app.models.pago import EstadoPago, FormaPago
+from app.services import resumen_gastos
+from app.services.tax_calculator import (
+    MESES_TRIMESTRALES, calcular_impuestos, campos_registro, get_trimestre,
+)
+
+ESCALAS = {"pequena": 1_000, "mediana": 10_000, "grande": 100_000}
+
+# Orden de carga (respeta las llaves foráneas)
+TABLAS = [
+    "propiedades",
+    "copropietarios",
+    "unidades_alquiler",
+    "gastos_propiedad",
+    "inquilinos",
+    "contratos",
+    "pagos",
+    "distribuciones_pago",
+    "impuestos_alquiler",
+    "facturas_compensacion",
+]
+
+NOMBRES = [
+    "Juan", "María", "Carlos", "Ana", "Luis", "Rosa", "Jorge", "Carmen", "Pedro",
+    "Lucía", "Miguel", "Sofía", "Fernando", "Patricia", "Ricardo", "Gabriela",
+]
+APELLIDOS = [
+    "Mamani", "Quispe", "Flores", "Rodríguez", "Choque", "Gutiérrez", "Vargas",
+    "Condori", "López", "Rojas", "Fernández", "Torrez", "Gonzales", "Morales",
+]
+CIUDADES = {
+    "La Paz": ["Sopocachi", "Miraflores", "Calacoto", "Obrajes", "San Miguel", "Achumani", "Centro"],
+    "Santa Cruz": ["Equipetrol", "Urbarí", "Las Palmas", "Centro", "Plan 3000"],
+    "Cochabamba": ["Cala Cala", "Queru Queru", "Sarco", "Centro"],
+    "El Alto": ["Ciudad Satélite", "Villa Adela", "Río Seco"],
+}
+TIPOS_UNIDAD = ["departamento", "tienda", "oficina", "local", "deposito"]
+TIPOS_GASTO = ["impuesto_anual", "mantenimiento", "pintura", "reparacion", "servicios", "administracion"]
+BANCOS = ["Banco Unión", "BNB", "Banco Mercantil Santa Cruz", "BancoSol", "Banco Bisa"]
+FORMAS_PAGO = [f.name for f in FormaPago]
+
+
+def _sumar_meses(anio: int, mes: int, n: int):
+    total = anio * 12 + (mes - 1) + n
+    return total // 12, total % 12 + 1
+
+
+class GeneradorPortafolio:
+    """Genera filas (dicts por tabla) con IDs asignados en memoria"""
+
+    def __init__(self, semilla: int, meses: int, hoy: date, ids_iniciales: Dict[str, int]):
+        self.rng = random.Random(semilla)
+        self.meses = meses
+        self.hoy = hoy
+        self.ahora = datetime.utcnow()
+        self.inicio_ventana = _sumar_meses(hoy.year, hoy.month, -(meses - 1))
+        self._ids = dict(ids_iniciales)
+
+        # Estado compartido entre lotes de contratos
+        self._unidades: List[tuple] = []          # (unidad_id, propiedad_id, canon_base)
+        self._copropietarios: Dict[int, List[tuple]] = {}  # propiedad_id -> [(id, pct)]
+
+    def _nuevo_id(self, tabla: str) -> int:
+        self._ids[tabla] += 1
+        return self._ids[tabla]
+
+    def _auditoria(self) -> Dict:
+        return {"created_at": self.ahora, "updated_at": self.ahora, "deleted_at": None}
+
+    def _persona(self) -> str:
+        return (
+            f"{self.rng.choice(NOMBRES)} {self.rng.choice(APELLIDOS)} "
+            f"{self.rng.choice(APELLIDOS)}"
+        )
+
+    # ── PROPIEDADES ──────────────────────────────────────────────────────────
+
+    def generar_propiedades(self, total_unidades: int) -> Dict[str, List[Dict]]:
+        """Propiedades con 1-8 unidades hasta cubrir total_unidades (una por contrato)"""
+        filas = defaultdict(list)
+        rng = self.rng
+
+        while len(self._unidades) < total_unidades:
+            propiedad_id = self._nuevo_id("propiedades")
+            ciudad = rng.choice(list(CIUDADES))
+            es_copropiedad = rng.random() < 0.3
+            n_unidades = min(rng.randint(1, 8), total_unidades - len(self._unidades))
+            canon_base = round(rng.uniform(1500, 9000), 2)
+
+            filas["propiedades"].append({
+                "id": propiedad_id, **self._auditoria(),
+                "direccion": f"Calle {rng.randint(1, 99)} Nro. {rng.randint(100, 9999)}",
+                "ciudad": ciudad,
+                "zona": rng.choice(CIUDADES[ciudad]),
+                "tipo": "copropiedad" if es_copropiedad else "propia",
+                "superficie": round(rng.uniform(60, 1200), 1),
+                "dormitorios": rng.randint(1, 6),
+                "banos": rng.randint(1, 4),
+                "canon_base": canon_base,
+                "moneda": "BOB",
+                "descripcion": None,
+                "estado": "ocupado",
+            })
+
+            if es_copropiedad:
+                filas["copropietarios"].extend(self._generar_copropietarios(propiedad_id))
+
+            for n in range(n_unidades):
+                unidad_id = self._nuevo_id("unidades_alquiler")
+                canon = round(canon_base * rng.uniform(0.3, 1.0), 2)
+                filas["unidades_alquiler"].append({
+                    "id": unidad_id, **self._auditoria(),
+                    "propiedad_id": propiedad_id,
+                    "numero_unidad": f"U-{n + 1:02d}",
+                    "nombre": None,
+                    "tipo": rng.choice(TIPOS_UNIDAD),
+                    "superficie": round(rng.uniform(20, 200), 1),
+                    "piso": str(rng.randint(0, 12)),
+                    "dormitorios": rng.randint(0, 3),
+                    "banos": rng.randint(1, 2),
+                    "descripcion": None,
+                    "canon_base": canon,
+                    "moneda": "BOB",
+                    "estado": "ocupado",
+                    "observaciones": None,
+                })
+                self._unidades.append((unidad_id, propiedad_id, canon))
+
+            filas["gastos_propiedad"].extend(self._generar_gastos(propiedad_id))
+
+        return filas
+
+    def _generar_copropietarios(self, propiedad_id: int) -> List[Dict]:
+        rng = self.rng
+        n = rng.randint(2, 4)
+        pesos = [rng.uniform(1, 10) for _ in range(n)]
+        porcentajes = [round(p * 100 / sum(pesos), 2) for p in pesos]
+        porcentajes[-1] = round(100 - sum(porcentajes[:-1]), 2)
+
+        filas, participacion = [], []
+        for pct in porcentajes:
+            coprop_id = self._nuevo_id("copropietarios")
+            filas.append({
+                "id": coprop_id, **self._auditoria(),
+                "propiedad_id": propiedad_id,
+                "nombre": self._persona(),
+                "ci": str(1_000_000 + coprop_id),
+                "telefono": f"7{rng.randint(1000000, 9999999)}",
+                "email": None,
+                "porcentaje_participacion": pct,
+                "cuenta_bancaria": str(rng.randint(10**9, 10**10 - 1)),
+                "banco": rng.choice(BANCOS),
+                "tipo_cuenta": rng.choice(["ahorro", "corriente"]),
+            })
+            participacion.append((coprop_id, pct))
+        self._copropietarios[propiedad_id] = participacion
+        return filas
+
+    def _generar_gastos(self, propiedad_id: int) -> List[Dict]:
+        rng = self.rng
+        filas = []
+        for k in range(self.meses):
+            if rng.random() > 0.3:
+                continue
+            anio, mes = _sumar_meses(*self.inicio_ventana, k)
+            gasto_id = self._nuevo_id("gastos_propiedad")
+            filas.append({
+                "id": gasto_id, **self._auditoria(),
+                "propiedad_id": propiedad_id,
+                "unidad_id": None,
+                "tipo_gasto": rng.choice(TIPOS_GASTO),
+                "categoria": None,
+                "descripcion": "Gasto generado",
+                "monto": round(rng.uniform(50, 3000), 2),
+                "moneda": "BOB",
+                "fecha_gasto": date(anio, mes, rng.randint(1, 28)),
+                "proveedor": None,
+                "numero_factura": None,
+                "comprobante": None,
+                "periodo": f"{anio}-{mes:02d}",
+                "observaciones": None,
+            })
+        return filas
+
+    # ── CONTRATOS Y SUS DEPENDIENTES ─────────────────────────────────────────
+
+    def generar_contratos(self, desde: int, hasta: int) -> Dict[str, List[Dict]]:
+        """Contratos (con inquilino, pagos, distribuciones, impuestos y facturas)
+        para las unidades [desde, hasta)"""
+        filas = defaultdict(list)
+        for unidad_id, propiedad_id, canon in self._unidades[desde:hasta]:
+            self._generar_contrato(filas, unidad_id, propiedad_id, canon)
+        return filas
+
+    def _generar_contrato(self, filas, unidad_id: int, propiedad_id: int, canon: float):
+        rng = self.rng
+        inquilino_id = self._nuevo_id("inquilinos")
+        filas["inquilinos"].append({
+            "id": inquilino_id, **self._auditoria(),
+            "nombre_completo": self._persona(),
+            "ci": str(3_000_000 + inquilino_id),
+            "telefono": f"7{rng.randint(1000000, 9999999)}",
+            "telefono_alternativo": None,
+            "email": f"inquilino{inquilino_id}@correo.bo",
+            "direccion_actual": None,
+            "ciudad_origen": rng.choice(list(CIUDADES)),
+            "ocupacion": None,
+            "lugar_trabajo": None,
+            "telefono_trabajo": None,
+            "estado": "activo",
+            "referencia_nombre": None,
+            "referencia_telefono": None,
+        })
+
+        # Inicio relativo a la ventana (puede empezar antes) y duración 1-3 años
+        inicio = rng.randint(-12, self.meses - 1)
+        duracion = rng.choice([12, 24, 36])
+        fin = inicio + duracion - 1
+        anio_ini, mes_ini = _sumar_meses(*self.inicio_ventana, inicio)
+        anio_fin, mes_fin = _sumar_meses(*self.inicio_ventana, fin)
+        dia_pago = rng.choice([1, 5, 10, 15])
+        incremento = rng.choice([0.0, 0.0, 3.0, 5.0])
+        tasa_mora = rng.choice([0.3, 0.5, 0.5, 1.0])
+
+        contrato_id = self._nuevo_id("contratos")
+        filas["contratos"].append({
+            "id": contrato_id,
+            "created_at": self.ahora, "updated_at": self.ahora, "deleted_at": None,
+            "propiedad_id": propiedad_id,
+            "unidad_id": unidad_id,
+            "inquilino_id": inquilino_id,
+            "numero_contrato": f"CTR-{contrato_id:07d}",
+            "fecha_inicio": date(anio_ini, mes_ini, 1),
+            "fecha_fin": date(anio_fin, mes_fin, 28),
+            "canon_mensual": canon,
+            "garantia": round(canon * 2, 2),
+            "dia_pago": dia_pago,
+            "incremento_anual": incremento,
+            "tasa_mora_diaria": tasa_mora,
+            "estado": "activo" if fin >= self.meses - 1 else "finalizado",
+            "observaciones": None,
+        })
+
+        pagado_por_mes = {}
+        for k in range(max(0, inicio), min(self.meses - 1, fin) + 1):
+            anio, mes = _sumar_meses(*self.inicio_ventana, k)
+            monto_esperado = round(canon * (1 + incremento / 100) ** ((k - inicio) // 12), 2)
+            pago = self._generar_pago(contrato_id, anio, mes, dia_pago, monto_esperado, tasa_mora)
+            filas["pagos"].append(pago)
+            pagado_por_mes[(anio, mes)] = pago["monto_pagado"]
+
+            if pago["monto_pagado"] > 0 and propiedad_id in self._copropietarios:
+                filas["distribuciones_pago"].extend(self._generar_distribuciones(pago, propiedad_id))
+
+            es_mes_cerrado = (anio, mes) < (self.hoy.year, self.hoy.month)
+            if pago["estado"] == EstadoPago.PAGADO.name and es_mes_cerrado:
+                self._generar_impuesto(filas, pago, contrato_id, pagado_por_mes)
+            elif pago["monto_pagado"] > 0 and rng.random() < 0.3:
+                # Factura aún no aplicada (para el cierre de mes y la asignación)
+                filas["facturas_compensacion"].append(self._factura(
+                    contrato_id, None, "iva", anio, mes,
+                    round(monto_esperado * rng.uniform(0.05, 0.35), 2), utilizada=False,
+                ))
+
+    def _generar_pago(self, contrato_id, anio, mes, dia_pago, monto_esperado, tasa_mora) -> Dict:
+        rng = self.rng
+        vencimiento = date(anio, mes, dia_pago)
+        atraso_hoy = (self.hoy - vencimiento).days
+        fecha_pago, monto_pagado, dias_atraso, mora = None, 0.0, 0, 0.0
+        r = rng.random()
+
+        if vencimiento > self.hoy:
+            estado = EstadoPago.PENDIENTE
+        elif r < 0.78:
+            estado = EstadoPago.PAGADO
+            monto_pagado = monto_esperado
+            fecha_pago = vencimiento - timedelta(days=rng.randint(0, 4))
+        elif r < 0.90:
+            estado = EstadoPago.PAGADO
+            monto_pagado = monto_esperado
+            dias_atraso = min(rng.randint(1, 45), atraso_hoy)
+            fecha_pago = vencimiento + timedelta(days=dias_atraso)
+            mora = round(monto_esperado * tasa_mora / 100 * dias_atraso, 2)
+        elif r < 0.95:
+            estado = EstadoPago.PARCIAL
+            monto_pagado = round(monto_esperado * rng.uniform(0.3, 0.9), 2)
+            fecha_pago = vencimiento + timedelta(days=min(rng.randint(0, 10), atraso_hoy))
+            dias_atraso = atraso_hoy
+            mora = round((monto_esperado - monto_pagado) * tasa_mora / 100 * dias_atraso, 2)
+        else:
+            estado = EstadoPago.VENCIDO
+            dias_atraso = atraso_hoy
+            mora = round(monto_esperado * tasa_mora / 100 * dias_atraso, 2)
+
+        pago_id = self._nuevo_id("pagos")
+        return {
+            "id": pago_id, **self._auditoria(),
+            "contrato_id": contrato_id,
+            "periodo": f"{anio}-{mes:02d}",
+            "anio": anio,
+            "mes": mes,
+            "fecha_vencimiento": vencimiento,
+            "fecha_pago": fecha_pago,
+            "monto_esperado": monto_esperado,
+            "monto_pagado": monto_pagado,
+            "mora_calculada": mora,
+            "dias_atraso": dias_atraso,
+            "forma_pago": rng.choice(FORMAS_PAGO) if fecha_pago else None,
+            "numero_comprobante": f"C-{pago_id}" if fecha_pago else None,
+            "nota": None,
+            "estado": estado.name,
+        }
+
+    def _generar_distribuciones(self, pago: Dict, propiedad_id: int) -> List[Dict]:
+        participacion = self._copropietarios[propiedad_id]
+        antiguo = (pago["anio"], pago["mes"]) < _sumar_meses(self.hoy.year, self.hoy.month, -1)
+        filas, suma = [], 0.0
+        for i, (coprop_id, pct) in enumerate(participacion):
+            if i == len(participacion) - 1:
+                monto = pago["monto_pagado"] - suma
+            else:
+                monto = pago["monto_pagado"] * pct / 100
+                suma += monto
+            distribucion_id = self._nuevo_id("distribuciones_pago")
+            filas.append({
+                "id": distribucion_id, **self._auditoria(),
+                "pago_id": pago["id"],
+                "copropietario_id": coprop_id,
+                "monto_asignado": round(monto, 2),
+                "porcentaje_aplicado": pct,
+                "fecha_distribucion": pago["fecha_pago"],
+                "fecha_pago_efectivo": pago["fecha_pago"] + timedelta(days=3) if antiguo else None,
+                "estado": (EstadoDistribucion.PAGADO if antiguo else EstadoDistribucion.PENDIENTE).name,
+                "numero_transferencia": f"TRF-{distribucion_id}" if antiguo else None,
+                "nota": None,
+            })
+        return filas
+
+    def _generar_impuesto(self, filas, pago: Dict, contrato_id: int, pagado_por_mes: Dict):
+        rng = self.rng
+        anio, mes, monto = pago["anio"], pago["mes"], pago["monto_pagado"]
+        impuesto_id = self._nuevo_id("impuestos_alquiler")
+
+        facturas_iva = 0.0
+        if rng.random() < 0.35:
+            facturas_iva = round(monto * rng.uniform(0.05, 0.35), 2)
+            filas["facturas_compensacion"].append(
+                self._factura(contrato_id, impuesto_id, "iva", anio, mes, facturas_iva, utilizada=True)
+            )
+
+        base_trimestral, facturas_rc_iva = None, 0.0
+        if mes in MESES_TRIMESTRALES:
+            base_trimestral = round(sum(pagado_por_mes.get((anio, m), 0.0) for m in (mes - 2, mes - 1, mes)), 2)
+            if rng.random() < 0.3:
+                facturas_rc_iva = round(base_trimestral * rng.uniform(0.02, 0.15), 2)
+                filas["facturas_compensacion"].append(
+                    self._factura(contrato_id, impuesto_id, "rc_iva", anio, mes, facturas_rc_iva, utilizada=True)
+                )
+
+        calculo = calcular_impuestos(
+            monto_alquiler=monto,
+            mes=mes,
+            anio=anio,
+            facturas_iva=facturas_iva,
+            facturas_rc_iva=facturas_rc_iva,
+            monto_acumulado_trimestre=base_trimestral,
+        )
+        filas["impuestos_alquiler"].append({
+            "id": impuesto_id,
+            "created_at": self.ahora, "updated_at": self.ahora, "deleted_at": None,
+            "pago_id": pago["id"],
+            "contrato_id": contrato_id,
+            **campos_registro(calculo),
+            "iva_estado": "pagado",
+            "rc_iva_estado": "pagado" if calculo["es_mes_trimestral"] else "pendiente",
+            "observaciones": None,
+            "fecha_declaracion": date(*_sumar_meses(anio, mes, 1), 15),
+        })
+
+    def _factura(self, contrato_id, impuesto_id, tipo, anio, mes, monto, utilizada: bool) -> Dict:
+        factura_id = self._nuevo_id("facturas_compensacion")
+        return {
+            "id": factura_id,
+            "created_at": self.ahora, "updated_at": self.ahora, "deleted_at": None,
+            "contrato_id": contrato_id,
+            "impuesto_id": impuesto_id,
+            "numero_factura": f"F-{factura_id:08d}",
+            "nit_emisor": str(self.rng.randint(10**8, 10**9 - 1)),
+            "nombre_emisor": "Proveedor generado",
+            "fecha_factura": date(anio, mes, self.rng.randint(1, 28)),
+            "monto_factura": monto,
+            "tipo_impuesto": tipo,
+            "periodo": f"{anio}-{mes:02d}",
+            "anio": anio,
+            "mes": mes,
+            "trimestre": get_trimestre(mes),
+            "descripcion": None,
+            "utilizada": utilizada,
+        }
+
+
+# ── CARGADORES ───────────────────────────────────────────────────────────────
+
+class CargadorInsert:
+    """Inserts por lotes con executemany (SQLite y otros motores)"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def cargar(self, tabla: str, filas: List[Dict]):
+        if filas:
+            self.conn.execute(Base.metadata.tables[tabla].insert(), filas)
+
+
+class CargadorCopy(CargadorInsert):
+    """COPY ... FROM STDIN en formato CSV (PostgreSQL)"""
+
+    def cargar(self, tabla: str, filas: List[Dict]):
+        if not filas:
+            return
+        columnas = list(filas[0])
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        for fila in filas:
+            # En FORMAT csv un campo vacío sin comillas es NULL
+            escritor.writerow(["" if fila[c] is None else fila[c] for c in columnas])
+        buffer.seek(0)
+
+        cursor = self.conn.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        finally:
+            cursor.close()
+
+
+def generar_portafolio(
+    database_url: str,
+    contratos: int,
+    meses: int = 24,
+    semilla: int = 42,
+    lote: int = 2000,
+    crear_tablas: bool = False,
+    hoy: Optional[date] = None,
+) -> Dict[str, int]:
+    """
+    Genera y carga el portafolio completo en una sola transacción.
+
+    Returns:
+        Dict con la cantidad de filas insertadas por tabla
+    """
+    engine = create_engine(database_url)
+    if crear_tablas:
+        Base.metadata.create_all(bind=engine)
+
+    es_postgres = engine.dialect.name == "postgresql"
+    conteo = {tabla: 0 for tabla in TABLAS}
+
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA synchronous = OFF")
+
+        ids = {
+            tabla: conn.execute(select(func.max(Base.metadata.tables[tabla].c.id))).scalar() or 0
+            for tabla in TABLAS
+        }
+        generador = GeneradorPortafolio(semilla, meses, hoy or date.today(), ids)
+        cargador = CargadorCopy(conn) if es_postgres else CargadorInsert(conn)
+
+        def cargar(filas):
+            for tabla in TABLAS:
+                cargador.cargar(tabla, filas.get(tabla, []))
+                conteo[tabla] += len(filas.get(tabla, []))
+
+        cargar(generador.generar_propiedades(contratos))
+        for desde in range(0, contratos, lote):
+            cargar(generador.generar_contratos(desde, min(desde + lote, contratos)))
+
+        if es_postgres:
+            # Los IDs se insertaron explícitos: alinear las secuencias
+            for tabla in TABLAS:
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{tabla}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM {tabla}))"
+                ))
+
+    # Los gastos se cargaron sin pasar por el ORM: rehacer el resumen mensual
+    with Session(engine) as db:
+        resumen_gastos.reconstruir(db)
+
+    engine.dispose()
+    return conteo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un portafolio sintético para benchmarks")
+    parser.add_argument("--escala", choices=ESCALAS, help="pequena=1k, mediana=10k, grande=100k contratos")
+    parser.add_argument("--contratos", type=int, help="Cantidad de contratos (ignora --escala)")
+    parser.add_argument("--meses", type=int, default=24, help="Meses de historial de pagos")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--lote", type=int, default=2000, help="Contratos por lote de carga")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--crear-tablas", action="store_true", help="Ejecutar create_all antes de cargar")
+    args = parser.parse_args()
+
+    contratos = args.contratos or ESCALAS[args.escala or "pequena"]
+    inicio = time.perf_counter()
+    conteo = generar_portafolio(
+        database_url=args.database_url,
+        contratos=contratos,
+        meses=args.meses,
+        semilla=args.semilla,
+        lote=args.lote,
+        crear_tablas=args.crear_tablas,
+    )
+    duracion = time.perf_counter() - inicio
+
+    total = sum(conteo.values())
+    for tabla, n in conteo.items():
+        print(f"  {tabla:<24} {n:>10,}")
+    print(f"✅ {total:,} filas en {duracion:.1f} s ({total / duracion:,.0f} filas/s)")
+
+
+if __name__ == "__main__":
+    main()
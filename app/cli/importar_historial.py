@@ -0,0 +1,95 @@
+"""
+Importación del historial de un cliente desde planillas
+=======================================================
+Carga inquilinos, contratos, pagos y distribuciones desde CSV o XLSX con
+COPY a tablas temporales y SQL por conjuntos (ver
+app.services.importacion_historial). Todo en una sola transacción: si algo
+falla no queda nada a medias.
+
+Los encabezados por defecto son los nombres de los campos (ci,
+nombre_completo, numero_contrato, inquilino_ci, periodo, ...). Con --mapeo
+se indica un JSON {entidad: {campo: encabezado de la planilla}}:
+
+    {"inquilinos": {"ci": "Carnet", "nombre_completo": "Nombre"},
+     "pagos": {"periodo": "Mes", "monto_pagado": "Cobrado"}}
+
+Uso:
+    python -m app.cli.importar_historial --inquilinos inquilinos.xlsx --contratos contratos.xlsx \\
+        --pagos pagos.csv --distribuciones distribuciones.csv --mapeo mapeo.json --rechazos rechazos.csv
+    python -m app.cli.importar_historial --pagos pagos.csv --delimitador ";" --simular
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+
+from sqlalchemy import create_engine
+
+import app.models  # noqa: F401  (registra todas las tablas en Base.metadata)
+from app.core.config import settings
+from app.database.indices import crear_indices_faltantes
+from app.services.importacion_historial import ENTIDADES, LOTE_IMPORTACION, TABLAS_DESTINO, importar_historial
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importar el historial de un cliente desde planillas")
+    for entidad in ENTIDADES:
+        parser.add_argument(f"--{entidad}", help=f"Archivo CSV/XLSX de {entidad}")
+    parser.add_argument("--mapeo", help="JSON {entidad: {campo: encabezado}}")
+    parser.add_argument("--delimitador", help="Separador de los CSV (por defecto se deduce del encabezado)")
+    parser.add_argument("--hoja", help="Hoja de los XLSX (por defecto la activa)")
+    parser.add_argument("--rechazos", help="CSV con las filas que no entraron (entidad, línea, motivo)")
+    parser.add_argument("--lote", type=int, default=LOTE_IMPORTACION, help="Filas por bloque de COPY")
+    parser.add_argument("--simular", action="store_true", help="Importar y revertir (solo el informe)")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    args = parser.parse_args()
+
+    archivos = {entidad: getattr(args, entidad) for entidad in ENTIDADES if getattr(args, entidad)}
+    if not archivos:
+        parser.error(f"Indique al menos un archivo: {', '.join('--' + e for e in ENTIDADES)}")
+    mapeos = {}
+    if args.mapeo:
+        with open(args.mapeo, encoding="utf-8") as archivo:
+            mapeos = json.load(archivo)
+
+    destino = open(args.rechazos, "w", encoding="utf-8", newline="") if args.rechazos else None
+    escritor = csv.writer(destino) if destino else None
+    if escritor:
+        escritor.writerow(["entidad", "linea", "motivo"])
+
+    inicio = time.perf_counter()
+    engine = create_engine(args.database_url)
+    # Las búsquedas por clave natural usan los índices de pagos y distribuciones
+    crear_indices_faltantes(engine, TABLAS_DESTINO)
+    conexion = engine.connect()
+    transaccion = conexion.begin()
+    try:
+        resumen = importar_historial(
+            conexion, archivos, mapeos, args.delimitador, args.hoja, args.lote,
+            rechazar=(lambda *fila: escritor.writerow(fila)) if escritor else None,
+        )
+        if args.simular:
+            transaccion.rollback()
+        else:
+            transaccion.commit()
+    except ValueError as e:
+        transaccion.rollback()
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        conexion.close()
+        engine.dispose()
+        if destino:
+            destino.close()
+
+    for entidad, r in resumen.items():
+        omitidas = ", ".join(f"{motivo}: {n:,}" for motivo, n in sorted(r["omitidas"].items()))
+        print(f"  {entidad:<16} {r['leidas']:>10,} leídas {r['insertadas']:>10,} insertadas"
+              + (f"  ({omitidas})" if omitidas else ""))
+    print(f"{'🔎 Simulación (revertida)' if args.simular else '✅ Importación confirmada'} "
+          f"en {time.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Worker de trabajos en segundo plano
+===================================
+Toma trabajos de la tabla `trabajos` y los ejecuta de a uno, y entre
+trabajo y trabajo procesa por lotes los eventos de pago (distribución,
+impuesto). Para más capacidad se lanzan más procesos: en PostgreSQL se
+reparten trabajos y eventos con FOR UPDATE SKIP LOCKED, sin repetirlos.
+
+Uso:
+    python -m app.cli.worker
+    python -m app.cli.worker --nombre worker-2
+    python -m app.cli.worker --vaciar      # procesa lo pendiente y termina
+
+SIGTERM / Ctrl+C: termina el trabajo en curso y sale.
+"""
+import argparse
+import os
+import signal
+import socket
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401  (registra todas las tablas en Base.metadata)
+import app.services.tareas  # noqa: F401  (registra las tareas)
+from app.core.config import settings
+from app.services import reglas_impuesto
+from app.services.eventos_pago import procesar_eventos, recuperar_eventos_abandonados
+from app.services.trabajos import procesar_siguiente, recuperar_abandonados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de trabajos en segundo plano")
+    parser.add_argument("--nombre", default=f"{socket.gethostname()}:{os.getpid()}")
+    parser.add_argument("--vaciar", action="store_true", help="Salir cuando no queden pendientes")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url, pool_pre_ping=True)
+    fabrica = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    reglas_impuesto.configurar(fabrica)
+
+    detener = False
+
+    def al_recibir_senal(signum, frame):
+        nonlocal detener
+        detener = True
+        print(f"⏹  Señal {signum}: se termina el trabajo en curso y se sale", flush=True)
+
+    signal.signal(signal.SIGTERM, al_recibir_senal)
+    signal.signal(signal.SIGINT, al_recibir_senal)
+
+    print(f"👷 Worker {args.nombre} esperando trabajos", flush=True)
+    proxima_recuperacion = 0.0
+    while not detener:
+        if time.monotonic() >= proxima_recuperacion:
+            db = fabrica()
+            try:
+                recuperados = recuperar_abandonados(db) + recuperar_eventos_abandonados(db)
+            finally:
+                db.close()
+            if recuperados:
+                print(f"↩️  {recuperados} trabajos/eventos abandonados reencolados", flush=True)
+            proxima_recuperacion = time.monotonic() + settings.TRABAJOS_LATIDO
+
+        inicio = time.perf_counter()
+        eventos = procesar_eventos(fabrica)
+        if eventos["tomados"]:
+            print(f"• {eventos['procesados']} eventos de pago procesados, {eventos['con_error']} con error "
+                  f"en {time.perf_counter() - inicio:.2f} s", flush=True)
+
+        inicio = time.perf_counter()
+        procesado = procesar_siguiente(fabrica, args.nombre)
+        if procesado is not None:
+            trabajo_id, estado = procesado
+            print(f"• Trabajo {trabajo_id}: {estado} en {time.perf_counter() - inicio:.2f} s", flush=True)
+            continue
+        if eventos["tomados"]:
+            continue
+        if args.vaciar:
+            break
+        time.sleep(settings.TRABAJOS_INTERVALO)
+
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
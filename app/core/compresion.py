@@ -0,0 +1,146 @@
+"""
+Compresión de respuestas (brotli / gzip)
+========================================
+Middleware ASGI que comprime las respuestas de tipos de texto (JSON, CSV,
+HTML, ...) por encima de un tamaño mínimo, según Accept-Encoding:
+
+  br   → si el módulo opcional `brotli` está instalado
+  gzip → siempre disponible (zlib)
+
+Las respuestas de un solo bloque se comprimen completas y llevan
+Content-Length; las respuestas en streaming se comprimen trozo a trozo con
+flush, sin acumular el cuerpo en memoria. No toca respuestas ya codificadas
+ni text/event-stream.
+"""
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # dependencia opcional
+    brotli = None
+
+TIPOS_COMPRIMIBLES = (
+    "application/json",
+    "application/javascript",
+    "text/csv",
+    "text/plain",
+    "text/html",
+    "text/css",
+)
+
+
+def elegir_codificacion(accept_encoding: str) -> Optional[str]:
+    """Mejor codificación soportada por el cliente (br > gzip), o None"""
+    aceptadas = {}
+    for parte in accept_encoding.lower().split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        calidad = 1.0
+        if parametros.strip().startswith("q="):
+            try:
+                calidad = float(parametros.strip()[2:])
+            except ValueError:
+                calidad = 0.0
+        aceptadas[nombre.strip()] = calidad
+
+    if brotli is not None and aceptadas.get("br", 0) > 0:
+        return "br"
+    if aceptadas.get("gzip", aceptadas.get("*", 0)) > 0:
+        return "gzip"
+    return None
+
+
+class _Compresor:
+    """Interfaz común gzip / brotli para comprimir por trozos"""
+
+    def __init__(self, codificacion: str):
+        if codificacion == "br":
+            self._br = brotli.Compressor(quality=settings.COMPRESION_NIVEL_BROTLI)
+            self._gz = None
+        else:
+            self._br = None
+            self._gz = zlib.compressobj(settings.COMPRESION_NIVEL_GZIP, zlib.DEFLATED, 31)
+
+    def trozo(self, datos: bytes) -> bytes:
+        if self._br is not None:
+            return self._br.process(datos) + self._br.flush()
+        return self._gz.compress(datos) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def final(self) -> bytes:
+        return self._br.finish() if self._br is not None else self._gz.flush()
+
+    def todo(self, datos: bytes) -> bytes:
+        if self._br is not None:
+            return self._br.process(datos) + self._br.finish()
+        return self._gz.compress(datos) + self._gz.flush()
+
+
+class CompresionMiddleware:
+    """Comprime respuestas grandes de texto según Accept-Encoding"""
+
+    def __init__(self, app, minimo: int = None):
+        self.app = app
+        self.minimo = settings.COMPRESION_MINIMO if minimo is None else minimo
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        codificacion = elegir_codificacion(Headers(scope=scope).get("accept-encoding", ""))
+        if codificacion is None:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = None
+        compresor: Optional[_Compresor] = None
+        directo = False
+
+        async def enviar(message):
+            nonlocal inicio, compresor, directo
+
+            if message["type"] == "http.response.start":
+                inicio = message
+                return
+            if message["type"] != "http.response.body" or directo:
+                await send(message)
+                return
+
+            cuerpo = message.get("body", b"")
+            mas = message.get("more_body", False)
+
+            if compresor is None:
+                headers = MutableHeaders(scope=inicio)
+                tipo = headers.get("content-type", "").split(";")[0].strip()
+                if tipo not in TIPOS_COMPRIMIBLES or "content-encoding" in headers:
+                    directo = True
+                    await send(inicio)
+                    await send(message)
+                    return
+                headers.add_vary_header("Accept-Encoding")
+                if not mas and len(cuerpo) < self.minimo:
+                    directo = True
+                    await send(inicio)
+                    await send(message)
+                    return
+
+                compresor = _Compresor(codificacion)
+                headers["Content-Encoding"] = codificacion
+                if not mas:
+                    # Cuerpo completo en un solo mensaje
+                    cuerpo = compresor.todo(cuerpo)
+                    headers["Content-Length"] = str(len(cuerpo))
+                    await send(inicio)
+                    await send({"type": "http.response.body", "body": cuerpo})
+                    return
+                # Streaming: no se conoce el largo final
+                del headers["Content-Length"]
+                await send(inicio)
+
+            datos = compresor.trozo(cuerpo) if mas else compresor.trozo(cuerpo) + compresor.final()
+            await send({"type": "http.response.body", "body": datos, "more_body": mas})
+
+        await self.app(scope, receive, enviar)
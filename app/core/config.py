@@ -38,6 +38,39 @@ class Settings(BaseSettings):
     # Configuración de mora (Bolivia)
     TASA_MORA_DIARIA_DEFAULT: float = 0.5  # 0.5% por día
     
+    # Perfilado bajo demanda (?__profile=1), solo para roles autorizados
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_ROLES: List[str] = ["admin"]
+    PROFILING_INTERVALO: float = float(os.getenv("PROFILING_INTERVALO", "0.005"))  # segundos
+    
+    # Compresión de respuestas (br si está instalado `brotli`, si no gzip)
+    COMPRESION_MINIMO: int = int(os.getenv("COMPRESION_MINIMO", "1024"))  # bytes
+    COMPRESION_NIVEL_GZIP: int = int(os.getenv("COMPRESION_NIVEL_GZIP", "6"))
+    COMPRESION_NIVEL_BROTLI: int = int(os.getenv("COMPRESION_NIVEL_BROTLI", "4"))
+    
+    # Caché de bases trimestrales de RC-IVA (se invalida al modificar pagos)
+    BASE_TRIMESTRAL_TTL: float = float(os.getenv("BASE_TRIMESTRAL_TTL", "300"))  # segundos
+    
+    # Cada cuánto se revisa si otro proceso cambió la tabla reglas_impuesto
+    REGLAS_IMPUESTO_TTL: float = float(os.getenv("REGLAS_IMPUESTO_TTL", "60"))  # segundos
+    
+    # Trabajos en segundo plano (python -m app.cli.worker)
+    TRABAJOS_DIR: str = os.getenv("TRABAJOS_DIR", "./trabajos")  # archivos generados
+    TRABAJOS_INTERVALO: float = float(os.getenv("TRABAJOS_INTERVALO", "1.0"))  # espera sin trabajos
+    TRABAJOS_LATIDO: float = float(os.getenv("TRABAJOS_LATIDO", "10"))  # segundos
+    TRABAJOS_REINTENTO_BASE: float = float(os.getenv("TRABAJOS_REINTENTO_BASE", "30"))  # segundos
+    
+    # Eventos posteriores a registrar un pago (los procesa el mismo worker)
+    EVENTOS_PAGO_LOTE: int = int(os.getenv("EVENTOS_PAGO_LOTE", "500"))
+    EVENTOS_PAGO_MAX_INTENTOS: int = int(os.getenv("EVENTOS_PAGO_MAX_INTENTOS", "5"))
+    EVENTOS_PAGO_TIMEOUT: float = float(os.getenv("EVENTOS_PAGO_TIMEOUT", "300"))  # segundos en proceso
+    
+    # Dashboard en vivo (GET /reportes/dashboard/stream)
+    TABLERO_COLA: int = int(os.getenv("TABLERO_COLA", "1000"))  # eventos por cliente antes de resincronizar
+    TABLERO_HISTORIAL: int = int(os.getenv("TABLERO_HISTORIAL", "1000"))  # eventos para reconexiones
+    TABLERO_KEEPALIVE: float = float(os.getenv("TABLERO_KEEPALIVE", "15"))  # segundos
+    TABLERO_TICKET: int = int(os.getenv("TABLERO_TICKET", "60"))  # segundos de validez del ticket del flujo
+    
     class Config:
         case_sensitive = True
 
@@ -30,21 +30,24 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    token = credentials.credentials
-    payload = decode_access_token(token)
+    user = usuario_por_token(db, credentials.credentials)
+    if user is None:
+        raise credentials_exception
     
+    return user
+
+
+def usuario_por_token(db: Session, token: str, alcance: Optional[str] = None) -> Optional[User]:
+    """Usuario del token JWT (del alcance dado), o None si el token no es válido"""
+    payload = decode_access_token(token, alcance)
     if payload is None:
-        raise credentials_exception
+        return None
     
     user_id: Optional[int] = payload.get("sub")
     if user_id is None:
-        raise credentials_exception
+        return None
     
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if user is None:
-        raise credentials_exception
-    
-    return user
+    return db.query(User).filter(User.id == int(user_id)).first()
 
 
 def get_current_active_user(
@@ -0,0 +1,120 @@
+"""
+GET condicional (ETag / Last-Modified) para listados y reportes
+===============================================================
+Cada colección se resume con max(updated_at) y count(*): cualquier alta, baja
+o modificación cambia alguno de los dos. Una sola consulta de agregados por
+petición basta para decidir si el cliente ya tiene la versión vigente; en ese
+caso se responde 304 sin ejecutar el endpoint ni serializar el cuerpo.
+
+Uso en un router:
+
+    @router.get("/contratos", dependencies=[Depends(condicional(Contrato))])
+
+La dependencia valida primero al usuario (401 antes que 304) y deja las
+cabeceras en request.state; ValidadoresMiddleware las agrega a la respuesta
+200, incluso cuando el endpoint devuelve un Response directamente.
+"""
+import hashlib
+from datetime import date, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+
+from app.core.dependencies import get_db, get_current_user
+from app.models.user import User
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def estado_colecciones(db: Session, *modelos) -> Dict[str, tuple]:
+    """{tabla: (max(updated_at), count)} de cada modelo, en una sola consulta"""
+    columnas = []
+    for modelo in modelos:
+        columnas.append(select(func.max(modelo.updated_at)).scalar_subquery())
+        columnas.append(select(func.count()).select_from(modelo).scalar_subquery())
+    fila = db.execute(select(*columnas)).one()
+    return {
+        modelo.__tablename__: (fila[2 * i], fila[2 * i + 1])
+        for i, modelo in enumerate(modelos)
+    }
+
+
+def calcular_validadores(request: Request, estado: Dict[str, tuple]) -> Dict[str, str]:
+    """ETag débil (ruta + query + fecha + estado) y Last-Modified de la colección"""
+    huella = hashlib.sha1()
+    # La fecha entra en la huella: hay reportes cuyo default depende de hoy
+    huella.update(f"{request.url.path}?{request.url.query}|{date.today()}".encode())
+    for tabla, (ultimo, cantidad) in sorted(estado.items()):
+        huella.update(f"|{tabla}:{ultimo.isoformat() if ultimo else '-'}:{cantidad}".encode())
+
+    cabeceras = {"ETag": f'W/"{huella.hexdigest()[:32]}"', "Cache-Control": CACHE_CONTROL}
+    modificados = [ultimo for ultimo, _ in estado.values() if ultimo is not None]
+    if modificados:
+        # updated_at se guarda en UTC sin zona horaria
+        cabeceras["Last-Modified"] = format_datetime(
+            max(modificados).replace(tzinfo=timezone.utc, microsecond=0), usegmt=True
+        )
+    return cabeceras
+
+
+def _no_modificado(request: Request, cabeceras: Dict[str, str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match tiene precedencia sobre If-Modified-Since (RFC 9110)
+        etiquetas = {e.strip() for e in if_none_match.split(",")}
+        etag = cabeceras["ETag"]
+        return "*" in etiquetas or etag in etiquetas or etag[2:] in etiquetas
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in cabeceras:
+        try:
+            desde = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return parsedate_to_datetime(cabeceras["Last-Modified"]) <= desde
+    return False
+
+
+def condicional(*modelos):
+    """
+    Dependencia de GET condicional sobre las colecciones de los modelos dados.
+    Responde 304 (sin cuerpo) si el cliente ya tiene la versión vigente.
+    """
+    def verificar(
+        request: Request,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+    ):
+        cabeceras = calcular_validadores(request, estado_colecciones(db, *modelos))
+        if _no_modificado(request, cabeceras):
+            raise HTTPException(status_code=304, headers=cabeceras)
+        request.state.cabeceras_cache = cabeceras
+
+    return verificar
+
+
+class ValidadoresMiddleware:
+    """Agrega a las respuestas 200 las cabeceras calculadas por condicional()"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        async def enviar(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                cabeceras: Optional[Dict[str, str]] = scope.get("state", {}).get("cabeceras_cache")
+                if cabeceras:
+                    headers = MutableHeaders(scope=message)
+                    for nombre, valor in cabeceras.items():
+                        headers[nombre] = valor
+            await send(message)
+
+        await self.app(scope, receive, enviar)
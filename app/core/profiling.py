@@ -0,0 +1,192 @@
+"""
+Perfilado bajo demanda de peticiones
+====================================
+Con PROFILING_ENABLED=true, un usuario cuyo rol esté en PROFILING_ROLES puede
+agregar `?__profile=1` (o el header `X-Profile: 1`) a cualquier petición.
+La petición se ejecuta normalmente bajo un profiler de muestreo y en lugar de
+la respuesta se devuelve el reporte:
+
+  ?__profile=1 | collapsed → pilas colapsadas (flamegraph.pl, speedscope)
+  ?__profile=html          → tabla HTML con las funciones más costosas
+
+Cualquier otro valor (0, false, un error de tipeo) responde 400 en lugar de
+perfilar con el formato por defecto.
+
+Se muestrean todos los hilos del proceso (los endpoints síncronos corren en el
+threadpool, no en el hilo del event loop). Si el worker atiende otras
+peticiones al mismo tiempo, también aparecerán en el reporte.
+"""
+import html
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+from fastapi import status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, HTMLResponse, PlainTextResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.config import settings
+from app.core.security import decode_access_token
+from app.database.session import SessionLocal
+from app.models.user import User
+
+# Valores de ?__profile / X-Profile → formato del reporte (cualquier otro es 400)
+FORMATOS = {"1": "collapsed", "collapsed": "collapsed", "html": "html"}
+
+# Archivos donde un hilo está esperando trabajo (no consumen CPU)
+_ARCHIVOS_OCIOSOS = ("threading.py", "selectors.py", "queue.py")
+
+_RAIZ_PROYECTO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _etiqueta(code) -> str:
+    archivo = code.co_filename
+    if archivo.startswith(_RAIZ_PROYECTO):
+        archivo = os.path.relpath(archivo, _RAIZ_PROYECTO)
+    elif "site-packages" in archivo:
+        archivo = archivo.split("site-packages" + os.sep, 1)[1]
+    else:
+        archivo = os.path.basename(archivo)
+    return f"{code.co_name} ({archivo}:{code.co_firstlineno})"
+
+
+def _pila_colapsada(frame) -> Optional[str]:
+    """Convierte un frame en una línea 'raiz;...;hoja'. None si el hilo está ocioso."""
+    if frame.f_code.co_filename.endswith(_ARCHIVOS_OCIOSOS):
+        return None
+    etiquetas = []
+    while frame is not None:
+        etiquetas.append(_etiqueta(frame.f_code))
+        frame = frame.f_back
+    etiquetas.reverse()
+    return ";".join(etiquetas)
+
+
+class MuestreadorPilas:
+    """Profiler de muestreo basado en sys._current_frames()"""
+
+    def __init__(self, intervalo: float):
+        self.intervalo = intervalo
+        self.pilas: Counter = Counter()
+        self.muestras = 0
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._ejecutar, name="perfilado", daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+        self._hilo.join()
+
+    def _ejecutar(self):
+        propio = threading.get_ident()
+        while True:
+            for ident, frame in sys._current_frames().items():
+                if ident == propio:
+                    continue
+                pila = _pila_colapsada(frame)
+                if pila:
+                    self.pilas[pila] += 1
+            self.muestras += 1
+            if self._detener.wait(self.intervalo):
+                break
+
+    def reporte_colapsado(self) -> str:
+        return "\n".join(f"{pila} {n}" for pila, n in self.pilas.most_common()) + "\n"
+
+    def reporte_html(self, titulo: str, limite: int = 60) -> str:
+        propio, total = Counter(), Counter()
+        for pila, n in self.pilas.items():
+            funciones = pila.split(";")
+            propio[funciones[-1]] += n
+            for funcion in set(funciones):
+                total[funcion] += n
+
+        suma = sum(self.pilas.values()) or 1
+        filas = "".join(
+            f"<tr><td>{n}</td><td>{n * 100 / suma:.1f}%</td>"
+            f"<td>{propio[f]}</td><td>{html.escape(f)}</td></tr>"
+            for f, n in total.most_common(limite)
+        )
+        pilas = html.escape(
+            "\n".join(f"{n:>6}  {pila}" for pila, n in self.pilas.most_common(limite))
+        )
+        return (
+            "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+            f"<title>Perfil {html.escape(titulo)}</title>"
+            "<style>body{font-family:monospace}td{padding:2px 8px}"
+            "pre{white-space:pre;overflow-x:auto}</style></head><body>"
+            f"<h2>{html.escape(titulo)}</h2>"
+            "<table><tr><th>total</th><th>%</th><th>propio</th><th>función</th></tr>"
+            f"{filas}</table><h3>Pilas más frecuentes</h3><pre>{pilas}</pre>"
+            "</body></html>"
+        )
+
+
+def _usuario_autorizado(token: Optional[str]) -> bool:
+    """Verifica que el token pertenezca a un usuario activo con rol de perfilado"""
+    if not token:
+        return False
+    payload = decode_access_token(token)
+    if payload is None or payload.get("sub") is None:
+        return False
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == int(payload["sub"])).first()
+        return bool(user and user.is_active and user.role in settings.PROFILING_ROLES)
+    finally:
+        db.close()
+
+
+class PerfiladoMiddleware(BaseHTTPMiddleware):
+    """Ejecuta la petición bajo el muestreador si se pidió ?__profile"""
+
+    async def dispatch(self, request, call_next):
+        formato = request.query_params.get("__profile") or request.headers.get("x-profile")
+        if formato is None:
+            return await call_next(request)
+        formato = FORMATOS.get(formato.strip().lower())
+        if formato is None:
+            return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={"detail": f"__profile / X-Profile admite: {', '.join(FORMATOS)}"}
+            )
+
+        autorizacion = request.headers.get("authorization", "")
+        token = autorizacion[7:] if autorizacion.lower().startswith("bearer ") else None
+        if not await run_in_threadpool(_usuario_autorizado, token):
+            return JSONResponse(
+                status_code=status.HTTP_403_FORBIDDEN,
+                content={"detail": "Perfilado no permitido para este usuario"}
+            )
+
+        muestreador = MuestreadorPilas(settings.PROFILING_INTERVALO)
+        inicio = time.perf_counter()
+        muestreador.iniciar()
+        try:
+            response = await call_next(request)
+            # Consumir el cuerpo para incluir la serialización/streaming en el perfil
+            async for _ in response.body_iterator:
+                pass
+        finally:
+            muestreador.detener()
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+
+        headers = {
+            "X-Profile-Status": str(response.status_code),
+            "X-Profile-Duration-Ms": f"{duracion_ms:.1f}",
+            "X-Profile-Samples": str(muestreador.muestras),
+        }
+        if formato == "html":
+            titulo = (
+                f"{request.method} {request.url.path} → {response.status_code} "
+                f"en {duracion_ms:.1f} ms ({muestreador.muestras} muestras)"
+            )
+            return HTMLResponse(muestreador.reporte_html(titulo), headers=headers)
+        return PlainTextResponse(muestreador.reporte_colapsado(), headers=headers)
@@ -4,6 +4,9 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
+# Alcance del ticket que abre el flujo del dashboard (va en la URL)
+ALCANCE_TABLERO = "dashboard_stream"
+
 # Usar sha256_crypt en lugar de bcrypt para evitar el bug
 pwd_context = CryptContext(schemes=["sha256_crypt"], deprecated="auto")
 
@@ -23,9 +26,26 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def decode_access_token(token: str):
+def crear_ticket_tablero(user_id: int) -> str:
+    """
+    Token de vida corta que solo sirve para GET /reportes/dashboard/stream:
+    EventSource no envía cabeceras y el token viaja en la query, donde queda
+    en logs y en el historial; así nunca se expone el token de acceso.
+    """
+    return create_access_token(
+        {"sub": str(user_id), "scope": ALCANCE_TABLERO},
+        expires_delta=timedelta(seconds=settings.TABLERO_TICKET)
+    )
+
+def decode_access_token(token: str, alcance: Optional[str] = None):
+    """
+    Payload del token, o None si no es válido o no es del alcance pedido
+    (sin alcance: token de acceso; un ticket no sirve como token de acceso)
+    """
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+    if payload.get("scope") != alcance:
+        return None
+    return payload
\ No newline at end of file
@@ -0,0 +1,43 @@
+"""
+Funciones SQL con sintaxis distinta según la base
+"""
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import Integer
+
+
+class dias_entre(FunctionElement):
+    """dias_entre(hasta, desde) → días de `desde` a `hasta` (entero, puede ser negativo)"""
+    type = Integer()
+    inherit_cache = True
+    name = "dias_entre"
+
+
+@compiles(dias_entre)
+def _dias_entre_postgresql(elemento, compilador, **kw):
+    # PostgreSQL: date - date devuelve días enteros
+    hasta, desde = list(elemento.clauses)
+    return f"({compilador.process(hasta, **kw)} - {compilador.process(desde, **kw)})"
+
+
+@compiles(dias_entre, "sqlite")
+def _dias_entre_sqlite(elemento, compilador, **kw):
+    hasta, desde = list(elemento.clauses)
+    return (f"CAST(julianday({compilador.process(hasta, **kw)}) - "
+            f"julianday({compilador.process(desde, **kw)}) AS INTEGER)")
+
+
+class mayor(FunctionElement):
+    """mayor(a, b, ...) → el mayor de los valores: GREATEST en PostgreSQL, max() escalar en SQLite"""
+    inherit_cache = True
+    name = "mayor"
+
+
+@compiles(mayor)
+def _mayor_postgresql(elemento, compilador, **kw):
+    return f"GREATEST({compilador.process(elemento.clauses, **kw)})"
+
+
+@compiles(mayor, "sqlite")
+def _mayor_sqlite(elemento, compilador, **kw):
+    return f"max({compilador.process(elemento.clauses, **kw)})"
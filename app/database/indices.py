@@ -0,0 +1,25 @@
+"""
+Creación de índices faltantes en tablas existentes
+"""
+import warnings
+
+from sqlalchemy.exc import IntegrityError
+
+from app.database.base import Base
+
+
+def crear_indices_faltantes(engine, tablas=None) -> None:
+    """
+    create_all() solo crea índices al crear la tabla: los índices nuevos de
+    tablas que ya existen se crean aquí (CREATE INDEX si no existe).
+    `tablas` limita la creación a esas tablas (por defecto, todas).
+
+    Un índice único que los datos ya violan no se crea: se avisa y se sigue,
+    para no impedir el arranque hasta depurar los duplicados.
+    """
+    for tabla in tablas or Base.metadata.sorted_tables:
+        for indice in tabla.indexes:
+            try:
+                indice.create(bind=engine, checkfirst=True)
+            except IntegrityError as e:
+                warnings.warn(f"No se creó el índice único {indice.name}: hay filas duplicadas ({e.orig})")
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
@@ -11,3 +11,17 @@ engine = create_engine(
 
 # Crear SessionLocal
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _sin_accion(target, value, oldvalue, initiator):
+    pass
+
+
+def conservar_historial(*atributos) -> None:
+    """
+    Carga el valor anterior de los atributos al reasignarlos (active_history),
+    aunque el objeto esté expirado: así history.deleted trae el valor viejo en
+    before_flush y se puede recalcular también el grupo de origen.
+    """
+    for atributo in atributos:
+        event.listen(atributo, "set", _sin_accion, active_history=True)
@@ -0,0 +1,57 @@
+"""
+Índices de trigramas (pg_trgm) para las búsquedas por texto
+===========================================================
+En PostgreSQL las búsquedas de inquilinos y propiedades usan índices GIN
+gin_trgm_ops, que resuelven ILIKE '%texto%' y la similitud de palabras
+(<%) sin recorrer la tabla:
+
+  - create_all() crea la extensión pg_trgm si el servidor la ofrece
+    (evento before_create de Base.metadata);
+  - los índices de indice_trigramas() solo se crean si la extensión está
+    instalada: en SQLite, o en un PostgreSQL sin pg_trgm, no se crean y la
+    búsqueda usa LIKE (ver app.services.busqueda).
+"""
+from typing import Dict
+
+from sqlalchemy import DDL, Index, event, text
+
+from app.database.base import Base
+
+_instalada: Dict[str, bool] = {}
+
+
+def _disponible(ddl, target, bind, **kw) -> bool:
+    return bind.dialect.name == "postgresql" and bind.scalar(text(
+        "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+    )) is not None
+
+
+def _instalada_ddl(ddl, target, bind, **kw) -> bool:
+    return instalada(bind)
+
+
+def instalada(conexion) -> bool:
+    """pg_trgm instalada en la base de `conexion` (se consulta una vez por base)"""
+    if conexion.dialect.name != "postgresql":
+        return False
+    clave = str(conexion.engine.url)
+    if clave not in _instalada:
+        _instalada[clave] = conexion.scalar(text(
+            "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+        )) is not None
+    return _instalada[clave]
+
+
+def indice_trigramas(nombre: str, columna: str) -> Index:
+    """Índice GIN de trigramas sobre `columna`, solo con pg_trgm instalada"""
+    return Index(
+        nombre, columna,
+        postgresql_using="gin",
+        postgresql_ops={columna: "gin_trgm_ops"},
+    ).ddl_if(callable_=_instalada_ddl)
+
+
+event.listen(
+    Base.metadata, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(callable_=_disponible)
+)
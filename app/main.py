@@ -6,14 +6,23 @@ Punto de entrada de la aplicación FastAPI
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from app.core.config import settings
 from app.database.base import Base
-from app.database.session import engine
+from app.database.session import SessionLocal, engine
+from app.database.indices import crear_indices_faltantes
+from app.services import participaciones, reglas_impuesto, resumen_gastos
 import app.models  # Importar todos los modelos
 
-# Crear todas las tablas
+# Crear todas las tablas (y los índices nuevos de tablas ya existentes)
 Base.metadata.create_all(bind=engine)
+crear_indices_faltantes(engine)
+
+# Alícuotas vigentes por periodo (tabla reglas_impuesto)
+reglas_impuesto.configurar(SessionLocal)
+
+# Resumen mensual de gastos de una base que ya tenía gastos
+resumen_gastos.completar_si_falta(SessionLocal)
 
 # Crear aplicación FastAPI
 app = FastAPI(
@@ -21,7 +30,8 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="Sistema profesional de gestión de alquileres con soporte para copropiedades",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # Configurar CORS
@@ -33,8 +43,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Cabeceras de GET condicional (ETag / Last-Modified) y compresión br/gzip
+from app.core.http_cache import ValidadoresMiddleware
+from app.core.compresion import CompresionMiddleware
+app.add_middleware(ValidadoresMiddleware)
+app.add_middleware(CompresionMiddleware)
+
+# Perfilado bajo demanda (?__profile=1), desactivado salvo que se habilite en Settings
+if settings.PROFILING_ENABLED:
+    from app.core.profiling import PerfiladoMiddleware
+    app.add_middleware(PerfiladoMiddleware)
+
 # Importar routers
-from app.api.v1 import auth, propiedades, inquilinos, contratos, pagos, reportes, impuestos, unidades_gastos
+from app.api.v1 import auth, propiedades, inquilinos, contratos, pagos, reportes, impuestos, unidades_gastos, trabajos, liquidaciones, distribuciones
 
 # Registrar routers
 app.include_router(auth.router, prefix="/api/v1", tags=["Autenticación"])
@@ -42,9 +63,13 @@ app.include_router(propiedades.router, prefix="/api/v1", tags=["Propiedades"])
 app.include_router(inquilinos.router, prefix="/api/v1", tags=["Inquilinos"])
 app.include_router(contratos.router, prefix="/api/v1", tags=["Contratos"])
 app.include_router(pagos.router, prefix="/api/v1", tags=["Pagos"])
+app.include_router(reportes.router, prefix="/api/v1", tags=["Reportes"])
 app.include_router(impuestos.router, prefix="/api/v1", tags=["Impuestos"])
 app.include_router(unidades_gastos.router, prefix="/api/v1", tags=["Unidades y Gastos"])
 app.include_router(unidades_gastos.router, prefix="/api/v1", tags=["Unidades y Gastos"])
+app.include_router(trabajos.router, prefix="/api/v1", tags=["Trabajos"])
+app.include_router(liquidaciones.router, prefix="/api/v1", tags=["Liquidaciones"])
+app.include_router(distribuciones.router, prefix="/api/v1", tags=["Distribuciones"])
 
 app.mount("/static", StaticFiles(directory="frontend"), name="static")
 
@@ -68,7 +93,8 @@ def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "environment": settings.ENVIRONMENT
+        "environment": settings.ENVIRONMENT,
+        "cache_participaciones": participaciones.estadisticas()
     }
 
 
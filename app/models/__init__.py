@@ -8,8 +8,13 @@ from app.models.inquilino import Inquilino
 from app.models.contrato import Contrato
 from app.models.pago import Pago
 from app.models.distribucion_pago import DistribucionPago
-from app.models.impuesto import ImpuestoAlquiler, FacturaCompensacion
-from app.models.unidad_gasto import UnidadAlquiler, GastoPropiedad
+from app.models.impuesto import ImpuestoAlquiler, FacturaCompensacion, ReglaImpuesto
+from app.models.unidad_gasto import UnidadAlquiler, GastoPropiedad, ResumenGastoMensual
+from app.models.trabajo import Trabajo, EstadoTrabajo
+from app.models.evento_pago import EventoPago
+from app.models.liquidacion import LiquidacionCopropietario
+from app.models.lote_pago import LotePago, LotePagoBeneficiario, LotePagoDistribucion
+from app.models.version_cache import VersionCache
 from app.models.base_model import BaseModel
 
 __all__ = [
@@ -22,7 +27,17 @@ __all__ = [
     "DistribucionPago",
     "ImpuestoAlquiler",
     "FacturaCompensacion",
+    "ReglaImpuesto",
     "UnidadAlquiler",
     "GastoPropiedad",
+    "ResumenGastoMensual",
+    "Trabajo",
+    "EstadoTrabajo",
+    "EventoPago",
+    "LiquidacionCopropietario",
+    "LotePago",
+    "LotePagoBeneficiario",
+    "LotePagoDistribucion",
+    "VersionCache",
     "BaseModel"
 ]
\ No newline at end of file
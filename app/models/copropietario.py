@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, String, Float, ForeignKey
 from sqlalchemy.orm import relationship
 from app.models.base_model import BaseModel
+from app.models.version_cache import versionar
 
 
 class Copropietario(BaseModel):
@@ -31,3 +32,7 @@ class Copropietario(BaseModel):
     
     def __repr__(self):
         return f"<Copropietario(id={self.id}, nombre='{self.nombre}', participacion={self.porcentaje_participacion}%)>"
+
+
+# Invalida la caché de participaciones (app.services.participaciones) de todos los procesos
+versionar(Copropietario, "copropietarios")
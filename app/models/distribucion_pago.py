@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, Integer, Float, ForeignKey, Date, Enum, String
+from sqlalchemy import Column, Integer, Float, ForeignKey, Date, Enum, String, Index
 from sqlalchemy.orm import relationship
 from app.models.base_model import BaseModel
 
@@ -15,6 +15,12 @@ class DistribucionPago(BaseModel):
     """Modelo de Distribución de Pagos a Copropietarios"""
     
     __tablename__ = "distribuciones_pago"
+    __table_args__ = (
+        # Lote de pago: pendientes agrupadas por copropietario
+        Index("ix_distribuciones_pago_estado_copropietario", "estado", "copropietario_id"),
+        # Distribuciones de un pago (y si un copropietario ya la tiene)
+        Index("ix_distribuciones_pago_pago_copropietario", "pago_id", "copropietario_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     pago_id = Column(Integer, ForeignKey("pagos.id"), nullable=False)
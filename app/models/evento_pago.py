@@ -0,0 +1,42 @@
+import enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from app.database.base import Base
+from datetime import datetime
+
+
+class TipoEventoPago(str, enum.Enum):
+    """Tareas posteriores a registrar un pago"""
+    DISTRIBUCION = "distribucion"  # repartir entre copropietarios
+    IMPUESTO     = "impuesto"      # registrar el ImpuestoAlquiler del pago
+
+
+class EstadoEventoPago(str, enum.Enum):
+    PENDIENTE  = "pendiente"
+    EN_PROCESO = "en_proceso"
+    PROCESADO  = "procesado"
+    FALLIDO    = "fallido"
+
+
+class EventoPago(Base):
+    """
+    Bandeja de salida (outbox) de registrar_pago: se inserta en la misma
+    transacción que el pago y el worker la procesa por lotes.
+    """
+    __tablename__ = "eventos_pago"
+    __table_args__ = (
+        # El worker toma los pendientes más antiguos
+        Index("ix_eventos_pago_estado_disponible", "estado", "disponible_desde"),
+    )
+
+    id         = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    pago_id = Column(Integer, ForeignKey("pagos.id"), nullable=False)
+    tipo    = Column(String(20), nullable=False)
+    estado  = Column(String(20), nullable=False, default=EstadoEventoPago.PENDIENTE.value)
+
+    intentos         = Column(Integer, nullable=False, default=0)
+    disponible_desde = Column(DateTime, nullable=False, default=datetime.utcnow)
+    tomado_en        = Column(DateTime, nullable=True)
+    procesado_en     = Column(DateTime, nullable=True)
+    error            = Column(Text, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey, Date, String, Boolean, Enum, DateTime
+from sqlalchemy import Column, Integer, Float, ForeignKey, Date, String, Boolean, Enum, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from app.database.base import Base
 from datetime import datetime
@@ -20,6 +20,17 @@ class TipoImpuesto(str, enum.Enum):
 
 class ImpuestoAlquiler(Base):
     __tablename__ = "impuestos_alquiler"
+    __table_args__ = (
+        # Un solo impuesto vigente por pago; también sirve al anti-join del
+        # cierre mensual (pagos sin impuesto registrado)
+        Index("uq_impuestos_alquiler_pago_vigente", "pago_id", unique=True,
+              postgresql_where=text("deleted_at IS NULL"),
+              sqlite_where=text("deleted_at IS NULL")),
+        # Resumen anual de un contrato (detalle por mes y totales)
+        Index("ix_impuestos_alquiler_contrato_anio_mes", "contrato_id", "anio", "mes"),
+        # Exportación de la declaración: rango de periodos en orden de contrato
+        Index("ix_impuestos_alquiler_periodo_contrato", "periodo", "contrato_id"),
+    )
 
     id         = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -75,6 +86,11 @@ class ImpuestoAlquiler(Base):
 
 class FacturaCompensacion(Base):
     __tablename__ = "facturas_compensacion"
+    __table_args__ = (
+        # Facturas libres de un contrato por tipo y periodo (asignación y cierre)
+        Index("ix_facturas_contrato_tipo_periodo_utilizada",
+              "contrato_id", "tipo_impuesto", "periodo", "utilizada"),
+    )
 
     id         = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -96,4 +112,24 @@ class FacturaCompensacion(Base):
     mes           = Column(Integer,    nullable=True)
     trimestre     = Column(Integer,    nullable=True)
     descripcion   = Column(String(300), nullable=True)
-    utilizada     = Column(Boolean,     default=False)
\ No newline at end of file
+    utilizada     = Column(Boolean,     default=False)
+
+class ReglaImpuesto(Base):
+    """Alícuotas y límites de compensación vigentes desde una fecha"""
+    __tablename__ = "reglas_impuesto"
+
+    id         = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    deleted_at = Column(DateTime, nullable=True)
+
+    vigente_desde = Column(Date, nullable=False, index=True)  # primer día del periodo
+
+    alicuota_iva       = Column(Float, nullable=False)
+    alicuota_it        = Column(Float, nullable=False)
+    alicuota_rc_iva    = Column(Float, nullable=False)
+    limite_comp_iva    = Column(Float, nullable=False)  # % del alquiler
+    limite_comp_rc_iva = Column(Float, nullable=False)  # % del RC-IVA determinado
+
+    norma       = Column(String(200), nullable=True)  # ley / resolución que la respalda
+    descripcion = Column(String(300), nullable=True)
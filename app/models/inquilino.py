@@ -1,12 +1,19 @@
 from sqlalchemy import Column, Integer, String
 from sqlalchemy.orm import relationship
 from app.models.base_model import BaseModel
+from app.database.trigramas import indice_trigramas
 
 
 class Inquilino(BaseModel):
     """Modelo de Inquilino/Arrendatario"""
     
     __tablename__ = "inquilinos"
+    __table_args__ = (
+        # Búsqueda por nombre, CI o teléfono (app.services.busqueda)
+        indice_trigramas("ix_inquilinos_nombre_completo_trgm", "nombre_completo"),
+        indice_trigramas("ix_inquilinos_ci_trgm", "ci"),
+        indice_trigramas("ix_inquilinos_telefono_trgm", "telefono"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, String, DateTime, Index, UniqueConstraint
+from app.database.base import Base
+from datetime import datetime
+
+
+class LiquidacionCopropietario(Base):
+    """
+    Lo que le corresponde a un copropietario en un periodo: su participación
+    en lo cobrado de la propiedad menos impuestos efectivos y gastos
+    (ver app.services.liquidacion_copropietarios)
+    """
+    __tablename__ = "liquidaciones_copropietario"
+    __table_args__ = (
+        UniqueConstraint("copropietario_id", "anio", "mes",
+                         name="uq_liquidaciones_copropietario_periodo"),
+        # Reliquidar un periodo (todo el portafolio o una propiedad)
+        Index("ix_liquidaciones_copropietario_periodo_propiedad", "anio", "mes", "propiedad_id"),
+    )
+
+    id         = Column(Integer, primary_key=True, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    copropietario_id = Column(Integer, ForeignKey("copropietarios.id"), nullable=False)
+    propiedad_id     = Column(Integer, ForeignKey("propiedades.id"),    nullable=False)
+
+    periodo = Column(String(7), nullable=False)
+    anio    = Column(Integer,   nullable=False)
+    mes     = Column(Integer,   nullable=False)
+
+    porcentaje_participacion = Column(Float, nullable=False)
+
+    # Parte del copropietario de cada concepto de la propiedad en el periodo
+    ingresos_brutos = Column(Float, nullable=False, default=0.0)
+    impuestos       = Column(Float, nullable=False, default=0.0)
+    gastos          = Column(Float, nullable=False, default=0.0)
+    monto_neto      = Column(Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<LiquidacionCopropietario(copropietario_id={self.copropietario_id}, periodo='{self.periodo}', neto={self.monto_neto})>"
@@ -0,0 +1,73 @@
+import enum
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Index, UniqueConstraint
+from app.database.base import Base
+from datetime import datetime
+
+
+class EstadoLotePago(str, enum.Enum):
+    ABIERTO = "abierto"  # archivo generado, falta confirmar beneficiarios
+    CERRADO = "cerrado"  # todos confirmados, o el lote se anuló
+
+
+class EstadoBeneficiarioLote(str, enum.Enum):
+    PENDIENTE = "pendiente"
+    PAGADO    = "pagado"
+    ANULADO   = "anulado"
+
+
+class LotePago(Base):
+    """
+    Lote de pago a copropietarios tal como se exportó al banco
+    (ver app.services.lote_pago)
+    """
+    __tablename__ = "lotes_pago"
+
+    id         = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    estado         = Column(String(20), nullable=False, default=EstadoLotePago.ABIERTO.value)
+    beneficiarios  = Column(Integer, nullable=False, default=0)
+    distribuciones = Column(Integer, nullable=False, default=0)
+    monto_total    = Column(Float,   nullable=False, default=0.0)
+
+
+class LotePagoBeneficiario(Base):
+    """Una línea del archivo del banco: la cuenta y el monto exportados"""
+    __tablename__ = "lotes_pago_beneficiarios"
+    __table_args__ = (
+        UniqueConstraint("lote_id", "copropietario_id", name="uq_lotes_pago_beneficiarios_lote_copropietario"),
+    )
+
+    id      = Column(Integer, primary_key=True, index=True)
+    lote_id = Column(Integer, ForeignKey("lotes_pago.id"), nullable=False)
+
+    copropietario_id = Column(Integer, ForeignKey("copropietarios.id"), nullable=False)
+    beneficiario     = Column(String(200), nullable=False)
+    ci               = Column(String(20))
+    banco            = Column(String(100))
+    tipo_cuenta      = Column(String(20))
+    cuenta_bancaria  = Column(String(50), nullable=False)
+
+    distribuciones = Column(Integer, nullable=False)
+    monto          = Column(Float,   nullable=False)
+
+    estado               = Column(String(20), nullable=False, default=EstadoBeneficiarioLote.PENDIENTE.value)
+    numero_transferencia = Column(String(100))
+    fecha_pago           = Column(Date, nullable=True)
+
+
+class LotePagoDistribucion(Base):
+    """
+    Distribuciones incluidas en un lote. Una distribución está en un solo
+    lote a la vez: al anular el lote se borran sus filas pendientes.
+    """
+    __tablename__ = "lotes_pago_distribuciones"
+    __table_args__ = (
+        UniqueConstraint("distribucion_id", name="uq_lotes_pago_distribuciones_distribucion"),
+        Index("ix_lotes_pago_distribuciones_lote", "lote_id"),
+    )
+
+    id              = Column(Integer, primary_key=True)
+    lote_id         = Column(Integer, ForeignKey("lotes_pago.id"),          nullable=False)
+    distribucion_id = Column(Integer, ForeignKey("distribuciones_pago.id"), nullable=False)
@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, Integer, Float, Date, ForeignKey, String, Enum
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey, String, Enum, Index
 from sqlalchemy.orm import relationship
 from app.models.base_model import BaseModel
 
@@ -25,6 +25,10 @@ class Pago(BaseModel):
     """Modelo de Pago de Alquiler"""
     
     __tablename__ = "pagos"
+    __table_args__ = (
+        # Pagos de un contrato por periodo (base trimestral de RC-IVA)
+        Index("ix_pagos_contrato_anio_mes", "contrato_id", "anio", "mes"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     contrato_id = Column(Integer, ForeignKey("contratos.id"), nullable=False)
@@ -1,12 +1,19 @@
 from sqlalchemy import Column, Integer, String, Float, Text
 from sqlalchemy.orm import relationship
 from app.database.base import Base
+from app.database.trigramas import indice_trigramas
 from datetime import datetime
 from sqlalchemy import DateTime
 
 
 class Propiedad(Base):
     __tablename__ = "propiedades"
+    __table_args__ = (
+        # Búsqueda por dirección, zona o ciudad (app.services.busqueda)
+        indice_trigramas("ix_propiedades_direccion_trgm", "direccion"),
+        indice_trigramas("ix_propiedades_zona_trgm", "zona"),
+        indice_trigramas("ix_propiedades_ciudad_trgm", "ciudad"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,52 @@
+import enum
+from sqlalchemy import Column, Integer, Float, String, Text, Boolean, DateTime, ForeignKey, JSON, Index
+from app.models.base_model import BaseModel
+from datetime import datetime
+
+
+class EstadoTrabajo(str, enum.Enum):
+    """Estados de un trabajo en segundo plano"""
+    PENDIENTE  = "pendiente"
+    EN_CURSO   = "en_curso"
+    COMPLETADO = "completado"
+    FALLIDO    = "fallido"
+    CANCELADO  = "cancelado"
+
+
+class Trabajo(BaseModel):
+    """Operación larga encolada para el worker (python -m app.cli.worker)"""
+
+    __tablename__ = "trabajos"
+    __table_args__ = (
+        # El worker busca el siguiente pendiente disponible por orden de llegada
+        Index("ix_trabajos_estado_disponible", "estado", "disponible_desde"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    tipo = Column(String(50), nullable=False)
+    parametros = Column(JSON, nullable=False, default=dict)
+    estado = Column(String(20), nullable=False, default=EstadoTrabajo.PENDIENTE.value)
+
+    # Avance informado por la tarea
+    progreso = Column(Float, nullable=False, default=0.0)  # 0-100
+    mensaje = Column(String(300), nullable=True)
+    resultado = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    # Reintentos: un fallo vuelve a "pendiente" con espera creciente
+    intentos = Column(Integer, nullable=False, default=0)
+    max_intentos = Column(Integer, nullable=False, default=3)
+    disponible_desde = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    # Ejecución
+    trabajador = Column(String(100), nullable=True)
+    iniciado_en = Column(DateTime, nullable=True)
+    finalizado_en = Column(DateTime, nullable=True)
+    latido_en = Column(DateTime, nullable=True)  # el worker lo renueva mientras ejecuta
+    cancelacion_solicitada = Column(Boolean, nullable=False, default=False)
+
+    creado_por_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    def __repr__(self):
+        return f"<Trabajo(id={self.id}, tipo='{self.tipo}', estado='{self.estado}', progreso={self.progreso})>"
@@ -1,7 +1,7 @@
 """
 Modelos para Unidades de Alquiler y Gastos de Propiedades
 """
-from sqlalchemy import Column, Integer, Float, ForeignKey, Date, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, Float, ForeignKey, Date, String, Boolean, DateTime, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.database.base import Base
 from datetime import datetime
@@ -10,6 +10,10 @@ from datetime import datetime
 class UnidadAlquiler(Base):
     """Unidad alquilable dentro de una propiedad"""
     __tablename__ = "unidades_alquiler"
+    __table_args__ = (
+        # Resúmenes por propiedad y ocupación del portafolio (GROUP BY estado)
+        Index("ix_unidades_alquiler_propiedad_estado", "propiedad_id", "estado", "deleted_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -37,6 +41,10 @@ class UnidadAlquiler(Base):
 class GastoPropiedad(Base):
     """Gastos asociados a una propiedad"""
     __tablename__ = "gastos_propiedad"
+    __table_args__ = (
+        # Gastos de una propiedad por rango de fechas (año, mes)
+        Index("ix_gastos_propiedad_propiedad_fecha", "propiedad_id", "fecha_gasto"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -58,4 +66,26 @@ class GastoPropiedad(Base):
     observaciones = Column(String(500), nullable=True)
 
     propiedad = relationship("Propiedad", back_populates="gastos")
-    unidad = relationship("UnidadAlquiler", backref="gastos")
\ No newline at end of file
+    unidad = relationship("UnidadAlquiler", backref="gastos")
+
+
+class ResumenGastoMensual(Base):
+    """
+    Gastos por propiedad, mes y tipo, mantenido en cada flush que toca
+    GastoPropiedad (ver app.services.resumen_gastos)
+    """
+    __tablename__ = "resumen_gastos_mensual"
+    __table_args__ = (
+        UniqueConstraint("propiedad_id", "anio", "mes", "tipo_gasto",
+                         name="uq_resumen_gastos_mensual_propiedad_periodo_tipo"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    propiedad_id = Column(Integer, ForeignKey("propiedades.id"), nullable=False)
+    anio = Column(Integer, nullable=False)
+    mes = Column(Integer, nullable=False)
+    tipo_gasto = Column(String(30), nullable=False)
+    cantidad = Column(Integer, nullable=False, default=0)
+    monto_total = Column(Float, nullable=False, default=0)
@@ -0,0 +1,80 @@
+from sqlalchemy import Column, Integer, String, DateTime, event, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.database.base import Base
+from datetime import datetime
+
+
+class VersionCache(Base):
+    """
+    Sello de versión de datos cacheados en memoria: quien modifica los datos
+    incrementa `version` en la misma transacción y cada proceso descarta su
+    caché cuando la versión leída ya no coincide
+    """
+    __tablename__ = "versiones_cache"
+
+    nombre     = Column(String(50), primary_key=True)
+    version    = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+_UPSERT = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def incrementar_version(conexion, nombre: str) -> None:
+    """
+    Incrementa el sello dentro de la transacción de `conexion`. Es un solo
+    INSERT ... ON CONFLICT DO UPDATE: con UPDATE y luego INSERT, dos
+    transacciones sobre una base nueva insertarían la misma fila y una
+    fallaría (revirtiendo su cambio).
+    """
+    ahora = datetime.utcnow()
+    insertar = _UPSERT.get(conexion.dialect.name)
+    if insertar is None:
+        actualizadas = conexion.execute(update(VersionCache).where(
+            VersionCache.nombre == nombre
+        ).values(version=VersionCache.version + 1, updated_at=ahora)).rowcount
+        if not actualizadas:
+            conexion.execute(insert(VersionCache).values(nombre=nombre, version=1, updated_at=ahora))
+        return
+    conexion.execute(insertar(VersionCache).values(
+        nombre=nombre, version=1, updated_at=ahora
+    ).on_conflict_do_update(
+        index_elements=[VersionCache.nombre],
+        set_={"version": VersionCache.version + 1, "updated_at": ahora}
+    ))
+
+
+def versionar(modelo, nombre: str) -> None:
+    """
+    Toda sesión que inserta, modifica o borra instancias de `modelo`
+    incrementa la versión `nombre` en el mismo flush. Se registra junto al
+    modelo para que valga en cualquier proceso que lo use (API, worker, CLI).
+    session.info["versiones_modificadas"] queda con `nombre` hasta el commit.
+    """
+    @event.listens_for(Session, "before_flush")
+    def _detectar_cambios(session, flush_context, instances):
+        modificados = list(session.new) + list(session.deleted) + [
+            obj for obj in session.dirty if session.is_modified(obj)
+        ]
+        if any(isinstance(obj, modelo) for obj in modificados):
+            session.info.setdefault("versiones_modificadas", set()).add(nombre)
+            session.info.setdefault("versiones_sin_incrementar", set()).add(nombre)
+
+    @event.listens_for(Session, "after_flush")
+    def _incrementar(session, flush_context):
+        pendientes = session.info.get("versiones_sin_incrementar")
+        if pendientes and nombre in pendientes:
+            pendientes.discard(nombre)
+            incrementar_version(session.connection(), nombre)
+
+
+@event.listens_for(Session, "after_commit")
+def _confirmar(session):
+    session.info.pop("versiones_modificadas", None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar(session):
+    session.info.pop("versiones_modificadas", None)
+    session.info.pop("versiones_sin_incrementar", None)
@@ -0,0 +1,198 @@
+"""
+Alta masiva de propiedades, unidades, inquilinos y contratos
+============================================================
+Para incorporar la cartera de un cliente nuevo sin miles de POST sueltos,
+cada uno con su verificación y su commit:
+
+  1. se valida todo el lote en una pasada, con una sola consulta IN por
+     clave (CI existentes, números de contrato existentes, propiedades e
+     inquilinos vigentes) y los repetidos dentro del mismo lote;
+  2. las filas válidas se insertan con un INSERT masivo (executemany con
+     RETURNING, en el orden del lote) y un solo commit;
+  3. se devuelve el resultado de cada ítem por su índice: creado con su id,
+     rechazado con el motivo, o no_creado si todo_o_nada descartó el lote.
+
+Las validaciones son las mismas que las de los endpoints de a uno. Los
+copropietarios se insertan por Core, sin pasar por el flush: se incrementa a
+mano la versión de la caché de participaciones.
+"""
+from typing import Callable, Dict, Iterable, List
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.contrato import Contrato
+from app.models.copropietario import Copropietario
+from app.models.inquilino import Inquilino
+from app.models.propiedad import Propiedad
+from app.models.unidad_gasto import UnidadAlquiler
+from app.services import participaciones
+
+# Ítems por petición: 10.000 altas entran en una sola transacción de segundos
+LOTE_MAXIMO = 10000
+
+TOLERANCIA_PORCENTAJE = participaciones.TOLERANCIA_PORCENTAJE
+
+
+def _existentes(db: Session, columna, valores: Iterable, *condiciones) -> set:
+    """Cuáles de `valores` ya están en `columna`: una sola consulta IN"""
+    valores = {valor for valor in valores if valor is not None}
+    if not valores:
+        return set()
+    return set(db.scalars(select(columna).where(columna.in_(valores), *condiciones)))
+
+
+def _insertar(db: Session, modelo, filas: List[Dict]) -> List[int]:
+    """INSERT masivo; devuelve los ids en el orden de `filas`"""
+    if not filas:
+        return []
+    return list(db.scalars(
+        insert(modelo).returning(modelo.id, sort_by_parameter_order=True), filas
+    ))
+
+
+def _resultado(total: int, creados: Dict[int, int], errores: Dict[int, str]) -> Dict:
+    resultados = []
+    for i in range(total):
+        if i in errores:
+            resultados.append({"indice": i, "estado": "rechazado", "error": errores[i]})
+        elif i in creados:
+            resultados.append({"indice": i, "estado": "creado", "id": creados[i]})
+        else:
+            resultados.append({"indice": i, "estado": "no_creado"})
+    return {
+        "total": total,
+        "creados": len(creados),
+        "rechazados": len(errores),
+        "resultados": resultados,
+    }
+
+
+def _guardar(
+    db: Session,
+    items: List[Dict],
+    errores: Dict[int, str],
+    todo_o_nada: bool,
+    insertar: Callable[[List[int]], List[int]],
+) -> Dict:
+    """
+    Inserta los ítems válidos con `insertar(indices)` y confirma una sola
+    vez. Con todo_o_nada, un solo rechazo deja el lote sin crear.
+    """
+    validos = [i for i in range(len(items)) if i not in errores]
+    if todo_o_nada and errores:
+        validos = []
+
+    try:
+        creados = dict(zip(validos, insertar(validos)))
+        db.commit()
+    except IntegrityError:
+        # Otra petición creó el mismo CI / número entre la validación y el INSERT
+        db.rollback()
+        raise ValueError("Otro proceso registró datos del lote mientras se importaba; reintente")
+
+    return _resultado(len(items), creados, errores)
+
+
+def crear_inquilinos(db: Session, items: List[Dict], todo_o_nada: bool = False) -> Dict:
+    """items: dicts de InquilinoCreate. El CI es único"""
+    ya_registrados = _existentes(db, Inquilino.ci, (item["ci"] for item in items))
+
+    errores, vistos = {}, {}
+    for i, item in enumerate(items):
+        if item["ci"] in ya_registrados:
+            errores[i] = "Ya existe un inquilino con este CI"
+        elif item["ci"] in vistos:
+            errores[i] = f"CI repetido en el lote (ítem {vistos[item['ci']]})"
+        else:
+            vistos[item["ci"]] = i
+
+    return _guardar(db, items, errores, todo_o_nada, lambda validos: _insertar(
+        db, Inquilino, [items[i] for i in validos]
+    ))
+
+
+def crear_contratos(db: Session, items: List[Dict], todo_o_nada: bool = False) -> Dict:
+    """items: dicts de ContratoCreate. El número de contrato es único"""
+    propiedades = _existentes(
+        db, Propiedad.id, (item["propiedad_id"] for item in items), Propiedad.deleted_at == None
+    )
+    inquilinos = _existentes(
+        db, Inquilino.id, (item["inquilino_id"] for item in items), Inquilino.deleted_at == None
+    )
+    numeros = _existentes(db, Contrato.numero_contrato, (item["numero_contrato"] for item in items))
+
+    errores, vistos = {}, {}
+    for i, item in enumerate(items):
+        numero = item["numero_contrato"]
+        if item["propiedad_id"] not in propiedades:
+            errores[i] = "Propiedad no encontrada"
+        elif item["inquilino_id"] not in inquilinos:
+            errores[i] = "Inquilino no encontrado"
+        elif numero in numeros:
+            errores[i] = "Ya existe un contrato con este número"
+        elif numero in vistos:
+            errores[i] = f"Número de contrato repetido en el lote (ítem {vistos[numero]})"
+        else:
+            vistos[numero] = i
+
+    return _guardar(db, items, errores, todo_o_nada, lambda validos: _insertar(
+        db, Contrato, [items[i] for i in validos]
+    ))
+
+
+def crear_unidades(db: Session, items: List[Dict], todo_o_nada: bool = False) -> Dict:
+    """items: dicts de CrearUnidadRequest; las unidades nacen disponibles"""
+    propiedades = _existentes(
+        db, Propiedad.id, (item["propiedad_id"] for item in items), Propiedad.deleted_at == None
+    )
+    errores = {
+        i: "Propiedad no encontrada"
+        for i, item in enumerate(items) if item["propiedad_id"] not in propiedades
+    }
+
+    return _guardar(db, items, errores, todo_o_nada, lambda validos: _insertar(
+        db, UnidadAlquiler, [{**items[i], "estado": "disponible"} for i in validos]
+    ))
+
+
+def crear_propiedades(db: Session, items: List[Dict], todo_o_nada: bool = False) -> Dict:
+    """
+    items: dicts de PropiedadCreate con sus copropietarios. Una copropiedad
+    necesita copropietarios cuyos porcentajes sumen 100%.
+    """
+    errores = {}
+    for i, item in enumerate(items):
+        if item["tipo"] != "copropiedad":
+            continue
+        if not item["copropietarios"]:
+            errores[i] = "Debe agregar al menos un copropietario"
+            continue
+        total_porcentaje = sum(c["porcentaje_participacion"] for c in item["copropietarios"])
+        if abs(total_porcentaje - 100) > TOLERANCIA_PORCENTAJE:
+            errores[i] = f"Los porcentajes deben sumar 100%. Suman {total_porcentaje}%"
+
+    def insertar(validos: List[int]) -> List[int]:
+        ids = _insertar(db, Propiedad, [
+            {
+                **{campo: valor for campo, valor in items[i].items() if campo != "copropietarios"},
+                "estado": "disponible",
+            }
+            for i in validos
+        ])
+        copropietarios = [
+            {
+                "propiedad_id": propiedad_id,
+                "nombre": c["nombre_completo"],
+                **{campo: valor for campo, valor in c.items() if campo != "nombre_completo"},
+            }
+            for i, propiedad_id in zip(validos, ids)
+            for c in items[i]["copropietarios"]
+        ]
+        if copropietarios:
+            _insertar(db, Copropietario, copropietarios)
+            participaciones.incrementar_version(db.connection())
+        return ids
+
+    return _guardar(db, items, errores, todo_o_nada, insertar)
@@ -0,0 +1,120 @@
+"""
+Base trimestral de RC-IVA a partir de los pagos registrados
+===========================================================
+El RC-IVA se liquida sobre lo efectivamente cobrado en el trimestre. En vez
+de estimarlo como alquiler × 3, se suma monto_pagado de los pagos PAGADO y
+PARCIAL del contrato en los tres meses del trimestre, con una sola consulta
+que usa el índice ix_pagos_contrato_anio_mes.
+
+Las sumas se cachean por (contrato_id, anio, trimestre):
+  - se invalidan cuando una sesión inserta, modifica o borra un Pago de ese
+    trimestre (after_flush y nuevamente after_commit, para no dejar en caché
+    un valor leído entre el flush y el commit);
+  - expiran a los BASE_TRIMESTRAL_TTL segundos, lo que cubre los UPDATE
+    masivos (query.update) y los cambios hechos por otros procesos.
+"""
+import threading
+import time
+from typing import Dict, Set, Tuple
+
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.session import conservar_historial
+from app.models.pago import EstadoPago, Pago
+from app.services.tax_calculator import get_trimestre
+
+Clave = Tuple[int, int, int]  # (contrato_id, anio, trimestre)
+
+_cache: Dict[Clave, Tuple[float, float]] = {}  # clave → (base, expira)
+_lock = threading.Lock()
+
+
+def meses_trimestre(trimestre: int) -> range:
+    return range(3 * trimestre - 2, 3 * trimestre + 1)
+
+
+def calcular_base_trimestral(db: Session, contrato_id: int, anio: int, mes: int) -> float:
+    """Suma de lo cobrado en el trimestre del mes dado (sin caché)"""
+    meses = meses_trimestre(get_trimestre(mes))
+    total = db.query(func.sum(Pago.monto_pagado)).filter(
+        Pago.contrato_id == contrato_id,
+        Pago.anio == anio,
+        Pago.mes.between(meses.start, meses.stop - 1),
+        Pago.estado.in_([EstadoPago.PAGADO, EstadoPago.PARCIAL]),
+        Pago.deleted_at == None
+    ).scalar()
+    return round(float(total or 0), 2)
+
+
+def obtener_base_trimestral(db: Session, contrato_id: int, anio: int, mes: int) -> float:
+    """Base trimestral cacheada por (contrato, año, trimestre)"""
+    clave = (contrato_id, anio, get_trimestre(mes))
+    ahora = time.monotonic()
+    with _lock:
+        en_cache = _cache.get(clave)
+    if en_cache is not None and en_cache[1] > ahora:
+        return en_cache[0]
+
+    base = calcular_base_trimestral(db, contrato_id, anio, mes)
+    with _lock:
+        _cache[clave] = (base, ahora + settings.BASE_TRIMESTRAL_TTL)
+    return base
+
+
+def invalidar(claves) -> None:
+    with _lock:
+        for clave in claves:
+            _cache.pop(clave, None)
+
+
+def limpiar_cache() -> None:
+    with _lock:
+        _cache.clear()
+
+
+# ── INVALIDACIÓN POR EVENTOS ORM ─────────────────────────────────────────────
+
+def _claves_pago(pago: Pago) -> Set[Clave]:
+    """Trimestre actual y, si cambió contrato/año/mes, también el anterior"""
+    historial = inspect(pago).attrs
+    actuales = (pago.contrato_id, pago.anio, pago.mes)
+    anteriores = tuple(
+        (historial[nombre].history.deleted or [actual])[0]
+        for nombre, actual in zip(("contrato_id", "anio", "mes"), actuales)
+    )
+    return {
+        (contrato_id, anio, get_trimestre(mes))
+        for contrato_id, anio, mes in {actuales, anteriores}
+        if None not in (contrato_id, anio, mes)
+    }
+
+
+# Al reasignar contrato/año/mes de un pago expirado se carga el valor anterior,
+# para poder invalidar también el trimestre de origen
+conservar_historial(Pago.contrato_id, Pago.anio, Pago.mes)
+
+
+@event.listens_for(Session, "before_flush")
+def _registrar_pagos_modificados(session, flush_context, instances):
+    # Antes del flush el historial de atributos todavía tiene los valores previos
+    claves = session.info.setdefault("base_trimestral_claves", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Pago):
+            claves.update(_claves_pago(obj))
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidar_tras_flush(session, flush_context):
+    invalidar(session.info.get("base_trimestral_claves", ()))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_tras_commit(session):
+    invalidar(session.info.pop("base_trimestral_claves", ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_claves(session):
+    session.info.pop("base_trimestral_claves", None)
@@ -0,0 +1,96 @@
+"""
+Búsqueda de inquilinos y propiedades
+====================================
+Por nombre parcial, CI o teléfono (inquilinos) y por dirección, zona o
+ciudad (propiedades), con los resultados ordenados por relevancia (0 a 1):
+
+  - PostgreSQL con pg_trgm: una fila coincide si contiene el texto (ILIKE)
+    o si alguna de sus palabras se le parece (operador <%, tolera errores de
+    tipeo); ambas condiciones usan los índices GIN de trigramas. La
+    relevancia es la mayor word_similarity entre las columnas.
+  - SQLite (o PostgreSQL sin pg_trgm): LIKE sin distinguir mayúsculas, con
+    relevancia 1 si una columna es igual al texto, 0.75 si ella o alguna de
+    sus palabras empieza con él y 0.5 si lo contiene.
+
+Empates por id, para que la paginación sea estable.
+"""
+from typing import Dict, List, Sequence
+
+from sqlalchemy import case, func, literal, or_, select
+from sqlalchemy.orm import Session
+
+from app.database import trigramas
+from app.database.funciones import mayor
+from app.models.inquilino import Inquilino
+from app.models.propiedad import Propiedad
+
+# Con menos de 3 caracteres no hay trigramas: el índice no ayuda
+LARGO_MINIMO = 3
+
+
+def _escapar(texto: str) -> str:
+    """Texto literal para LIKE: escapa los comodines"""
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _filtro_y_relevancia(db: Session, columnas: Sequence, texto: str):
+    patron = f"%{_escapar(texto)}%"
+    contiene = [columna.ilike(patron, escape="\\") for columna in columnas]
+
+    if trigramas.instalada(db.connection()):
+        parecidas = [literal(texto).op("<%")(columna) for columna in columnas]
+        relevancia = mayor(*(func.word_similarity(texto, columna) for columna in columnas))
+        return or_(*contiene, *parecidas), relevancia
+
+    minusculas = texto.lower()
+    prefijo = f"{_escapar(minusculas)}%"
+    relevancia = mayor(*(
+        case(
+            (func.lower(columna) == minusculas, 1.0),
+            (or_(
+                func.lower(columna).like(prefijo, escape="\\"),
+                func.lower(columna).like(f"% {prefijo}", escape="\\"),
+            ), 0.75),
+            (condicion, 0.5),
+            else_=0.0,
+        )
+        for columna, condicion in zip(columnas, contiene)
+    ))
+    return or_(*contiene), relevancia
+
+
+def _buscar(db: Session, modelo, columnas: Sequence, salida: Sequence, texto: str, limite: int) -> List[Dict]:
+    texto = texto.strip()
+    if len(texto) < LARGO_MINIMO:
+        # Sin esto "   " pasaría la validación del endpoint y sería ILIKE '%%'
+        raise ValueError(f"La búsqueda necesita al menos {LARGO_MINIMO} caracteres (sin contar espacios)")
+    filtro, relevancia = _filtro_y_relevancia(db, columnas, texto)
+    relevancia = relevancia.label("relevancia")
+    filas = db.execute(
+        select(*salida, relevancia).where(
+            filtro, modelo.deleted_at == None
+        ).order_by(relevancia.desc(), modelo.id).limit(limite)
+    ).all()
+    return [{**fila._asdict(), "relevancia": round(float(fila.relevancia or 0), 3)} for fila in filas]
+
+
+def buscar_inquilinos(db: Session, texto: str, limite: int = 20) -> List[Dict]:
+    """Inquilinos vigentes por nombre, CI o teléfono, los más parecidos primero"""
+    return _buscar(
+        db, Inquilino,
+        (Inquilino.nombre_completo, Inquilino.ci, Inquilino.telefono),
+        (Inquilino.id, Inquilino.nombre_completo, Inquilino.ci, Inquilino.telefono,
+         Inquilino.email, Inquilino.estado),
+        texto, limite,
+    )
+
+
+def buscar_propiedades(db: Session, texto: str, limite: int = 20) -> List[Dict]:
+    """Propiedades vigentes por dirección, zona o ciudad, las más parecidas primero"""
+    return _buscar(
+        db, Propiedad,
+        (Propiedad.direccion, Propiedad.zona, Propiedad.ciudad),
+        (Propiedad.id, Propiedad.direccion, Propiedad.zona, Propiedad.ciudad,
+         Propiedad.tipo, Propiedad.estado, Propiedad.canon_base),
+        texto, limite,
+    )
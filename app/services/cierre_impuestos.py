@@ -0,0 +1,217 @@
+"""
+Cierre mensual de impuestos
+===========================
+Registra en bloque el ImpuestoAlquiler de todos los pagos PAGADO de un
+periodo que todavía no lo tienen:
+
+  1. pagos pendientes   → anti-join (NOT EXISTS impuesto del pago)
+  2. facturas           → FacturaCompensacion libres de esos contratos
+                          (IVA del mes, RC-IVA del trimestre)
+  3. base RC-IVA        → lo cobrado en el trimestre, un GROUP BY por contrato
+  4. cálculo            → calcular_impuestos() por pago (mismas reglas que
+                          POST /impuestos/registrar), con las facturas que
+                          caben en su capacidad (ver _facturas_del_pago)
+  5. escritura          → un INSERT multi-fila con RETURNING y un UPDATE por
+                          clave primaria de las facturas aplicadas
+
+Todo en una sola transacción: o se cierra el periodo completo o nada.
+"""
+import time
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, exists, func, insert, select, text, update
+from sqlalchemy.orm import Session
+
+from app.models.impuesto import FacturaCompensacion, ImpuestoAlquiler
+from app.models.pago import EstadoPago, Pago
+from app.services.asignacion_facturas import asignar
+from app.services.base_trimestral import meses_trimestre
+from app.services.tax_calculator import (
+    MESES_TRIMESTRALES, calcular_impuestos, campos_registro, get_trimestre,
+)
+
+
+def _pagos_sin_impuesto(anio: int, mes: int, pago_ids: Optional[List[int]] = None):
+    """Pagos cobrados del periodo sin ImpuestoAlquiler vigente (anti-join)"""
+    tiene_impuesto = exists().where(and_(
+        ImpuestoAlquiler.pago_id == Pago.id,
+        ImpuestoAlquiler.deleted_at == None
+    ))
+    consulta = select(Pago.id, Pago.contrato_id, Pago.monto_pagado).where(
+        Pago.anio == anio,
+        Pago.mes == mes,
+        Pago.estado == EstadoPago.PAGADO,
+        Pago.deleted_at == None,
+        ~tiene_impuesto
+    ).order_by(Pago.contrato_id, Pago.id)
+    if pago_ids is not None:
+        consulta = consulta.where(Pago.id.in_(pago_ids))
+    return consulta
+
+
+def _facturas_disponibles(db: Session, contratos, anio: int, mes: int) -> Dict[tuple, List]:
+    """{(contrato_id, tipo): [(factura_id, monto), ...]} de facturas sin usar"""
+    trimestre = get_trimestre(mes)
+    condicion_periodo = FacturaCompensacion.mes == mes
+    if mes in MESES_TRIMESTRALES:
+        condicion_periodo = (
+            (FacturaCompensacion.tipo_impuesto == "iva") & condicion_periodo
+        ) | (
+            (FacturaCompensacion.tipo_impuesto == "rc_iva") & (
+                (FacturaCompensacion.trimestre == trimestre) |
+                FacturaCompensacion.mes.between(mes - 2, mes)
+            )
+        )
+    else:
+        condicion_periodo = (FacturaCompensacion.tipo_impuesto == "iva") & condicion_periodo
+
+    filas = db.execute(select(
+        FacturaCompensacion.id,
+        FacturaCompensacion.contrato_id,
+        FacturaCompensacion.tipo_impuesto,
+        FacturaCompensacion.monto_factura
+    ).where(
+        FacturaCompensacion.contrato_id.in_(contratos),
+        FacturaCompensacion.anio == anio,
+        condicion_periodo,
+        FacturaCompensacion.utilizada == False,
+        FacturaCompensacion.impuesto_id == None,
+        FacturaCompensacion.deleted_at == None
+    ))
+    facturas = defaultdict(list)
+    for factura_id, contrato_id, tipo, monto in filas:
+        facturas[(contrato_id, tipo)].append((factura_id, monto))
+    return facturas
+
+
+def _bases_trimestrales(db: Session, contratos, anio: int, mes: int) -> Dict[int, float]:
+    """{contrato_id: suma cobrada en el trimestre} en un solo GROUP BY"""
+    meses = meses_trimestre(get_trimestre(mes))
+    filas = db.execute(select(Pago.contrato_id, func.sum(Pago.monto_pagado)).where(
+        Pago.contrato_id.in_(contratos),
+        Pago.anio == anio,
+        Pago.mes.between(meses.start, meses.stop - 1),
+        Pago.estado.in_([EstadoPago.PAGADO, EstadoPago.PARCIAL]),
+        Pago.deleted_at == None
+    ).group_by(Pago.contrato_id))
+    return {contrato_id: round(float(total or 0), 2) for contrato_id, total in filas}
+
+
+def _facturas_del_pago(disponibles: List, capacidad: float) -> List:
+    """
+    Facturas [(factura_id, monto)] que se aplican a un pago: solo hasta su
+    capacidad compensable, con el mismo best-fit que asignacion_facturas. Las
+    demás se quitan de disponibles y quedan libres para otros pagos del
+    contrato o para asignar_facturas() en los periodos siguientes.
+    """
+    if not disponibles or capacidad <= 0:
+        return []
+    elegidas = asignar(
+        [(factura_id, 0, monto) for factura_id, monto in disponibles],
+        [(0, 0, round(capacidad, 2))],
+        ventana=0,
+    )
+    aplicadas = [f for f in disponibles if f[0] in elegidas]
+    disponibles[:] = [f for f in disponibles if f[0] not in elegidas]
+    return aplicadas
+
+
+def cerrar_periodo(
+    db: Session,
+    anio: int,
+    mes: int,
+    fecha_declaracion: Optional[date] = None,
+    simular: bool = False,
+    pago_ids: Optional[List[int]] = None,
+) -> Dict:
+    """
+    Registra los impuestos de todos los pagos cobrados del periodo (o solo
+    de pago_ids, como hace el procesamiento de eventos de pago).
+
+    Con simular=True calcula todo y revierte la transacción.
+    Devuelve conteos, montos y duración de cada etapa.
+    """
+    inicio = time.perf_counter()
+    tiempos = {}
+
+    if db.get_bind().dialect.name == "postgresql":
+        # Dos cierres simultáneos del mismo periodo no deben duplicar registros
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext('cierre_impuestos'), :periodo)"),
+                   {"periodo": anio * 100 + mes})
+
+    consulta = _pagos_sin_impuesto(anio, mes, pago_ids)
+    pagos = db.execute(consulta).all()
+    contratos = select(consulta.order_by(None).subquery().c.contrato_id)
+    tiempos["pagos"] = time.perf_counter() - inicio
+
+    facturas = _facturas_disponibles(db, contratos, anio, mes) if pagos else {}
+    bases = _bases_trimestrales(db, contratos, anio, mes) if pagos and mes in MESES_TRIMESTRALES else {}
+    tiempos["facturas_y_bases"] = time.perf_counter() - inicio - tiempos["pagos"]
+
+    filas = []
+    facturas_por_pago = {}
+    for pago_id, contrato_id, monto_pagado in pagos:
+        # Capacidad del pago: lo que las facturas todavía pueden reducir
+        base = calcular_impuestos(monto_pagado, mes, anio, monto_acumulado_trimestre=bases.get(contrato_id))
+        iva = _facturas_del_pago(
+            facturas.get((contrato_id, "iva")),
+            min(base["iva"]["limite_compensacion"], base["iva"]["determinado"]),
+        )
+        rc_iva = _facturas_del_pago(
+            facturas.get((contrato_id, "rc_iva")),
+            base["rc_iva"]["determinado"] if base["es_mes_trimestral"] else 0.0,
+        )
+        calculo = calcular_impuestos(
+            monto_alquiler=monto_pagado,
+            mes=mes,
+            anio=anio,
+            facturas_iva=round(sum(monto for _, monto in iva), 2),
+            facturas_rc_iva=round(sum(monto for _, monto in rc_iva), 2),
+            monto_acumulado_trimestre=bases.get(contrato_id),
+        )
+        filas.append({
+            "pago_id": pago_id,
+            "contrato_id": contrato_id,
+            **campos_registro(calculo),
+            "fecha_declaracion": fecha_declaracion,
+        })
+        facturas_por_pago[pago_id] = [factura_id for factura_id, _ in iva + rc_iva]
+    tiempos["calculo"] = time.perf_counter() - inicio - sum(tiempos.values())
+
+    facturas_marcadas = []
+    if filas:
+        creados = db.execute(
+            insert(ImpuestoAlquiler).returning(ImpuestoAlquiler.id, ImpuestoAlquiler.pago_id),
+            filas
+        ).all()
+        ahora = datetime.utcnow()
+        facturas_marcadas = [
+            {"id": factura_id, "impuesto_id": impuesto_id, "utilizada": True, "updated_at": ahora}
+            for impuesto_id, pago_id in creados
+            for factura_id in facturas_por_pago[pago_id]
+        ]
+        if facturas_marcadas:
+            db.execute(update(FacturaCompensacion), facturas_marcadas)
+    tiempos["escritura"] = time.perf_counter() - inicio - sum(tiempos.values())
+
+    if simular:
+        db.rollback()
+    else:
+        db.commit()
+
+    return {
+        "periodo": f"{anio}-{mes:02d}",
+        "simulado": simular,
+        "impuestos_registrados": len(filas),
+        "facturas_aplicadas": len(facturas_marcadas),
+        "totales": {
+            "monto_alquiler": round(sum(f["monto_alquiler"] for f in filas), 2),
+            "determinado": round(sum(f["total_determinado"] for f in filas), 2),
+            "facturas_aplicadas": round(sum(f["total_facturas_aplicadas"] for f in filas), 2),
+            "efectivo": round(sum(f["total_efectivo"] for f in filas), 2),
+        },
+        "duracion_s": round(time.perf_counter() - inicio, 3),
+        "etapas_s": {etapa: round(segundos, 3) for etapa, segundos in tiempos.items()},
+    }
@@ -0,0 +1,238 @@
+"""
+Estado de resultados (P&L) por propiedad y unidad
+=================================================
+Una sola consulta con tres CTE agrupadas por (propiedad, unidad, mes) del año:
+
+  ingresos  → pagos: lo cobrado (PAGADO/PARCIAL) y la mora pendiente
+              (VENCIDO/PARCIAL), con las reglas del dashboard
+  impuestos → impuestos_alquiler: IVA, IT y RC-IVA efectivos
+  gastos    → gastos_propiedad por rango de fechas del año
+
+Las tres se apilan con UNION ALL y se suman en una pasada:
+neto = ingresos - impuestos - gastos (la mora no entra: todavía no se cobró).
+
+La unidad sale del contrato (ingresos, impuestos) o del gasto; los gastos y
+contratos sin unidad quedan en la fila de la propiedad (unidad_id NULL).
+
+Para el portafolio completo exportar_estado_resultados() lee la consulta con
+un cursor del lado del servidor y emite CSV por bloques, como la exportación
+al SIN: la memoria no crece con la cantidad de propiedades.
+"""
+import csv
+import io
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import Float, Integer, case, cast, extract, func, literal, null, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.contrato import Contrato
+from app.models.impuesto import ImpuestoAlquiler
+from app.models.pago import EstadoPago, Pago
+from app.models.propiedad import Propiedad
+from app.models.unidad_gasto import GastoPropiedad, UnidadAlquiler
+from app.services.resumen_gastos import rango_anio
+
+# Filas por bloque leído del cursor al exportar
+LOTE_EXPORTACION = 2000
+
+MONTOS = ("ingresos", "mora", "iva", "it", "rc_iva", "impuestos", "gastos", "neto")
+
+COLUMNAS_EXPORTACION = (
+    "anio", "propiedad_id", "direccion", "unidad_id", "numero_unidad", "mes"
+) + MONTOS
+
+
+def consulta_estado_resultados(anio: int, propiedad_id: Optional[int] = None, por_unidad: bool = True):
+    """
+    Filas (propiedad_id, direccion, unidad_id, numero_unidad, mes, montos...)
+    del año, ordenadas por propiedad, unidad y mes
+    """
+    def unidad(columna):
+        # NULL con tipo: PostgreSQL no compara un NULL sin tipo (text) con unidades.id
+        return columna if por_unidad else cast(null(), Integer)
+
+    def de_propiedad(columna):
+        return [columna == propiedad_id] if propiedad_id is not None else []
+
+    def cero():
+        return literal(0.0, Float)
+
+    ingresos = select(
+        Contrato.propiedad_id,
+        unidad(Contrato.unidad_id).label("unidad_id"),
+        Pago.mes.label("mes"),
+        func.sum(case(
+            (Pago.estado.in_([EstadoPago.PAGADO, EstadoPago.PARCIAL]), Pago.monto_pagado), else_=0
+        )).label("ingresos"),
+        func.sum(case(
+            (Pago.estado.in_([EstadoPago.VENCIDO, EstadoPago.PARCIAL]), Pago.mora_calculada), else_=0
+        )).label("mora"),
+    ).join(Contrato, Contrato.id == Pago.contrato_id).where(
+        Pago.anio == anio,
+        Pago.deleted_at == None,
+        *de_propiedad(Contrato.propiedad_id)
+    ).group_by(
+        Contrato.propiedad_id, *([Contrato.unidad_id] if por_unidad else []), Pago.mes
+    ).cte("ingresos")
+
+    impuestos = select(
+        Contrato.propiedad_id,
+        unidad(Contrato.unidad_id).label("unidad_id"),
+        ImpuestoAlquiler.mes.label("mes"),
+        func.sum(ImpuestoAlquiler.iva_efectivo).label("iva"),
+        func.sum(ImpuestoAlquiler.it_efectivo).label("it"),
+        func.sum(ImpuestoAlquiler.rc_iva_efectivo).label("rc_iva"),
+        func.sum(ImpuestoAlquiler.total_efectivo).label("impuestos"),
+    ).join(Contrato, Contrato.id == ImpuestoAlquiler.contrato_id).where(
+        ImpuestoAlquiler.anio == anio,
+        ImpuestoAlquiler.deleted_at == None,
+        *de_propiedad(Contrato.propiedad_id)
+    ).group_by(
+        Contrato.propiedad_id, *([Contrato.unidad_id] if por_unidad else []), ImpuestoAlquiler.mes
+    ).cte("impuestos")
+
+    desde, hasta = rango_anio(anio)
+    mes_gasto = cast(extract("month", GastoPropiedad.fecha_gasto), Integer)
+    gastos = select(
+        GastoPropiedad.propiedad_id,
+        unidad(GastoPropiedad.unidad_id).label("unidad_id"),
+        mes_gasto.label("mes"),
+        func.sum(GastoPropiedad.monto).label("gastos"),
+    ).where(
+        GastoPropiedad.fecha_gasto >= desde,
+        GastoPropiedad.fecha_gasto < hasta,
+        GastoPropiedad.deleted_at == None,
+        *de_propiedad(GastoPropiedad.propiedad_id)
+    ).group_by(
+        GastoPropiedad.propiedad_id, *([GastoPropiedad.unidad_id] if por_unidad else []), mes_gasto
+    ).cte("gastos")
+
+    movimientos = union_all(
+        select(ingresos.c.propiedad_id, ingresos.c.unidad_id, ingresos.c.mes,
+               ingresos.c.ingresos, ingresos.c.mora,
+               cero().label("iva"), cero().label("it"), cero().label("rc_iva"), cero().label("impuestos"),
+               cero().label("gastos")),
+        select(impuestos.c.propiedad_id, impuestos.c.unidad_id, impuestos.c.mes,
+               cero(), cero(),
+               impuestos.c.iva, impuestos.c.it, impuestos.c.rc_iva, impuestos.c.impuestos,
+               cero()),
+        select(gastos.c.propiedad_id, gastos.c.unidad_id, gastos.c.mes,
+               cero(), cero(), cero(), cero(), cero(), cero(),
+               gastos.c.gastos),
+    ).cte("movimientos")
+
+    m = movimientos.c
+    suma = {nombre: func.sum(m[nombre]) for nombre in MONTOS if nombre != "neto"}
+    return select(
+        m.propiedad_id,
+        Propiedad.direccion,
+        m.unidad_id,
+        UnidadAlquiler.numero_unidad,
+        m.mes,
+        *(total.label(nombre) for nombre, total in suma.items()),
+        (suma["ingresos"] - suma["impuestos"] - suma["gastos"]).label("neto"),
+    ).join(
+        Propiedad, Propiedad.id == m.propiedad_id
+    ).outerjoin(
+        UnidadAlquiler, UnidadAlquiler.id == m.unidad_id
+    ).group_by(
+        m.propiedad_id, Propiedad.direccion, m.unidad_id, UnidadAlquiler.numero_unidad, m.mes
+    ).order_by(m.propiedad_id, func.coalesce(m.unidad_id, 0), m.mes)
+
+
+def _montos_vacios() -> Dict[str, float]:
+    return {nombre: 0.0 for nombre in MONTOS}
+
+
+def _sumar(destino: Dict[str, float], fila) -> None:
+    for nombre in MONTOS:
+        destino[nombre] += getattr(fila, nombre) or 0
+
+
+def _redondear(montos: Dict[str, float]) -> Dict[str, float]:
+    return {nombre: round(valor, 2) for nombre, valor in montos.items()}
+
+
+def estado_resultados(
+    db: Session,
+    anio: int,
+    propiedad_id: Optional[int] = None,
+    por_unidad: bool = True,
+) -> List[Dict]:
+    """
+    Estado de resultados por propiedad: meses (1-12), totales y, con
+    por_unidad, el mismo detalle por unidad
+    """
+    propiedades: Dict[int, Dict] = {}
+    for fila in db.execute(consulta_estado_resultados(anio, propiedad_id, por_unidad)):
+        propiedad = propiedades.get(fila.propiedad_id)
+        if propiedad is None:
+            propiedad = propiedades[fila.propiedad_id] = {
+                "propiedad_id": fila.propiedad_id,
+                "direccion": fila.direccion,
+                "meses": {mes: _montos_vacios() for mes in range(1, 13)},
+                "totales": _montos_vacios(),
+                "unidades": {},
+            }
+        _sumar(propiedad["meses"][fila.mes], fila)
+        _sumar(propiedad["totales"], fila)
+
+        if por_unidad:
+            unidad = propiedad["unidades"].get(fila.unidad_id)
+            if unidad is None:
+                unidad = propiedad["unidades"][fila.unidad_id] = {
+                    "unidad_id": fila.unidad_id,
+                    "numero_unidad": fila.numero_unidad,
+                    "meses": {},
+                    "totales": _montos_vacios(),
+                }
+            unidad["meses"][fila.mes] = _redondear({nombre: getattr(fila, nombre) or 0 for nombre in MONTOS})
+            _sumar(unidad["totales"], fila)
+
+    resultado = []
+    for propiedad in propiedades.values():
+        propiedad["meses"] = {mes: _redondear(montos) for mes, montos in propiedad["meses"].items()}
+        propiedad["totales"] = _redondear(propiedad["totales"])
+        unidades = list(propiedad.pop("unidades").values())
+        if por_unidad:
+            for unidad in unidades:
+                unidad["totales"] = _redondear(unidad["totales"])
+            propiedad["unidades"] = unidades
+        resultado.append(propiedad)
+    return resultado
+
+
+def _valor(valor) -> str:
+    if valor is None:
+        return ""
+    if isinstance(valor, float):
+        return f"{valor:.2f}"
+    return str(valor)
+
+
+def exportar_estado_resultados(
+    db: Session,
+    anio: int,
+    por_unidad: bool = True,
+    lote: int = LOTE_EXPORTACION,
+) -> Iterator[str]:
+    """
+    CSV del portafolio, una línea por (propiedad, unidad, mes), en bloques de
+    hasta `lote` líneas. La sesión debe seguir abierta hasta terminar.
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator="\n")
+    escritor.writerow(COLUMNAS_EXPORTACION)
+    yield buffer.getvalue()
+
+    resultado = db.execute(
+        consulta_estado_resultados(anio, por_unidad=por_unidad).execution_options(yield_per=lote)
+    )
+    for filas in resultado.partitions():
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerows(
+            [anio] + [_valor(v) for v in fila]
+            for fila in filas
+        )
+        yield buffer.getvalue()
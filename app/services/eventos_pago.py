@@ -0,0 +1,240 @@
+"""
+Registro de pagos y eventos posteriores (outbox)
+================================================
+registrar_pago() deja la petición en lo mínimo:
+
+  1. un UPDATE ... RETURNING del pago que guarda monto, fecha y forma de
+     pago y calcula en el mismo SQL estado, días de atraso y mora (mismas
+     reglas que MoraCalculator);
+  2. en la misma transacción, un EventoPago por cada tarea posterior
+     (distribución a copropietarios, registro del impuesto).
+
+El worker (python -m app.cli.worker) llama a procesar_eventos(), que toma
+lotes de eventos con FOR UPDATE SKIP LOCKED y los resuelve agrupados: una
+sola pasada de PaymentDistributor.distribuir_pagos() y un cerrar_periodo()
+por mes para todos los pagos del lote. Ambos omiten lo ya hecho, así que un
+evento reprocesado no duplica nada; un pago PARCIAL completado después
+reparte solo la diferencia con lo ya distribuido. Un lote con error se
+reintenta con espera creciente hasta EVENTOS_PAGO_MAX_INTENTOS.
+"""
+import traceback
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import Date, Float, Numeric, case, cast, func, literal, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.funciones import dias_entre
+from app.models.contrato import Contrato
+from app.models.evento_pago import EstadoEventoPago, EventoPago, TipoEventoPago
+from app.models.pago import EstadoPago, FormaPago, Pago
+from app.services import base_trimestral, eventos_tablero
+from app.services.cierre_impuestos import cerrar_periodo
+from app.services.mora_calculator import MoraCalculator
+from app.services.payment_distributor import PaymentDistributor
+from app.services.tax_calculator import get_trimestre
+
+
+# ── REGISTRO DEL PAGO ────────────────────────────────────────────────────────
+
+def registrar_pago(
+    db: Session,
+    pago_id: int,
+    monto_pagado: float,
+    fecha_pago: date,
+    forma_pago: FormaPago,
+    numero_comprobante: Optional[str] = None,
+    nota: Optional[str] = None,
+    fecha_calculo: Optional[date] = None,
+) -> Optional[Dict]:
+    """
+    Guarda el pago con un solo UPDATE y encola sus tareas posteriores.
+    Devuelve None si el pago no existe.
+    """
+    fecha_calculo = fecha_calculo or datetime.now().date()
+    hoy = literal(fecha_calculo, Date)
+    monto = literal(monto_pagado, Float)
+    tasa = select(Contrato.tasa_mora_diaria).where(
+        Contrato.id == Pago.contrato_id
+    ).scalar_subquery()
+    tipo_estado = Pago.__table__.c.estado.type
+
+    # Mismas reglas que MoraCalculator.calcular_mora / actualizar_mora_pago:
+    # un pago completo conserva su mora y queda sin atraso
+    completo = monto >= Pago.monto_esperado
+    vencido = Pago.fecha_vencimiento < hoy
+    dias = case((vencido, dias_entre(hoy, Pago.fecha_vencimiento)), else_=0)
+
+    # Valores previos solo si hay tableros en vivo que esperan el delta
+    antes = None
+    if eventos_tablero.hay_suscriptores():
+        antes = db.execute(select(Pago.estado, Pago.monto_pagado, Pago.mora_calculada).where(
+            Pago.id == pago_id
+        )).first()
+
+    fila = db.execute(
+        update(Pago).where(Pago.id == pago_id).values(
+            monto_pagado=monto_pagado,
+            fecha_pago=fecha_pago,
+            forma_pago=forma_pago,
+            numero_comprobante=numero_comprobante,
+            nota=nota,
+            estado=case(
+                (completo, literal(EstadoPago.PAGADO, tipo_estado)),
+                (vencido, literal(EstadoPago.VENCIDO, tipo_estado)),
+                (monto > 0, literal(EstadoPago.PARCIAL, tipo_estado)),
+                else_=Pago.estado
+            ),
+            dias_atraso=case((completo, 0), else_=dias),
+            mora_calculada=case(
+                (completo, Pago.mora_calculada),
+                else_=cast(func.round(cast((Pago.monto_esperado - monto) * tasa / 100 * dias, Numeric), 2), Float)
+            ),
+        ).returning(
+            Pago.id, Pago.contrato_id, Pago.periodo, Pago.anio, Pago.mes, Pago.estado,
+            Pago.monto_esperado, Pago.monto_pagado, Pago.mora_calculada, Pago.dias_atraso,
+            Pago.fecha_vencimiento, tasa.label("tasa_mora_diaria")
+        ).execution_options(synchronize_session=False)
+    ).first()
+    if fila is None:
+        db.rollback()
+        return None
+
+    tipos = [TipoEventoPago.DISTRIBUCION]
+    if fila.estado == EstadoPago.PAGADO:
+        tipos.append(TipoEventoPago.IMPUESTO)
+    ahora = datetime.utcnow()
+    db.add_all([
+        EventoPago(pago_id=fila.id, tipo=tipo.value, created_at=ahora, disponible_desde=ahora)
+        for tipo in tipos
+    ])
+    db.commit()
+    # El UPDATE no pasa por los eventos ORM de Pago: invalidar a mano
+    base_trimestral.invalidar([(fila.contrato_id, fila.anio, get_trimestre(fila.mes))])
+    if antes is not None:
+        cambios = eventos_tablero.Cambios()
+        cambios.agregar(fila.anio, fila.mes, tuple(antes), (fila.estado, fila.monto_pagado, fila.mora_calculada))
+        cambios.publicar("pago_registrado", pago_id=fila.id, contrato_id=fila.contrato_id)
+
+    return {
+        "pago": {
+            "id": fila.id,
+            "periodo": fila.periodo,
+            "monto_pagado": fila.monto_pagado,
+            "estado": fila.estado.value
+        },
+        # La fila ya actualizada trae los campos del pago y la tasa del contrato
+        "mora": MoraCalculator.calcular_mora(fila, fila, fecha_calculo),
+        "tareas_pendientes": [tipo.value for tipo in tipos],
+    }
+
+
+# ── PROCESAMIENTO DE EVENTOS ─────────────────────────────────────────────────
+
+def tomar_eventos(db: Session, lote: int) -> List:
+    """Marca en proceso hasta `lote` eventos disponibles y los devuelve"""
+    ahora = datetime.utcnow()
+    ids = db.execute(
+        select(EventoPago.id).where(
+            EventoPago.estado == EstadoEventoPago.PENDIENTE.value,
+            EventoPago.disponible_desde <= ahora
+        ).order_by(EventoPago.id).limit(lote).with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not ids:
+        db.rollback()
+        return []
+
+    # La condición sobre el estado cubre las bases sin FOR UPDATE (SQLite)
+    eventos = db.execute(
+        update(EventoPago).where(
+            EventoPago.id.in_(ids),
+            EventoPago.estado == EstadoEventoPago.PENDIENTE.value
+        ).values(
+            estado=EstadoEventoPago.EN_PROCESO.value,
+            tomado_en=ahora,
+            intentos=EventoPago.intentos + 1
+        ).returning(EventoPago.id, EventoPago.pago_id, EventoPago.tipo, EventoPago.intentos)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+    return eventos
+
+
+def _distribuir(db: Session, eventos: List) -> Dict[int, str]:
+    resultado = PaymentDistributor.distribuir_pagos(db, [e.pago_id for e in eventos])
+    return {e.id: resultado["errores"][e.pago_id] for e in eventos if e.pago_id in resultado["errores"]}
+
+
+def _registrar_impuestos(db: Session, eventos: List) -> Dict[int, str]:
+    periodos = defaultdict(list)
+    for pago_id, anio, mes in db.execute(select(Pago.id, Pago.anio, Pago.mes).where(
+        Pago.id.in_([e.pago_id for e in eventos])
+    )):
+        periodos[(anio, mes)].append(pago_id)
+    for (anio, mes), pago_ids in sorted(periodos.items()):
+        cerrar_periodo(db, anio, mes, pago_ids=pago_ids)
+    return {}
+
+
+PROCESADORES: Dict[str, Callable[[Session, List], Dict[int, str]]] = {
+    TipoEventoPago.DISTRIBUCION.value: _distribuir,
+    TipoEventoPago.IMPUESTO.value: _registrar_impuestos,
+}
+
+
+def procesar_eventos(fabrica_sesiones: Callable[[], Session], lote: int = None) -> Dict[str, int]:
+    """Toma un lote de eventos, los resuelve agrupados por tipo y deja su estado"""
+    lote = lote or settings.EVENTOS_PAGO_LOTE
+    db = fabrica_sesiones()
+    try:
+        eventos = tomar_eventos(db, lote)
+        por_tipo = defaultdict(list)
+        for evento in eventos:
+            por_tipo[evento.tipo].append(evento)
+
+        errores = {}
+        for tipo, grupo in por_tipo.items():
+            try:
+                errores.update(PROCESADORES[tipo](db, grupo))
+            except Exception:
+                db.rollback()
+                detalle = traceback.format_exc()[-4000:]
+                errores.update({e.id: detalle for e in grupo})
+
+        ahora = datetime.utcnow()
+        procesados = [e.id for e in eventos if e.id not in errores]
+        if procesados:
+            db.execute(update(EventoPago).where(EventoPago.id.in_(procesados)).values(
+                estado=EstadoEventoPago.PROCESADO.value, procesado_en=ahora, error=None
+            ).execution_options(synchronize_session=False))
+        if errores:
+            intentos = {e.id: e.intentos for e in eventos}
+            db.execute(update(EventoPago), [
+                {
+                    "id": evento_id,
+                    "error": error,
+                    **({"estado": EstadoEventoPago.FALLIDO.value, "procesado_en": ahora}
+                       if intentos[evento_id] >= settings.EVENTOS_PAGO_MAX_INTENTOS else
+                       {"estado": EstadoEventoPago.PENDIENTE.value,
+                        "disponible_desde": ahora + timedelta(
+                            seconds=settings.TRABAJOS_REINTENTO_BASE * 2 ** (intentos[evento_id] - 1))}),
+                }
+                for evento_id, error in errores.items()
+            ])
+        db.commit()
+    finally:
+        db.close()
+    return {"tomados": len(eventos), "procesados": len(procesados), "con_error": len(errores)}
+
+
+def recuperar_eventos_abandonados(db: Session) -> int:
+    """Vuelve a pendiente los eventos en proceso de un worker que se cayó"""
+    limite = datetime.utcnow() - timedelta(seconds=settings.EVENTOS_PAGO_TIMEOUT)
+    recuperados = db.execute(update(EventoPago).where(
+        EventoPago.estado == EstadoEventoPago.EN_PROCESO.value,
+        EventoPago.tomado_en < limite
+    ).values(estado=EstadoEventoPago.PENDIENTE.value).execution_options(synchronize_session=False)).rowcount
+    db.commit()
+    return recuperados
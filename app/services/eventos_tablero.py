@@ -0,0 +1,186 @@
+"""
+Bus de eventos del tablero (dashboard en vivo)
+==============================================
+Los servicios publican aquí, después del commit, cuánto cambió cada
+indicador de GET /reportes/dashboard en vez de obligar a los tableros a
+recalcular los agregados:
+
+  pago_creado          → un pago pendiente más
+  pago_registrado      → registrar_pago (estado, monto y mora)
+  mora_recalculada     → MoraCalculator (un pago, un contrato o el portafolio)
+  distribucion_pagada  → PaymentDistributor.marcar_distribucion_pagada
+  lote_pagado          → lote_pago.confirmar_lote (muchas distribuciones)
+
+Cada evento de pagos lleva `cambios`: una lista de deltas por (anio, mes)
+de ingresos (PAGADO/PARCIAL), mora (VENCIDO/PARCIAL) y pagos pendientes
+(PENDIENTE/VENCIDO), con las mismas reglas que el dashboard.
+
+El bus es del proceso: GET /reportes/dashboard/stream se suscribe con una
+cola asyncio y publicar() (llamado desde los hilos de los endpoints) entrega
+con call_soon_threadsafe, así N tableros abiertos cuestan un reparto en
+memoria por evento. Sin suscriptores publicar() no hace nada. Un cliente
+lento que llena su cola, o que se reconecta con un Last-Event-ID que ya no
+está en el historial, vuelve a recibir el resumen completo.
+"""
+import asyncio
+import threading
+import uuid
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import orjson
+
+from app.core.config import settings
+from app.models.pago import EstadoPago
+
+RESINCRONIZAR = "resincronizar"
+
+_ESTADOS_INGRESO = (EstadoPago.PAGADO, EstadoPago.PARCIAL)
+_ESTADOS_MORA = (EstadoPago.VENCIDO, EstadoPago.PARCIAL)
+_ESTADOS_PENDIENTE = (EstadoPago.PENDIENTE, EstadoPago.VENCIDO)
+
+
+class Evento(NamedTuple):
+    id: int
+    tipo: str
+    datos: dict
+
+
+class Suscripcion:
+    """Cola de un cliente SSE, ligada al event loop que la consume"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.cola: asyncio.Queue = asyncio.Queue(maxsize=settings.TABLERO_COLA)
+        self.desbordada = False
+        self.necesita_resumen = True
+
+    def entregar(self, evento: Evento):
+        # Corre en el event loop del suscriptor
+        if self.desbordada:
+            return
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            self.desbordada = True
+
+    async def siguiente(self, espera: float) -> Optional[Evento]:
+        """Próximo evento, o None si pasan `espera` segundos sin novedades"""
+        if self.desbordada:
+            while not self.cola.empty():
+                self.cola.get_nowait()
+            self.desbordada = False
+            return Evento(0, RESINCRONIZAR, {})
+        try:
+            return await asyncio.wait_for(self.cola.get(), espera)
+        except asyncio.TimeoutError:
+            return None
+
+
+_suscripciones: Set[Suscripcion] = set()
+_recientes: Deque[Evento] = deque(maxlen=settings.TABLERO_HISTORIAL)
+_ultimo_id = 0
+_lock = threading.Lock()
+_EPOCA = uuid.uuid4().hex[:8]
+
+
+def hay_suscriptores() -> bool:
+    return bool(_suscripciones)
+
+
+def publicar(tipo: str, datos: dict) -> Optional[Evento]:
+    """Reparte el evento a los tableros suscritos (seguro desde cualquier hilo)"""
+    global _ultimo_id
+    if not _suscripciones:
+        return None
+    with _lock:
+        _ultimo_id += 1
+        evento = Evento(_ultimo_id, tipo, datos)
+        _recientes.append(evento)
+        destinos = list(_suscripciones)
+    for suscripcion in destinos:
+        try:
+            suscripcion.loop.call_soon_threadsafe(suscripcion.entregar, evento)
+        except RuntimeError:  # loop ya cerrado
+            desuscribir(suscripcion)
+    return evento
+
+
+def ultimo_id() -> int:
+    return _ultimo_id
+
+
+def suscribir(last_event_id: Optional[str] = None) -> Suscripcion:
+    """
+    Registra un suscriptor en el event loop actual. Si `last_event_id` (la
+    reconexión automática de EventSource) sigue en el historial, reencola lo
+    publicado después; si no, la suscripción queda con `necesita_resumen`.
+    """
+    suscripcion = Suscripcion(asyncio.get_running_loop())
+    ultimo_visto = _leer_id(last_event_id)
+    with _lock:
+        _suscripciones.add(suscripcion)
+        recuperable = ultimo_visto is not None and ultimo_visto <= _ultimo_id and (
+            ultimo_visto == _ultimo_id or (_recientes and _recientes[0].id <= ultimo_visto + 1)
+        )
+        if recuperable:
+            for evento in _recientes:
+                if evento.id > ultimo_visto:
+                    suscripcion.entregar(evento)
+        suscripcion.necesita_resumen = not recuperable
+    return suscripcion
+
+
+def desuscribir(suscripcion: Suscripcion):
+    with _lock:
+        _suscripciones.discard(suscripcion)
+
+
+def formato_sse(evento: Evento) -> bytes:
+    """Evento en formato text/event-stream (id = época del proceso + número)"""
+    return (f"id: {_EPOCA}.{evento.id}\nevent: {evento.tipo}\ndata: ".encode()
+            + orjson.dumps(evento.datos, option=orjson.OPT_NON_STR_KEYS) + b"\n\n")
+
+
+def _leer_id(last_event_id: Optional[str]) -> Optional[int]:
+    # Los ids de otro proceso (o de antes de un reinicio) no sirven para reanudar
+    epoca, _, numero = (last_event_id or "").partition(".")
+    if epoca != _EPOCA or not numero.isdigit():
+        return None
+    return int(numero)
+
+
+# ── DELTAS DEL DASHBOARD ─────────────────────────────────────────────────────
+
+def aporte(estado: Optional[EstadoPago], monto_pagado: float, mora_calculada: float) -> Tuple[float, float, int]:
+    """(ingresos, mora, pendientes) con que un pago entra en el dashboard"""
+    return (
+        (monto_pagado or 0) if estado in _ESTADOS_INGRESO else 0,
+        (mora_calculada or 0) if estado in _ESTADOS_MORA else 0,
+        1 if estado in _ESTADOS_PENDIENTE else 0,
+    )
+
+
+class Cambios:
+    """Acumula deltas por (anio, mes) para publicarlos en un solo evento"""
+
+    def __init__(self):
+        self._por_periodo: Dict[Tuple[int, int], List[float]] = defaultdict(lambda: [0.0, 0.0, 0])
+
+    def agregar(self, anio: int, mes: int, antes: tuple, despues: tuple):
+        """`antes` y `despues` son (estado, monto_pagado, mora_calculada)"""
+        viejo, nuevo = aporte(*antes), aporte(*despues)
+        if viejo != nuevo:
+            acumulado = self._por_periodo[(anio, mes)]
+            for i in range(3):
+                acumulado[i] += nuevo[i] - viejo[i]
+
+    def publicar(self, tipo: str, **datos) -> Optional[Evento]:
+        cambios = [
+            {"anio": anio, "mes": mes, "ingresos": round(ingresos, 2), "mora": round(mora, 2), "pendientes": pendientes}
+            for (anio, mes), (ingresos, mora, pendientes) in sorted(self._por_periodo.items())
+            if round(ingresos, 2) or round(mora, 2) or pendientes
+        ]
+        if not cambios:
+            return None
+        return publicar(tipo, {**datos, "cambios": cambios})
@@ -0,0 +1,138 @@
+"""
+Exportación de la declaración al SIN
+====================================
+Genera, para un rango de periodos, una línea por ImpuestoAlquiler con los
+datos que se cargan en la declaración de IVA, IT y RC-IVA de cada contrato:
+
+  csv → con encabezado, separado por comas (planillas, revisión)
+  txt → sin encabezado, separado por "|" (formato de importación masiva)
+
+Las filas se leen con un cursor del lado del servidor (yield_per: cursor con
+nombre en PostgreSQL) y se emiten en bloques de LOTE_EXPORTACION líneas, así
+la memoria no crece con el tamaño del portafolio. El orden (periodo,
+contrato) coincide con el índice ix_impuestos_alquiler_periodo_contrato.
+"""
+import csv
+import io
+from typing import Callable, Iterator, Optional, TextIO
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.contrato import Contrato
+from app.models.impuesto import ImpuestoAlquiler
+from app.models.inquilino import Inquilino
+from app.models.propiedad import Propiedad
+
+FORMATOS = ("csv", "txt")
+
+# Filas por bloque leído del cursor y escrito a la salida
+LOTE_EXPORTACION = 2000
+
+# (encabezado, columna) en el orden del archivo
+COLUMNAS_DECLARACION = (
+    ("periodo",                   ImpuestoAlquiler.periodo),
+    ("numero_contrato",           Contrato.numero_contrato),
+    ("ci_inquilino",              Inquilino.ci),
+    ("inquilino",                 Inquilino.nombre_completo),
+    ("direccion_inmueble",        Propiedad.direccion),
+    ("monto_alquiler",            ImpuestoAlquiler.monto_alquiler),
+    ("iva_determinado",           ImpuestoAlquiler.iva_determinado),
+    ("iva_facturas_aplicadas",    ImpuestoAlquiler.iva_facturas_aplicadas),
+    ("iva_efectivo",              ImpuestoAlquiler.iva_efectivo),
+    ("it_determinado",            ImpuestoAlquiler.it_determinado),
+    ("it_efectivo",               ImpuestoAlquiler.it_efectivo),
+    ("rc_iva_base_trimestral",    ImpuestoAlquiler.rc_iva_base_trimestral),
+    ("rc_iva_determinado",        ImpuestoAlquiler.rc_iva_determinado),
+    ("rc_iva_facturas_aplicadas", ImpuestoAlquiler.rc_iva_facturas_aplicadas),
+    ("rc_iva_efectivo",           ImpuestoAlquiler.rc_iva_efectivo),
+    ("total_efectivo",            ImpuestoAlquiler.total_efectivo),
+    ("fecha_declaracion",         ImpuestoAlquiler.fecha_declaracion),
+)
+
+
+def consulta_declaracion(desde: str, hasta: str):
+    """Impuestos vigentes de los periodos desde..hasta (YYYY-MM, inclusive)"""
+    return select(*(columna for _, columna in COLUMNAS_DECLARACION)).join(
+        Contrato, Contrato.id == ImpuestoAlquiler.contrato_id
+    ).join(
+        Inquilino, Inquilino.id == Contrato.inquilino_id
+    ).join(
+        Propiedad, Propiedad.id == Contrato.propiedad_id
+    ).where(
+        ImpuestoAlquiler.periodo.between(desde, hasta),
+        ImpuestoAlquiler.deleted_at == None
+    ).order_by(ImpuestoAlquiler.periodo, ImpuestoAlquiler.contrato_id, ImpuestoAlquiler.id)
+
+
+def _valor(valor) -> str:
+    if valor is None:
+        return ""
+    if isinstance(valor, float):
+        return f"{valor:.2f}"
+    return str(valor)
+
+
+def _linea_txt(fila) -> str:
+    # Un "|" dentro de un nombre o dirección rompería el registro
+    return "|".join(_valor(v).replace("|", "/") for v in fila) + "\r\n"
+
+
+def _bloques(db: Session, desde: str, hasta: str, formato: str, lote: int) -> Iterator[tuple]:
+    """(texto, cantidad_de_registros) por cada bloque leído del cursor"""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato}")
+
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator="\n")
+    if formato == "csv":
+        escritor.writerow([nombre for nombre, _ in COLUMNAS_DECLARACION])
+        yield buffer.getvalue(), 0
+
+    resultado = db.execute(consulta_declaracion(desde, hasta).execution_options(yield_per=lote))
+    for filas in resultado.partitions():
+        if formato == "txt":
+            yield "".join(_linea_txt(fila) for fila in filas), len(filas)
+            continue
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerows([_valor(v) for v in fila] for fila in filas)
+        yield buffer.getvalue(), len(filas)
+
+
+def exportar_declaracion(
+    db: Session,
+    desde: str,
+    hasta: str,
+    formato: str = "csv",
+    lote: int = LOTE_EXPORTACION,
+) -> Iterator[str]:
+    """
+    Genera el archivo de declaración en bloques de texto de hasta `lote`
+    líneas. Consume el cursor a medida que se itera: la sesión debe seguir
+    abierta hasta terminar.
+    """
+    for texto, _ in _bloques(db, desde, hasta, formato, lote):
+        yield texto
+
+
+def escribir_declaracion(
+    db: Session,
+    desde: str,
+    hasta: str,
+    formato: str,
+    destino: TextIO,
+    lote: int = LOTE_EXPORTACION,
+    al_avanzar: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Escribe la declaración en un archivo abierto; devuelve la cantidad de
+    registros. al_avanzar(registros_escritos) se llama después de cada bloque.
+    """
+    registros = 0
+    for texto, cantidad in _bloques(db, desde, hasta, formato, lote):
+        destino.write(texto)
+        registros += cantidad
+        if al_avanzar is not None and cantidad:
+            al_avanzar(registros)
+    return registros
@@ -0,0 +1,590 @@
+"""
+Importación del historial de planillas (migración de clientes)
+==============================================================
+Los clientes llegan con años de historial en planillas: inquilinos,
+contratos, pagos mensuales y distribuciones a copropietarios. Cargarlo por
+el ORM lleva horas; aquí cada archivo (CSV o XLSX) se procesa así:
+
+  1. se leen las filas en streaming, se mapean las columnas de la planilla a
+     los campos (mapeo {campo: encabezado}) y se convierten los tipos; las
+     filas ilegibles se rechazan con su número de línea;
+  2. se cargan en una tabla temporal en bloques: COPY ... FROM STDIN en
+     PostgreSQL, executemany en otros motores;
+  3. las llaves foráneas se resuelven por clave natural con UPDATE ... FROM
+     (CI del inquilino, número de contrato, contrato + periodo, CI del
+     copropietario) y cada fila que no puede entrar queda marcada con su
+     motivo: sin referencia, ya existente en la base o repetida en el archivo;
+  4. un INSERT ... SELECT por tabla pasa las filas sin motivo a las tablas
+     definitivas.
+
+Todo ocurre en una sola transacción y en orden (inquilinos → contratos →
+pagos → distribuciones), así los contratos encuentran a los inquilinos del
+mismo archivo. Reimportar los mismos archivos no duplica nada: las filas ya
+cargadas quedan como "existente".
+
+Las distribuciones históricas entran PAGADO salvo que la planilla diga otra
+cosa, para no sumarse al lote de pago a copropietarios.
+"""
+import csv
+import io
+from datetime import date, datetime
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import (
+    Column, Date, Enum, Float, Integer, MetaData, String, Table, Text, cast, exists, func,
+    insert, literal, select, update,
+)
+
+from app.models.contrato import Contrato
+from app.models.copropietario import Copropietario
+from app.models.distribucion_pago import DistribucionPago, EstadoDistribucion
+from app.models.inquilino import Inquilino
+from app.models.pago import EstadoPago, FormaPago, Pago
+from app.models.propiedad import Propiedad
+from app.models.unidad_gasto import UnidadAlquiler
+
+try:
+    import openpyxl
+except ImportError:  # dependencia opcional, solo para archivos .xlsx
+    openpyxl = None
+
+# Orden de importación (respeta las llaves foráneas)
+ENTIDADES = ("inquilinos", "contratos", "pagos", "distribuciones")
+
+DELIMITADORES = (",", ";", "\t", "|")
+
+# Filas por bloque de COPY / executemany hacia la tabla temporal
+LOTE_IMPORTACION = 50_000
+
+
+class Campo(NamedTuple):
+    nombre: str
+    tipo: str  # texto, entero, numero, fecha, periodo
+    requerido: bool = False
+
+
+CAMPOS: Dict[str, Tuple[Campo, ...]] = {
+    "inquilinos": (
+        Campo("ci", "texto", True),
+        Campo("nombre_completo", "texto", True),
+        Campo("telefono", "texto"),
+        Campo("telefono_alternativo", "texto"),
+        Campo("email", "texto"),
+        Campo("direccion_actual", "texto"),
+        Campo("ciudad_origen", "texto"),
+        Campo("ocupacion", "texto"),
+        Campo("lugar_trabajo", "texto"),
+        Campo("telefono_trabajo", "texto"),
+        Campo("estado", "texto"),
+        Campo("referencia_nombre", "texto"),
+        Campo("referencia_telefono", "texto"),
+    ),
+    "contratos": (
+        Campo("numero_contrato", "texto", True),
+        Campo("inquilino_ci", "texto", True),
+        Campo("propiedad_id", "entero", True),
+        Campo("unidad_id", "entero"),
+        Campo("fecha_inicio", "fecha", True),
+        Campo("fecha_fin", "fecha", True),
+        Campo("canon_mensual", "numero", True),
+        Campo("garantia", "numero"),
+        Campo("dia_pago", "entero"),
+        Campo("incremento_anual", "numero"),
+        Campo("tasa_mora_diaria", "numero"),
+        Campo("estado", "texto"),
+        Campo("observaciones", "texto"),
+    ),
+    "pagos": (
+        Campo("numero_contrato", "texto", True),
+        Campo("periodo", "periodo", True),
+        Campo("fecha_vencimiento", "fecha", True),
+        Campo("monto_esperado", "numero", True),
+        Campo("fecha_pago", "fecha"),
+        Campo("monto_pagado", "numero"),
+        Campo("mora_calculada", "numero"),
+        Campo("dias_atraso", "entero"),
+        Campo("forma_pago", "texto"),
+        Campo("numero_comprobante", "texto"),
+        Campo("nota", "texto"),
+        Campo("estado", "texto"),
+    ),
+    "distribuciones": (
+        Campo("numero_contrato", "texto", True),
+        Campo("periodo", "periodo", True),
+        Campo("copropietario_ci", "texto", True),
+        Campo("monto_asignado", "numero", True),
+        Campo("porcentaje_aplicado", "numero"),
+        Campo("fecha_distribucion", "fecha"),
+        Campo("fecha_pago_efectivo", "fecha"),
+        Campo("estado", "texto"),
+        Campo("numero_transferencia", "texto"),
+        Campo("nota", "texto"),
+    ),
+}
+
+# Columnas de la tabla temporal que se completan en la base, no en la planilla
+RESUELTAS = {
+    "inquilinos": (),
+    "contratos": ("inquilino_id",),
+    "pagos": ("anio", "mes", "contrato_id"),
+    "distribuciones": ("anio", "mes", "contrato_id", "propiedad_id", "pago_id", "copropietario_id"),
+}
+
+# Tablas donde se buscan las claves naturales y se inserta
+TABLAS_DESTINO = [
+    modelo.__table__ for modelo in (Inquilino, Contrato, Pago, Copropietario, DistribucionPago)
+]
+
+TIPOS_SQL = {"texto": Text, "entero": Integer, "numero": Float, "fecha": Date, "periodo": String(7)}
+
+
+# ── LECTURA DE ARCHIVOS ──────────────────────────────────────────────────────
+
+def leer_archivo(ruta: str, delimitador: Optional[str] = None, hoja: Optional[str] = None) -> Iterator[Tuple[int, Dict]]:
+    """
+    (línea, {encabezado: valor}) de un CSV o de una hoja XLSX, en streaming.
+    Sin delimitador se deduce del encabezado (Excel en español exporta con ";").
+    """
+    if ruta.lower().endswith(".xlsx"):
+        yield from _leer_xlsx(ruta, hoja)
+        return
+    with open(ruta, encoding="utf-8-sig", newline="") as archivo:
+        if delimitador is None:
+            encabezado = archivo.readline()
+            archivo.seek(0)
+            delimitador = max(DELIMITADORES, key=encabezado.count)
+        lector = csv.reader(archivo, delimiter=delimitador)
+        encabezados = [e.strip().lower() for e in next(lector, [])]
+        for linea, valores in enumerate(lector, start=2):
+            if any(valores):
+                yield linea, _por_encabezado(encabezados, valores)
+
+
+def _leer_xlsx(ruta: str, hoja: Optional[str]) -> Iterator[Tuple[int, Dict]]:
+    if openpyxl is None:
+        raise ValueError("Para importar archivos .xlsx instale openpyxl (pip install openpyxl)")
+    libro = openpyxl.load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = (libro[hoja] if hoja else libro.active).iter_rows(values_only=True)
+        encabezados = [str(e or "").strip().lower() for e in next(filas, ())]
+        for linea, valores in enumerate(filas, start=2):
+            if any(v not in (None, "") for v in valores):
+                yield linea, _por_encabezado(encabezados, valores)
+    finally:
+        libro.close()
+
+
+def _por_encabezado(encabezados: List[str], valores) -> Dict:
+    # Las filas pueden venir más cortas que el encabezado (celdas vacías al final)
+    return {e: valores[k] if k < len(valores) else None for k, e in enumerate(encabezados)}
+
+
+def _texto(valor) -> Optional[str]:
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)  # Excel guarda los CI y números de contrato como 4455667.0
+    valor = str(valor).strip()
+    return valor or None
+
+
+def _numero(valor) -> float:
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    valor = valor.strip().replace(" ", "")
+    if "," in valor and "." not in valor:
+        valor = valor.replace(",", ".")  # 1500,50
+    return float(valor)
+
+
+def _fecha(valor) -> date:
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    valor = valor.strip()
+    try:
+        return date.fromisoformat(valor)  # el caso común, sin strptime
+    except ValueError:
+        pass
+    for formato in ("%d/%m/%Y", "%d-%m-%Y"):
+        try:
+            return datetime.strptime(valor, formato).date()
+        except ValueError:
+            pass
+    raise ValueError(f"fecha inválida '{valor}'")
+
+
+def _periodo(valor) -> str:
+    if isinstance(valor, (date, datetime)):
+        return f"{valor.year}-{valor.month:02d}"
+    valor = valor.strip()
+    if len(valor) == 7 and valor[4] == "-" and valor[:4].isdigit() and valor[5:] in MESES:
+        return valor
+    for formato in ("%m/%Y", "%Y/%m"):
+        try:
+            return datetime.strptime(valor, formato).strftime("%Y-%m")
+        except ValueError:
+            pass
+    raise ValueError(f"periodo inválido '{valor}'")
+
+
+MESES = {f"{mes:02d}" for mes in range(1, 13)}
+
+
+CONVERSORES: Dict[str, Callable] = {
+    "texto": _texto,
+    "entero": lambda v: int(_numero(v)),
+    "numero": _numero,
+    "fecha": _fecha,
+    "periodo": _periodo,
+}
+
+
+def _estado(valor: Optional[str], enum) -> Optional[str]:
+    """'pagado' / 'PAGADO' → nombre del enum (lo que guarda la columna)"""
+    if valor is None:
+        return None
+    for miembro in enum:
+        if valor.lower() in (miembro.value, miembro.name.lower()):
+            return miembro.name
+    raise ValueError(f"estado inválido '{valor}'")
+
+
+def _completar_inquilino(fila: Dict, hoy: date) -> None:
+    fila["estado"] = fila["estado"] or "activo"
+
+
+def _completar_contrato(fila: Dict, hoy: date) -> None:
+    if fila["fecha_fin"] < fila["fecha_inicio"]:
+        raise ValueError("fecha_fin anterior a fecha_inicio")
+    for campo, defecto in (("garantia", 0.0), ("dia_pago", 5), ("incremento_anual", 0.0), ("tasa_mora_diaria", 0.5)):
+        if fila[campo] is None:
+            fila[campo] = defecto
+    fila["estado"] = fila["estado"] or ("activo" if fila["fecha_fin"] >= hoy else "finalizado")
+
+
+def _completar_pago(fila: Dict, hoy: date) -> None:
+    fila["anio"], fila["mes"] = (int(parte) for parte in fila["periodo"].split("-"))
+    fila["monto_pagado"] = fila["monto_pagado"] or 0.0
+    fila["mora_calculada"] = fila["mora_calculada"] or 0.0
+    if fila["dias_atraso"] is None:
+        fila["dias_atraso"] = max(0, (fila["fecha_pago"] - fila["fecha_vencimiento"]).days) if fila["fecha_pago"] else 0
+    fila["forma_pago"] = _estado(fila["forma_pago"], FormaPago)
+    fila["estado"] = _estado(fila["estado"], EstadoPago)
+    if fila["estado"] is None:
+        # Mismo criterio que el registro de pagos
+        if fila["monto_pagado"] >= fila["monto_esperado"]:
+            fila["estado"] = EstadoPago.PAGADO.name
+        elif fila["monto_pagado"] > 0:
+            fila["estado"] = EstadoPago.PARCIAL.name
+        elif fila["fecha_vencimiento"] < hoy:
+            fila["estado"] = EstadoPago.VENCIDO.name
+        else:
+            fila["estado"] = EstadoPago.PENDIENTE.name
+
+
+def _completar_distribucion(fila: Dict, hoy: date) -> None:
+    fila["anio"], fila["mes"] = (int(parte) for parte in fila["periodo"].split("-"))
+    fila["estado"] = _estado(fila["estado"], EstadoDistribucion) or EstadoDistribucion.PAGADO.name
+
+
+COMPLETAR = {
+    "inquilinos": _completar_inquilino,
+    "contratos": _completar_contrato,
+    "pagos": _completar_pago,
+    "distribuciones": _completar_distribucion,
+}
+
+
+def convertir_filas(
+    entidad: str,
+    filas: Iterator[Tuple[int, Dict]],
+    mapeo: Optional[Dict[str, str]] = None,
+    hoy: Optional[date] = None,
+    rechazar: Optional[Callable[[int, str], None]] = None,
+) -> Iterator[Dict]:
+    """
+    Filas listas para la tabla temporal: columnas de la planilla mapeadas a
+    los campos de `entidad` ({campo: encabezado}, por defecto el mismo
+    nombre) y tipos convertidos. Las ilegibles van a rechazar(línea, motivo).
+    """
+    campos = CAMPOS[entidad]
+    mapeo = {campo: encabezado.strip().lower() for campo, encabezado in (mapeo or {}).items()}
+    hoy = hoy or date.today()
+    encabezados = None
+
+    for linea, valores in filas:
+        if encabezados is None:
+            encabezados = {c.nombre: mapeo.get(c.nombre, c.nombre) for c in campos}
+            faltantes = [
+                encabezados[c.nombre] for c in campos if c.requerido and encabezados[c.nombre] not in valores
+            ]
+            if faltantes:
+                raise ValueError(f"{entidad}: faltan las columnas {', '.join(faltantes)}")
+
+        fila = {"linea": linea}
+        try:
+            for campo in campos:
+                valor = valores.get(encabezados[campo.nombre])
+                valor = None if valor is None or str(valor).strip() == "" else CONVERSORES[campo.tipo](valor)
+                if valor is None and campo.requerido:
+                    raise ValueError(f"{campo.nombre} vacío")
+                fila[campo.nombre] = valor
+            COMPLETAR[entidad](fila, hoy)
+        except ValueError as e:
+            if rechazar:
+                rechazar(linea, f"ilegible: {e}")
+            continue
+        yield fila
+
+
+# ── TABLA TEMPORAL ───────────────────────────────────────────────────────────
+
+def tabla_temporal(entidad: str) -> Table:
+    """Tabla temporal de la entidad: campos de la planilla, llaves resueltas y motivo"""
+    tipos_resueltas = {"anio": Integer, "mes": Integer}
+    return Table(
+        f"importacion_{entidad}", MetaData(),
+        Column("linea", Integer, primary_key=True),
+        *(Column(c.nombre, TIPOS_SQL[c.tipo]) for c in CAMPOS[entidad]),
+        *(Column(nombre, tipos_resueltas.get(nombre, Integer)) for nombre in RESUELTAS[entidad]),
+        Column("motivo", String(30)),
+        prefixes=["TEMPORARY"],
+    )
+
+
+def _columnas_carga(entidad: str) -> List[str]:
+    columnas = ["linea", *(c.nombre for c in CAMPOS[entidad])]
+    return columnas + [c for c in ("anio", "mes") if c in RESUELTAS[entidad]]
+
+
+def _copiar(conexion, tabla: Table, columnas: List[str], filas: List[Dict]) -> None:
+    """COPY ... FROM STDIN en formato CSV (PostgreSQL)"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    for fila in filas:
+        # En FORMAT csv un campo vacío sin comillas es NULL
+        escritor.writerow(["" if fila[c] is None else fila[c] for c in columnas])
+    buffer.seek(0)
+    cursor = conexion.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {tabla.name} ({', '.join(columnas)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def cargar_temporal(conexion, entidad: str, filas: Iterator[Dict], lote: int = LOTE_IMPORTACION) -> Tuple[Table, int]:
+    """Crea la tabla temporal y la llena en bloques de `lote` filas"""
+    tabla = tabla_temporal(entidad)
+    tabla.create(conexion)
+    es_postgres = conexion.dialect.name == "postgresql"
+    columnas = _columnas_carga(entidad)
+
+    cargadas, bloque = 0, []
+    for fila in filas:
+        bloque.append(fila)
+        if len(bloque) == lote:
+            cargadas += _cargar_bloque(conexion, tabla, columnas, bloque, es_postgres)
+            bloque = []
+    cargadas += _cargar_bloque(conexion, tabla, columnas, bloque, es_postgres)
+
+    if es_postgres:
+        # Las tablas temporales no las analiza autovacuum: sin estadísticas el
+        # planificador estima mal los UPDATE ... FROM
+        conexion.exec_driver_sql(f"ANALYZE {tabla.name}")
+    return tabla, cargadas
+
+
+def _cargar_bloque(conexion, tabla: Table, columnas: List[str], filas: List[Dict], es_postgres: bool) -> int:
+    if not filas:
+        return 0
+    if es_postgres:
+        _copiar(conexion, tabla, columnas, filas)
+    else:
+        conexion.execute(tabla.insert(), [{c: fila[c] for c in columnas} for fila in filas])
+    return len(filas)
+
+
+# ── RESOLUCIÓN Y FUSIÓN (SQL por conjuntos) ──────────────────────────────────
+
+def _marcar(conexion, tabla: Table, motivo: str, *condiciones) -> None:
+    """Marca con `motivo` las filas todavía válidas que cumplen las condiciones"""
+    conexion.execute(update(tabla).where(tabla.c.motivo == None, *condiciones).values(motivo=motivo))
+
+
+def _marcar_repetidas(conexion, tabla: Table, *claves) -> None:
+    """Deja solo la primera línea de cada clave; el resto queda como repetida"""
+    numeradas = select(
+        tabla.c.linea,
+        func.row_number().over(partition_by=claves, order_by=tabla.c.linea).label("orden")
+    ).where(tabla.c.motivo == None).subquery()
+    conexion.execute(update(tabla).where(
+        tabla.c.linea == numeradas.c.linea, numeradas.c.orden > 1
+    ).values(motivo="repetida"))
+
+
+def _fusionar(conexion, tabla: Table, destino, columnas: List[str]) -> int:
+    """INSERT ... SELECT de las filas sin motivo a la tabla definitiva"""
+    ahora = datetime.utcnow()
+    # Los estados son enums nativos en PostgreSQL: el texto necesita CAST
+    valores = [
+        cast(tabla.c[c], destino.__table__.c[c].type) if isinstance(destino.__table__.c[c].type, Enum)
+        else tabla.c[c]
+        for c in columnas
+    ]
+    return conexion.execute(insert(destino.__table__).from_select(
+        [*columnas, "created_at", "updated_at"],
+        select(*valores, literal(ahora), literal(ahora)).where(tabla.c.motivo == None)
+    )).rowcount
+
+
+def _resolver_inquilinos(conexion, t: Table) -> int:
+    i = Inquilino.__table__
+    # El CI es único también entre los inquilinos dados de baja
+    _marcar(conexion, t, "existente", exists().where(i.c.ci == t.c.ci))
+    _marcar_repetidas(conexion, t, t.c.ci)
+    return _fusionar(conexion, t, Inquilino, [c.nombre for c in CAMPOS["inquilinos"]])
+
+
+def _resolver_contratos(conexion, t: Table) -> int:
+    i, c, p, u = Inquilino.__table__, Contrato.__table__, Propiedad.__table__, UnidadAlquiler.__table__
+    conexion.execute(update(t).where(
+        i.c.ci == t.c.inquilino_ci, i.c.deleted_at == None
+    ).values(inquilino_id=i.c.id))
+    _marcar(conexion, t, "sin_inquilino", t.c.inquilino_id == None)
+    _marcar(conexion, t, "sin_propiedad", ~exists().where(p.c.id == t.c.propiedad_id, p.c.deleted_at == None))
+    _marcar(conexion, t, "sin_unidad", t.c.unidad_id != None, ~exists().where(
+        u.c.id == t.c.unidad_id, u.c.propiedad_id == t.c.propiedad_id, u.c.deleted_at == None
+    ))
+    _marcar(conexion, t, "existente", exists().where(c.c.numero_contrato == t.c.numero_contrato))
+    _marcar_repetidas(conexion, t, t.c.numero_contrato)
+    return _fusionar(conexion, t, Contrato, [
+        "inquilino_id", *(c.nombre for c in CAMPOS["contratos"] if c.nombre != "inquilino_ci")
+    ])
+
+
+def _resolver_pagos(conexion, t: Table) -> int:
+    c, p = Contrato.__table__, Pago.__table__
+    conexion.execute(update(t).where(
+        c.c.numero_contrato == t.c.numero_contrato, c.c.deleted_at == None
+    ).values(contrato_id=c.c.id))
+    _marcar(conexion, t, "sin_contrato", t.c.contrato_id == None)
+    _marcar(conexion, t, "existente", exists().where(
+        p.c.contrato_id == t.c.contrato_id, p.c.anio == t.c.anio, p.c.mes == t.c.mes, p.c.deleted_at == None
+    ))
+    _marcar_repetidas(conexion, t, t.c.contrato_id, t.c.anio, t.c.mes)
+    return _fusionar(conexion, t, Pago, [
+        "contrato_id", "anio", "mes", *(c.nombre for c in CAMPOS["pagos"] if c.nombre != "numero_contrato")
+    ])
+
+
+def _resolver_distribuciones(conexion, t: Table) -> int:
+    c, p = Contrato.__table__, Pago.__table__
+    cp, d = Copropietario.__table__, DistribucionPago.__table__
+    conexion.execute(update(t).where(
+        c.c.numero_contrato == t.c.numero_contrato, c.c.deleted_at == None
+    ).values(contrato_id=c.c.id, propiedad_id=c.c.propiedad_id))
+    # Sin fecha en la planilla: la del pago
+    conexion.execute(update(t).where(
+        p.c.contrato_id == t.c.contrato_id, p.c.anio == t.c.anio, p.c.mes == t.c.mes, p.c.deleted_at == None
+    ).values(pago_id=p.c.id, fecha_distribucion=func.coalesce(t.c.fecha_distribucion, p.c.fecha_pago)))
+    _marcar(conexion, t, "sin_pago", t.c.pago_id == None)
+    # Sin porcentaje en la planilla: el vigente del copropietario
+    conexion.execute(update(t).where(
+        cp.c.propiedad_id == t.c.propiedad_id, cp.c.ci == t.c.copropietario_ci, cp.c.deleted_at == None
+    ).values(
+        copropietario_id=cp.c.id,
+        porcentaje_aplicado=func.coalesce(t.c.porcentaje_aplicado, cp.c.porcentaje_participacion)
+    ))
+    _marcar(conexion, t, "sin_copropietario", t.c.copropietario_id == None)
+    _marcar(conexion, t, "sin_fecha", t.c.fecha_distribucion == None)
+    _marcar(conexion, t, "existente", exists().where(
+        d.c.pago_id == t.c.pago_id, d.c.copropietario_id == t.c.copropietario_id, d.c.deleted_at == None
+    ))
+    _marcar_repetidas(conexion, t, t.c.pago_id, t.c.copropietario_id)
+    return _fusionar(conexion, t, DistribucionPago, [
+        "pago_id", "copropietario_id", "monto_asignado", "porcentaje_aplicado", "fecha_distribucion",
+        "fecha_pago_efectivo", "estado", "numero_transferencia", "nota",
+    ])
+
+
+RESOLVER = {
+    "inquilinos": _resolver_inquilinos,
+    "contratos": _resolver_contratos,
+    "pagos": _resolver_pagos,
+    "distribuciones": _resolver_distribuciones,
+}
+
+
+# ── IMPORTACIÓN ──────────────────────────────────────────────────────────────
+
+def importar_entidad(
+    conexion,
+    entidad: str,
+    filas: Iterator[Tuple[int, Dict]],
+    mapeo: Optional[Dict[str, str]] = None,
+    lote: int = LOTE_IMPORTACION,
+    hoy: Optional[date] = None,
+    rechazar: Optional[Callable[[str, int, str], None]] = None,
+) -> Dict:
+    """
+    Carga, resuelve y fusiona una entidad dentro de la transacción de
+    `conexion`. rechazar(entidad, línea, motivo) recibe cada fila que no entró.
+    """
+    ilegibles = 0
+
+    def rechazar_ilegible(linea: int, motivo: str):
+        nonlocal ilegibles
+        ilegibles += 1
+        if rechazar:
+            rechazar(entidad, linea, motivo)
+
+    tabla, cargadas = cargar_temporal(
+        conexion, entidad, convertir_filas(entidad, filas, mapeo, hoy, rechazar_ilegible), lote
+    )
+    insertadas = RESOLVER[entidad](conexion, tabla)
+
+    omitidas = dict(conexion.execute(
+        select(tabla.c.motivo, func.count()).where(tabla.c.motivo != None).group_by(tabla.c.motivo)
+    ).all())
+    if rechazar and omitidas:
+        for linea, motivo in conexion.execute(
+            select(tabla.c.linea, tabla.c.motivo).where(tabla.c.motivo != None).order_by(tabla.c.linea)
+        ):
+            rechazar(entidad, linea, motivo)
+    tabla.drop(conexion)
+
+    if ilegibles:
+        omitidas["ilegible"] = ilegibles
+    return {
+        "leidas": cargadas + ilegibles,
+        "insertadas": insertadas,
+        "omitidas": omitidas,
+    }
+
+
+def importar_historial(
+    conexion,
+    archivos: Dict[str, str],
+    mapeos: Optional[Dict[str, Dict[str, str]]] = None,
+    delimitador: Optional[str] = None,
+    hoja: Optional[str] = None,
+    lote: int = LOTE_IMPORTACION,
+    hoy: Optional[date] = None,
+    rechazar: Optional[Callable[[str, int, str], None]] = None,
+) -> Dict[str, Dict]:
+    """
+    Importa los archivos {entidad: ruta} en el orden de ENTIDADES, dentro de
+    la transacción de `conexion` (quien llama confirma o revierte).
+    """
+    desconocidas = set(archivos) - set(ENTIDADES)
+    if desconocidas:
+        raise ValueError(f"Entidades desconocidas: {', '.join(sorted(desconocidas))}")
+
+    mapeos = mapeos or {}
+    return {
+        entidad: importar_entidad(
+            conexion, entidad, leer_archivo(archivos[entidad], delimitador, hoja),
+            mapeos.get(entidad), lote, hoy, rechazar
+        )
+        for entidad in ENTIDADES if entidad in archivos
+    }
@@ -0,0 +1,217 @@
+"""
+Liquidación mensual a copropietarios
+====================================
+Las distribuciones reparten el monto bruto de cada pago; la liquidación
+del periodo descuenta además lo que la propiedad pagó y gastó:
+
+  neto de la propiedad = cobrado (PAGADO/PARCIAL)
+                         - impuestos efectivos (total_efectivo)
+                         - gastos del mes (resumen_gastos_mensual)
+
+y a cada copropietario le corresponde su porcentaje_participacion de cada
+concepto. Restar total_efectivo de todo lo cobrado equivale a sumar
+monto_neto_distribuir de los pagos con impuesto, sin dejar afuera los
+pagos cuyo impuesto todavía no se registró.
+
+Todo el portafolio se liquida con un INSERT ... SELECT: totales por
+propiedad (UNION ALL de las tres fuentes agrupado) cruzados con los
+copropietarios vigentes. El redondeo a centavos se ajusta con funciones de
+ventana: el último copropietario de cada propiedad absorbe la diferencia,
+como en PaymentDistributor. Las propiedades cuyos porcentajes no suman 100%
+se omiten y se informan.
+
+Reliquidar un periodo borra y vuelve a insertar sus filas en la misma
+transacción, así que se puede correr cuantas veces haga falta.
+"""
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import Float, Numeric, and_, case, cast, delete, func, insert, literal, select, text, union_all
+from sqlalchemy.orm import Session, aliased
+
+from app.models.contrato import Contrato
+from app.models.copropietario import Copropietario
+from app.models.impuesto import ImpuestoAlquiler
+from app.models.liquidacion import LiquidacionCopropietario
+from app.models.pago import EstadoPago, Pago
+from app.models.propiedad import Propiedad
+from app.models.unidad_gasto import ResumenGastoMensual
+
+CONCEPTOS = ("ingresos_brutos", "impuestos", "gastos")
+
+# Misma tolerancia que PaymentDistributor.validar_porcentajes
+TOLERANCIA_PORCENTAJE = 0.01
+
+
+def _centavos(valor):
+    # round(double, int) no existe en PostgreSQL: se redondea como numeric
+    return cast(func.round(cast(valor, Numeric), 2), Float)
+
+
+def _totales_propiedad(anio: int, mes: int, propiedad_id: Optional[int]):
+    """CTE (propiedad_id, ingresos_brutos, impuestos, gastos) de las copropiedades del periodo"""
+    def de_propiedad(columna):
+        return [columna == propiedad_id] if propiedad_id is not None else []
+
+    cero = literal(0.0, Float)
+    ingresos = select(
+        Contrato.propiedad_id,
+        Pago.monto_pagado.label("ingresos_brutos"),
+        cero.label("impuestos"),
+        cero.label("gastos"),
+    ).join(Contrato, Contrato.id == Pago.contrato_id).where(
+        Pago.anio == anio,
+        Pago.mes == mes,
+        Pago.estado.in_([EstadoPago.PAGADO, EstadoPago.PARCIAL]),
+        Pago.deleted_at == None,
+        *de_propiedad(Contrato.propiedad_id)
+    )
+    impuestos = select(
+        Contrato.propiedad_id, cero, ImpuestoAlquiler.total_efectivo, cero
+    ).join(Contrato, Contrato.id == ImpuestoAlquiler.contrato_id).where(
+        ImpuestoAlquiler.anio == anio,
+        ImpuestoAlquiler.mes == mes,
+        ImpuestoAlquiler.deleted_at == None,
+        *de_propiedad(Contrato.propiedad_id)
+    )
+    gastos = select(
+        ResumenGastoMensual.propiedad_id, cero, cero, ResumenGastoMensual.monto_total
+    ).where(
+        ResumenGastoMensual.anio == anio,
+        ResumenGastoMensual.mes == mes,
+        *de_propiedad(ResumenGastoMensual.propiedad_id)
+    )
+    movimientos = union_all(ingresos, impuestos, gastos).subquery("movimientos")
+
+    m = movimientos.c
+    return select(
+        m.propiedad_id,
+        *(_centavos(func.sum(m[concepto])).label(concepto) for concepto in CONCEPTOS)
+    ).join(
+        Propiedad, Propiedad.id == m.propiedad_id
+    ).where(
+        Propiedad.tipo == "copropiedad"
+    ).group_by(m.propiedad_id).cte("totales")
+
+
+def liquidar_periodo(
+    db: Session,
+    anio: int,
+    mes: int,
+    propiedad_id: Optional[int] = None,
+    simular: bool = False,
+) -> Dict:
+    """
+    (Re)calcula las liquidaciones del periodo de todas las copropiedades, o
+    solo de propiedad_id. Con simular=True calcula todo y revierte.
+    Devuelve conteos, totales y {propiedad_id: motivo} de las omitidas.
+    """
+    inicio = time.perf_counter()
+
+    if db.get_bind().dialect.name == "postgresql":
+        # Dos liquidaciones simultáneas del periodo no deben pisarse
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext('liquidacion_copropietarios'), :periodo)"),
+                   {"periodo": anio * 100 + mes})
+
+    totales = _totales_propiedad(anio, mes, propiedad_id)
+
+    # Alias propio: la subconsulta no debe correlacionarse con la consulta externa
+    socios = aliased(Copropietario)
+    validas = select(socios.propiedad_id).where(
+        socios.deleted_at == None
+    ).group_by(socios.propiedad_id).having(
+        func.abs(func.sum(socios.porcentaje_participacion) - 100) <= TOLERANCIA_PORCENTAJE
+    )
+
+    por_propiedad = {"partition_by": Copropietario.propiedad_id}
+    es_ultimo = func.row_number().over(order_by=Copropietario.id.desc(), **por_propiedad) == 1
+
+    def parte(total):
+        # El último copropietario se lleva total - suma de las partes redondeadas
+        base = _centavos(total * Copropietario.porcentaje_participacion / 100)
+        return _centavos(base + case((es_ultimo, total - func.sum(base).over(**por_propiedad)), else_=0))
+
+    cuotas = select(
+        Copropietario.id.label("copropietario_id"),
+        Copropietario.propiedad_id,
+        Copropietario.porcentaje_participacion,
+        *(parte(totales.c[concepto]).label(concepto) for concepto in CONCEPTOS)
+    ).join(
+        totales, totales.c.propiedad_id == Copropietario.propiedad_id
+    ).where(
+        Copropietario.deleted_at == None,
+        Copropietario.propiedad_id.in_(validas)
+    ).cte("cuotas")
+
+    c = cuotas.c
+    filas = select(
+        c.copropietario_id,
+        c.propiedad_id,
+        literal(f"{anio}-{mes:02d}"),
+        literal(anio),
+        literal(mes),
+        c.porcentaje_participacion,
+        c.ingresos_brutos,
+        c.impuestos,
+        c.gastos,
+        _centavos(c.ingresos_brutos - c.impuestos - c.gastos),
+        func.current_timestamp(),
+    )
+
+    anteriores = delete(LiquidacionCopropietario).where(
+        LiquidacionCopropietario.anio == anio,
+        LiquidacionCopropietario.mes == mes
+    )
+    if propiedad_id is not None:
+        anteriores = anteriores.where(LiquidacionCopropietario.propiedad_id == propiedad_id)
+    reemplazadas = db.execute(anteriores.execution_options(synchronize_session=False)).rowcount
+
+    db.execute(insert(LiquidacionCopropietario).from_select(
+        ["copropietario_id", "propiedad_id", "periodo", "anio", "mes", "porcentaje_participacion",
+         "ingresos_brutos", "impuestos", "gastos", "monto_neto", "updated_at"],
+        filas
+    ))
+
+    resumen = db.execute(select(
+        func.count(),
+        func.count(func.distinct(LiquidacionCopropietario.propiedad_id)),
+        *(func.coalesce(func.sum(LiquidacionCopropietario.__table__.c[concepto]), 0)
+          for concepto in CONCEPTOS + ("monto_neto",))
+    ).where(
+        LiquidacionCopropietario.anio == anio,
+        LiquidacionCopropietario.mes == mes,
+        *([LiquidacionCopropietario.propiedad_id == propiedad_id] if propiedad_id is not None else [])
+    )).one()
+
+    # Copropiedades con movimientos que no se liquidaron
+    omitidas = db.execute(select(
+        totales.c.propiedad_id, func.coalesce(func.sum(Copropietario.porcentaje_participacion), 0)
+    ).outerjoin(
+        Copropietario, and_(Copropietario.propiedad_id == totales.c.propiedad_id, Copropietario.deleted_at == None)
+    ).where(
+        totales.c.propiedad_id.not_in(validas)
+    ).group_by(totales.c.propiedad_id).order_by(totales.c.propiedad_id)).all()
+
+    if simular:
+        db.rollback()
+    else:
+        db.commit()
+
+    liquidaciones, propiedades = resumen[0], resumen[1]
+    return {
+        "periodo": f"{anio}-{mes:02d}",
+        "simulado": simular,
+        "liquidaciones": liquidaciones,
+        "propiedades": propiedades,
+        "reemplazadas": reemplazadas,
+        "totales": {
+            concepto: round(float(total), 2)
+            for concepto, total in zip(CONCEPTOS + ("monto_neto",), resumen[2:])
+        },
+        "omitidas": {
+            pid: (f"No hay copropietarios registrados para la propiedad {pid}" if not suma
+                  else f"Los porcentajes no suman 100% (suma actual: {round(suma, 2)}%)")
+            for pid, suma in omitidas
+        },
+        "duracion_s": round(time.perf_counter() - inicio, 3),
+    }
@@ -0,0 +1,374 @@
+"""
+Lote de pago a copropietarios
+=============================
+Paga de una vez todas las distribuciones PENDIENTE, una transferencia por
+copropietario y cuenta (cuenta_bancaria, banco, tipo_cuenta):
+
+  1. resumen_lote()    → lo que entraría en un lote nuevo y los lotes abiertos
+  2. generar_lote()    → guarda el lote: sus distribuciones y, por
+                         beneficiario, la cuenta, la cantidad y el monto
+  3. exportar_lote()   → archivo para el banco con lo guardado, una línea por
+                         beneficiario: csv con encabezado o txt separado por "|"
+  4. confirmar_lote()  → un solo UPDATE marca PAGADO las distribuciones del
+                         lote con su número de transferencia
+
+El lote confirma exactamente lo exportado: una distribución creada (o
+confirmada por otra transacción) después de generarlo, o un copropietario
+que registró su cuenta después, quedan para el próximo. Si lo pendiente de
+un beneficiario ya no coincide con el monto del archivo, se rechaza y sus
+distribuciones siguen PENDIENTE. Confirmar dos veces no vuelve a marcar nada.
+anular_lote() libera las distribuciones que no se confirmaron.
+
+Los copropietarios sin cuenta bancaria no entran en el lote y se informan en
+el resumen. El archivo se lee con un cursor del lado del servidor en
+bloques, como la declaración al SIN.
+"""
+import csv
+import io
+from datetime import date, datetime
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy import String, and_, case, cast, delete, exists, func, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.copropietario import Copropietario
+from app.models.distribucion_pago import DistribucionPago, EstadoDistribucion
+from app.models.lote_pago import (
+    EstadoBeneficiarioLote, EstadoLotePago, LotePago, LotePagoBeneficiario, LotePagoDistribucion
+)
+from app.services import eventos_tablero
+
+FORMATOS = ("csv", "txt")
+
+# Filas por bloque leído del cursor y escrito a la salida
+LOTE_EXPORTACION = 2000
+
+# Diferencia de monto que se considera redondeo y no un cambio
+TOLERANCIA_MONTO = 0.005
+
+COLUMNAS_LOTE = (
+    "referencia", "copropietario_id", "beneficiario", "ci",
+    "banco", "tipo_cuenta", "cuenta_bancaria", "distribuciones", "monto",
+)
+
+
+def referencia(lote_id: int, copropietario_id: int) -> str:
+    """Número de transferencia por defecto de un beneficiario del lote"""
+    return f"LOTE{lote_id}-{copropietario_id}"
+
+
+def _con_cuenta():
+    return and_(Copropietario.cuenta_bancaria != None, Copropietario.cuenta_bancaria != "")
+
+
+def _libres():
+    """Distribuciones pendientes que no están en ningún lote"""
+    return and_(
+        DistribucionPago.estado == EstadoDistribucion.PENDIENTE,
+        DistribucionPago.deleted_at == None,
+        ~exists().where(LotePagoDistribucion.distribucion_id == DistribucionPago.id)
+    )
+
+
+def _del_lote(lote_id: int):
+    """Distribuciones del lote que siguen pendientes"""
+    return and_(
+        DistribucionPago.estado == EstadoDistribucion.PENDIENTE,
+        DistribucionPago.deleted_at == None,
+        DistribucionPago.id.in_(
+            select(LotePagoDistribucion.distribucion_id).where(LotePagoDistribucion.lote_id == lote_id)
+        )
+    )
+
+
+def resumen_lote(db: Session) -> Dict:
+    """Lo que tomaría un lote nuevo, con y sin cuenta bancaria, y los lotes abiertos"""
+    con_cuenta = case((_con_cuenta(), 1), else_=0)
+    fila = db.execute(select(
+        func.count(func.distinct(case((con_cuenta == 1, Copropietario.id)))),
+        func.sum(con_cuenta),
+        func.sum(DistribucionPago.monto_asignado * con_cuenta),
+        func.count(func.distinct(case((con_cuenta == 0, Copropietario.id)))),
+        func.sum(1 - con_cuenta),
+        func.sum(DistribucionPago.monto_asignado * (1 - con_cuenta)),
+    ).join(
+        Copropietario, Copropietario.id == DistribucionPago.copropietario_id
+    ).where(_libres())).one()
+
+    abiertos = db.execute(select(
+        LotePago.id, LotePago.created_at, LotePago.beneficiarios, LotePago.distribuciones, LotePago.monto_total
+    ).where(LotePago.estado == EstadoLotePago.ABIERTO.value).order_by(LotePago.id)).all()
+
+    return {
+        "beneficiarios": fila[0],
+        "distribuciones": fila[1] or 0,
+        "monto_total": round(fila[2] or 0, 2),
+        "sin_cuenta_bancaria": {
+            "copropietarios": fila[3],
+            "distribuciones": fila[4] or 0,
+            "monto": round(fila[5] or 0, 2),
+        },
+        "lotes_abiertos": [lote._asdict() for lote in abiertos],
+    }
+
+
+def generar_lote(db: Session) -> Dict:
+    """
+    Guarda un lote con las distribuciones libres de los copropietarios con
+    cuenta. Lo que se guarda es lo que exportar_lote() escribe en el archivo.
+    """
+    lote = LotePago(estado=EstadoLotePago.ABIERTO.value)
+    db.add(lote)
+    db.flush()
+
+    try:
+        db.execute(insert(LotePagoDistribucion).from_select(
+            ["lote_id", "distribucion_id"],
+            select(literal(lote.id), DistribucionPago.id).join(
+                Copropietario, Copropietario.id == DistribucionPago.copropietario_id
+            ).where(_libres(), _con_cuenta())
+        ))
+    except IntegrityError:
+        # Otro lote tomó las mismas distribuciones al mismo tiempo
+        db.rollback()
+        raise ValueError("Se generó otro lote al mismo tiempo; reintente")
+    db.execute(insert(LotePagoBeneficiario).from_select(
+        ["lote_id", "copropietario_id", "beneficiario", "ci", "banco", "tipo_cuenta",
+         "cuenta_bancaria", "distribuciones", "monto", "estado"],
+        select(
+            literal(lote.id),
+            Copropietario.id,
+            Copropietario.nombre,
+            Copropietario.ci,
+            Copropietario.banco,
+            Copropietario.tipo_cuenta,
+            Copropietario.cuenta_bancaria,
+            func.count(DistribucionPago.id),
+            func.sum(DistribucionPago.monto_asignado),
+            literal(EstadoBeneficiarioLote.PENDIENTE.value),
+        ).join(
+            Copropietario, Copropietario.id == DistribucionPago.copropietario_id
+        ).join(
+            LotePagoDistribucion, LotePagoDistribucion.distribucion_id == DistribucionPago.id
+        ).where(
+            LotePagoDistribucion.lote_id == lote.id
+        ).group_by(
+            Copropietario.id, Copropietario.nombre, Copropietario.ci,
+            Copropietario.banco, Copropietario.tipo_cuenta, Copropietario.cuenta_bancaria
+        )
+    ))
+
+    beneficiarios, distribuciones, monto = db.execute(select(
+        func.count(),
+        func.coalesce(func.sum(LotePagoBeneficiario.distribuciones), 0),
+        func.coalesce(func.sum(LotePagoBeneficiario.monto), 0),
+    ).where(LotePagoBeneficiario.lote_id == lote.id)).one()
+    if not beneficiarios:
+        db.rollback()
+        raise ValueError("No hay distribuciones pendientes de copropietarios con cuenta bancaria")
+
+    lote.beneficiarios = beneficiarios
+    lote.distribuciones = distribuciones
+    lote.monto_total = round(monto, 2)
+    db.commit()
+
+    return {
+        "lote_id": lote.id,
+        "beneficiarios": beneficiarios,
+        "distribuciones": distribuciones,
+        "monto_total": lote.monto_total,
+    }
+
+
+def _valor(valor) -> str:
+    if valor is None:
+        return ""
+    if isinstance(valor, float):
+        return f"{valor:.2f}"
+    return str(valor)
+
+
+def _linea_txt(valores) -> str:
+    # Un "|" dentro de un nombre rompería el registro
+    return "|".join(_valor(v).replace("|", "/") for v in valores) + "\r\n"
+
+
+def exportar_lote(
+    db: Session,
+    lote_id: int,
+    formato: str = "csv",
+    lote: int = LOTE_EXPORTACION,
+) -> Iterator[str]:
+    """
+    Archivo de transferencias del lote en bloques de hasta `lote` líneas.
+    Consume el cursor a medida que se itera: la sesión debe seguir abierta
+    hasta terminar.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato}")
+
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator="\n")
+    if formato == "csv":
+        escritor.writerow(COLUMNAS_LOTE)
+        yield buffer.getvalue()
+
+    b = LotePagoBeneficiario
+    resultado = db.execute(select(
+        b.copropietario_id, b.beneficiario, b.ci, b.banco, b.tipo_cuenta,
+        b.cuenta_bancaria, b.distribuciones, b.monto,
+    ).where(
+        b.lote_id == lote_id, b.estado != EstadoBeneficiarioLote.ANULADO.value
+    ).order_by(b.copropietario_id).execution_options(yield_per=lote))
+    for filas in resultado.partitions():
+        lineas = (
+            (referencia(lote_id, fila[0]), *fila[:-1], round(fila[-1], 2))
+            for fila in filas
+        )
+        if formato == "txt":
+            yield "".join(_linea_txt(valores) for valores in lineas)
+            continue
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerows([_valor(v) for v in valores] for valores in lineas)
+        yield buffer.getvalue()
+
+
+def _lote(db: Session, lote_id: int) -> LotePago:
+    lote = db.get(LotePago, lote_id)
+    if lote is None:
+        raise ValueError(f"Lote {lote_id} no encontrado")
+    return lote
+
+
+def confirmar_lote(
+    db: Session,
+    lote_id: int,
+    fecha_pago: Optional[date] = None,
+    transferencias: Optional[Dict[int, str]] = None,
+) -> Dict:
+    """
+    Marca PAGADO, con un solo UPDATE, las distribuciones del lote de los
+    beneficiarios cuyo pendiente coincide con lo exportado.
+
+    transferencias {copropietario_id: número} confirma solo esos
+    beneficiarios (los que el banco acreditó) con el número informado; sin
+    él se confirma todo el lote con la referencia del archivo. Devuelve en
+    `rechazados` {copropietario_id: motivo} los que no se confirmaron.
+    """
+    lote = _lote(db, lote_id)
+    fecha_pago = fecha_pago or datetime.now().date()
+
+    exportados = {
+        fila.copropietario_id: fila for fila in db.execute(select(
+            LotePagoBeneficiario.copropietario_id, LotePagoBeneficiario.distribuciones,
+            LotePagoBeneficiario.monto, LotePagoBeneficiario.estado,
+        ).where(LotePagoBeneficiario.lote_id == lote_id))
+    }
+    pendientes = {
+        fila[0]: (fila[1], fila[2] or 0.0) for fila in db.execute(select(
+            DistribucionPago.copropietario_id, func.count(), func.sum(DistribucionPago.monto_asignado)
+        ).where(_del_lote(lote_id)).group_by(DistribucionPago.copropietario_id))
+    }
+
+    rechazados = {}
+    aceptados = []
+    for copropietario_id in (transferencias if transferencias is not None else exportados):
+        exportado = exportados.get(copropietario_id)
+        if exportado is None:
+            rechazados[copropietario_id] = "No está en el lote"
+            continue
+        if exportado.estado != EstadoBeneficiarioLote.PENDIENTE.value:
+            continue  # ya confirmado (o anulado): repetir no vuelve a marcar
+        cantidad, monto = pendientes.get(copropietario_id, (0, 0.0))
+        if cantidad != exportado.distribuciones or abs(monto - exportado.monto) > TOLERANCIA_MONTO:
+            rechazados[copropietario_id] = (
+                f"Lo pendiente cambió desde el archivo: Bs. {exportado.monto:.2f} en "
+                f"{exportado.distribuciones} distribuciones exportadas, Bs. {monto:.2f} en {cantidad} pendientes"
+            )
+            continue
+        aceptados.append(copropietario_id)
+
+    pagadas = []
+    if aceptados:
+        numero = literal(f"LOTE{lote_id}-") + cast(DistribucionPago.copropietario_id, String)
+        if transferencias:
+            numero = case(transferencias, value=DistribucionPago.copropietario_id, else_=numero)
+        pagadas = db.execute(
+            update(DistribucionPago).where(
+                _del_lote(lote_id), DistribucionPago.copropietario_id.in_(aceptados)
+            ).values(
+                estado=EstadoDistribucion.PAGADO,
+                numero_transferencia=numero,
+                fecha_pago_efectivo=fecha_pago,
+                updated_at=datetime.utcnow()
+            ).returning(
+                DistribucionPago.id, DistribucionPago.copropietario_id, DistribucionPago.monto_asignado
+            ).execution_options(synchronize_session=False)
+        ).all()
+
+        numero = literal(f"LOTE{lote_id}-") + cast(LotePagoBeneficiario.copropietario_id, String)
+        if transferencias:
+            numero = case(transferencias, value=LotePagoBeneficiario.copropietario_id, else_=numero)
+        db.execute(update(LotePagoBeneficiario).where(
+            LotePagoBeneficiario.lote_id == lote_id,
+            LotePagoBeneficiario.copropietario_id.in_(aceptados)
+        ).values(
+            estado=EstadoBeneficiarioLote.PAGADO.value,
+            numero_transferencia=numero,
+            fecha_pago=fecha_pago,
+        ).execution_options(synchronize_session=False))
+
+    quedan = db.scalar(select(func.count()).where(
+        LotePagoBeneficiario.lote_id == lote_id,
+        LotePagoBeneficiario.estado == EstadoBeneficiarioLote.PENDIENTE.value
+    ))
+    if not quedan:
+        lote.estado = EstadoLotePago.CERRADO.value
+    db.commit()
+
+    monto = round(sum(fila.monto_asignado for fila in pagadas), 2)
+    beneficiarios = len({fila.copropietario_id for fila in pagadas})
+    if pagadas:
+        eventos_tablero.publicar("lote_pagado", {
+            "lote_id": lote_id,
+            "beneficiarios": beneficiarios,
+            "distribuciones": len(pagadas),
+            "monto": monto
+        })
+
+    return {
+        "lote_id": lote_id,
+        "estado": lote.estado,
+        "beneficiarios": beneficiarios,
+        "distribuciones_pagadas": len(pagadas),
+        "monto_total": monto,
+        "rechazados": rechazados,
+    }
+
+
+def anular_lote(db: Session, lote_id: int) -> Dict:
+    """
+    Cierra el lote sin pagar lo que falta: sus beneficiarios pendientes
+    quedan anulados y sus distribuciones pendientes vuelven a estar libres
+    para el próximo lote. Lo ya confirmado no cambia.
+    """
+    lote = _lote(db, lote_id)
+    if lote.estado != EstadoLotePago.ABIERTO.value:
+        raise ValueError(f"El lote {lote_id} ya está cerrado")
+
+    liberadas = db.execute(delete(LotePagoDistribucion).where(
+        LotePagoDistribucion.lote_id == lote_id,
+        LotePagoDistribucion.distribucion_id.in_(select(DistribucionPago.id).where(
+            DistribucionPago.estado == EstadoDistribucion.PENDIENTE
+        ))
+    ).execution_options(synchronize_session=False)).rowcount
+    anulados = db.execute(update(LotePagoBeneficiario).where(
+        LotePagoBeneficiario.lote_id == lote_id,
+        LotePagoBeneficiario.estado == EstadoBeneficiarioLote.PENDIENTE.value
+    ).values(estado=EstadoBeneficiarioLote.ANULADO.value).execution_options(synchronize_session=False)).rowcount
+    lote.estado = EstadoLotePago.CERRADO.value
+    db.commit()
+
+    return {"lote_id": lote_id, "beneficiarios_anulados": anulados, "distribuciones_liberadas": liberadas}
@@ -3,10 +3,12 @@ Servicio para calcular mora según normativa boliviana
 """
 
 from datetime import datetime, date
-from typing import Dict
+from typing import Callable, Dict, Optional
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session
 from app.models.pago import Pago, EstadoPago
 from app.models.contrato import Contrato
+from app.services import eventos_tablero
 
 
 class MoraCalculator:
@@ -95,6 +97,7 @@ class MoraCalculator:
             raise ValueError(f"Contrato con ID {pago.contrato_id} no encontrado")
         
         mora_data = MoraCalculator.calcular_mora(pago, contrato, fecha_calculo)
+        antes = (pago.estado, pago.monto_pagado, pago.mora_calculada)
         
         # Actualizar pago
         pago.dias_atraso = mora_data["dias_atraso"]
@@ -111,6 +114,10 @@ class MoraCalculator:
         db.commit()
         db.refresh(pago)
         
+        cambios = eventos_tablero.Cambios()
+        cambios.agregar(pago.anio, pago.mes, antes, (pago.estado, pago.monto_pagado, pago.mora_calculada))
+        cambios.publicar("mora_recalculada", pago_id=pago.id)
+        
         return mora_data
     
     @staticmethod
@@ -139,8 +146,10 @@ class MoraCalculator:
             Pago.estado.in_([EstadoPago.PENDIENTE, EstadoPago.PARCIAL, EstadoPago.VENCIDO])
         ).all()
         
+        cambios = eventos_tablero.Cambios()
         for pago in pagos_pendientes:
             mora_data = MoraCalculator.calcular_mora(pago, contrato, fecha_calculo)
+            antes = (pago.estado, pago.monto_pagado, pago.mora_calculada)
             pago.dias_atraso = mora_data["dias_atraso"]
             pago.mora_calculada = mora_data["mora_calculada"]
             
@@ -149,10 +158,98 @@ class MoraCalculator:
                 pago.estado = EstadoPago.PAGADO
             elif mora_data["dias_atraso"] > 0:
                 pago.estado = EstadoPago.VENCIDO
+            cambios.agregar(pago.anio, pago.mes, antes, (pago.estado, pago.monto_pagado, pago.mora_calculada))
         
         db.commit()
+        cambios.publicar("mora_recalculada", contrato_id=contrato_id)
         return len(pagos_pendientes)
     
+    @staticmethod
+    def actualizar_mora_portafolio(
+        db: Session,
+        fecha_calculo: date = None,
+        lote: int = 1000,
+        al_avanzar: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, float]:
+        """
+        Actualiza la mora de todos los pagos no cobrados del portafolio.
+        
+        Recorre los pagos por id en lotes de `lote` filas (solo las columnas
+        necesarias) y guarda cada lote con un UPDATE por clave primaria y un
+        commit, así un recálculo largo no retiene una transacción enorme.
+        
+        Args:
+            db: Sesión de base de datos
+            fecha_calculo: Fecha hasta la cual calcular (default: hoy)
+            lote: Pagos por lote
+            al_avanzar: Llamada con (procesados, total) después de cada lote
+            
+        Returns:
+            Dict con: pagos_revisados, pagos_actualizados, mora_total
+        """
+        filtro = (
+            Pago.estado.in_([EstadoPago.PENDIENTE, EstadoPago.PARCIAL, EstadoPago.VENCIDO]),
+            Pago.deleted_at == None
+        )
+        total = db.query(func.count(Pago.id)).filter(*filtro).scalar()
+        
+        revisados = actualizados = 0
+        mora_total = 0
+        ultimo_id = 0
+        cambios_tablero = eventos_tablero.Cambios()
+        while True:
+            filas = db.query(
+                Pago.id, Pago.anio, Pago.mes, Pago.estado, Pago.monto_pagado, Pago.monto_esperado,
+                Pago.mora_calculada, Pago.dias_atraso, Pago.fecha_vencimiento,
+                Contrato.tasa_mora_diaria
+            ).join(Contrato, Contrato.id == Pago.contrato_id).filter(
+                *filtro, Pago.id > ultimo_id
+            ).order_by(Pago.id).limit(lote).all()
+            if not filas:
+                break
+            
+            cambios = []
+            for fila in filas:
+                # La fila trae los campos del pago y la tasa del contrato
+                mora_data = MoraCalculator.calcular_mora(fila, fila, fecha_calculo)
+                estado = fila.estado
+                if mora_data["monto_pendiente"] == 0:
+                    estado = EstadoPago.PAGADO
+                elif mora_data["dias_atraso"] > 0:
+                    estado = EstadoPago.VENCIDO
+                mora_total += mora_data["mora_calculada"]
+                
+                if (mora_data["mora_calculada"], mora_data["dias_atraso"], estado) != \
+                        (fila.mora_calculada, fila.dias_atraso, fila.estado):
+                    cambios.append({
+                        "id": fila.id,
+                        "dias_atraso": mora_data["dias_atraso"],
+                        "mora_calculada": mora_data["mora_calculada"],
+                        "estado": estado
+                    })
+                    cambios_tablero.agregar(
+                        fila.anio, fila.mes,
+                        (fila.estado, fila.monto_pagado, fila.mora_calculada),
+                        (estado, fila.monto_pagado, mora_data["mora_calculada"])
+                    )
+            
+            if cambios:
+                db.execute(update(Pago), cambios)
+            db.commit()
+            
+            revisados += len(filas)
+            actualizados += len(cambios)
+            ultimo_id = filas[-1].id
+            if al_avanzar is not None:
+                al_avanzar(revisados, total)
+        
+        cambios_tablero.publicar("mora_recalculada", portafolio=True)
+        return {
+            "pagos_revisados": revisados,
+            "pagos_actualizados": actualizados,
+            "mora_total": round(mora_total, 2)
+        }
+    
     @staticmethod
     def calcular_mora_total_contrato(
         db: Session,
@@ -0,0 +1,148 @@
+"""
+Reparto de copropiedad en caché
+===============================
+Distribuir un pago necesita los copropietarios vigentes de la propiedad y
+la suma de sus porcentajes. La composición cambia muy rara vez, así que se
+guarda en memoria por propiedad_id, sin objetos ORM (Socio / Reparto).
+
+Coherencia entre procesos (API y workers) con un sello de versión:
+  - toda sesión que inserta, modifica o da de baja un Copropietario
+    incrementa versiones_cache["copropietarios"] en el mismo flush, dentro
+    de su transacción (eventos registrados junto al modelo, ver
+    app.models.version_cache.versionar);
+  - cada consulta lee esa versión (una lectura por clave primaria) y, si no
+    coincide con la de la caché local, la descarta completa.
+
+Un cambio confirmado se ve en la consulta siguiente de cualquier proceso,
+sin TTL. Una sesión con cambios de copropietarios todavía sin confirmar lee
+directo de la base y no llena la caché. Las escrituras que no pasan por el
+ORM deben llamar a incrementar_version() en su transacción.
+
+estadisticas() expone aciertos, fallos e invalidaciones (GET /health).
+"""
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import version_cache
+from app.models.copropietario import Copropietario
+from app.models.version_cache import VersionCache
+
+NOMBRE_VERSION = "copropietarios"
+
+# Misma tolerancia que la validación al crear la copropiedad
+TOLERANCIA_PORCENTAJE = 0.01
+
+
+class Socio(NamedTuple):
+    id: int
+    nombre: str
+    porcentaje_participacion: float
+    cuenta_bancaria: Optional[str]
+    banco: Optional[str]
+
+
+class Reparto(NamedTuple):
+    socios: Tuple[Socio, ...]
+    total_porcentaje: float
+
+    @property
+    def valido(self) -> bool:
+        """Hay copropietarios y sus porcentajes suman 100%"""
+        return bool(self.socios) and abs(self.total_porcentaje - 100) <= TOLERANCIA_PORCENTAJE
+
+
+_lock = threading.Lock()
+_cache: Dict[int, Reparto] = {}
+_version: Optional[int] = None
+_contadores = {"aciertos": 0, "fallos": 0, "invalidaciones": 0}
+
+
+def leer_version(db: Session) -> int:
+    return db.scalar(select(VersionCache.version).where(VersionCache.nombre == NOMBRE_VERSION)) or 0
+
+
+def incrementar_version(conexion) -> None:
+    """Invalida las cachés de todos los procesos al confirmar la transacción"""
+    version_cache.incrementar_version(conexion, NOMBRE_VERSION)
+
+
+def _cargar(db: Session, propiedad_ids) -> Dict[int, Reparto]:
+    socios = defaultdict(list)
+    for propiedad_id, *datos in db.execute(select(
+        Copropietario.propiedad_id,
+        Copropietario.id,
+        Copropietario.nombre,
+        Copropietario.porcentaje_participacion,
+        Copropietario.cuenta_bancaria,
+        Copropietario.banco
+    ).where(
+        Copropietario.propiedad_id.in_(propiedad_ids),
+        Copropietario.deleted_at == None
+    ).order_by(Copropietario.id)):
+        socios[propiedad_id].append(Socio(*datos))
+    return {
+        propiedad_id: Reparto(
+            tuple(socios[propiedad_id]),
+            sum(s.porcentaje_participacion for s in socios[propiedad_id])
+        )
+        for propiedad_id in propiedad_ids
+    }
+
+
+def obtener_repartos(db: Session, propiedad_ids: Iterable[int]) -> Dict[int, Reparto]:
+    """{propiedad_id: Reparto}: una lectura de la versión y una consulta para las que faltan"""
+    global _version
+    propiedad_ids = set(propiedad_ids)
+    if not propiedad_ids:
+        return {}
+
+    version = leer_version(db)
+    # Después de leer la versión: esa lectura pudo provocar un autoflush
+    if NOMBRE_VERSION in db.info.get("versiones_modificadas", ()):
+        return _cargar(db, propiedad_ids)
+
+    with _lock:
+        if version != _version:
+            if _cache:
+                _contadores["invalidaciones"] += 1
+            _cache.clear()
+            _version = version
+        encontrados = {pid: _cache[pid] for pid in propiedad_ids if pid in _cache}
+        _contadores["aciertos"] += len(encontrados)
+        _contadores["fallos"] += len(propiedad_ids) - len(encontrados)
+
+    faltantes = propiedad_ids - encontrados.keys()
+    if faltantes:
+        cargados = _cargar(db, faltantes)
+        with _lock:
+            # Si otro hilo ya vio una versión más nueva, lo leído no se guarda
+            if _version == version:
+                _cache.update(cargados)
+        encontrados.update(cargados)
+    return encontrados
+
+
+def obtener_reparto(db: Session, propiedad_id: int) -> Reparto:
+    return obtener_repartos(db, [propiedad_id])[propiedad_id]
+
+
+def estadisticas() -> Dict:
+    with _lock:
+        consultas = _contadores["aciertos"] + _contadores["fallos"]
+        return {
+            **_contadores,
+            "tasa_aciertos": round(_contadores["aciertos"] / consultas, 4) if consultas else None,
+            "propiedades": len(_cache),
+            "version": _version,
+        }
+
+
+def limpiar_cache() -> None:
+    global _version
+    with _lock:
+        _cache.clear()
+        _version = None
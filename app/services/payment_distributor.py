@@ -4,11 +4,14 @@ Servicio para distribuir pagos entre copropietarios
 
 from datetime import datetime
 from typing import Dict, List
+from sqlalchemy import func, insert
 from sqlalchemy.orm import Session
 from app.models.pago import Pago
+from app.models.contrato import Contrato
 from app.models.propiedad import Propiedad
 from app.models.copropietario import Copropietario
 from app.models.distribucion_pago import DistribucionPago, EstadoDistribucion
+from app.services import eventos_tablero, participaciones
 
 
 class PaymentDistributor:
@@ -28,18 +31,8 @@ class PaymentDistributor:
         Returns:
             True si es válido, False si no
         """
-        copropietarios = db.query(Copropietario).filter(
-            Copropietario.propiedad_id == propiedad_id,
-            Copropietario.deleted_at == None
-        ).all()
-        
-        if not copropietarios:
-            return False
-        
-        total_porcentaje = sum(c.porcentaje_participacion for c in copropietarios)
-        
-        # Permitir una tolerancia de 0.01% por redondeo
-        return abs(total_porcentaje - 100) <= 0.01
+        # Tolerancia de 0.01% por redondeo (ver Reparto.valido)
+        return participaciones.obtener_reparto(db, propiedad_id).valido
     
     @staticmethod
     def distribuir_pago(db: Session, pago_id: int) -> Dict:
@@ -77,18 +70,16 @@ class PaymentDistributor:
         if distribuciones_existentes:
             raise ValueError(f"El pago {pago_id} ya tiene distribuciones creadas")
         
-        # Obtener copropietarios activos
-        copropietarios = db.query(Copropietario).filter(
-            Copropietario.propiedad_id == propiedad.id,
-            Copropietario.deleted_at == None
-        ).all()
+        # Copropietarios activos (caché por propiedad, ver participaciones)
+        reparto = participaciones.obtener_reparto(db, propiedad.id)
+        copropietarios = reparto.socios
         
         if not copropietarios:
             raise ValueError(f"No hay copropietarios registrados para la propiedad {propiedad.id}")
         
         # Validar que los porcentajes sumen 100%
-        total_porcentaje = sum(c.porcentaje_participacion for c in copropietarios)
-        if abs(total_porcentaje - 100) > 0.01:
+        total_porcentaje = reparto.total_porcentaje
+        if not reparto.valido:
             raise ValueError(
                 f"Los porcentajes no suman 100% (suma actual: {total_porcentaje}%). "
                 f"Debe ajustar los porcentajes de participación."
@@ -137,6 +128,100 @@ class PaymentDistributor:
             "mensaje": "Distribución creada exitosamente"
         }
     
+    @staticmethod
+    def distribuir_pagos(db: Session, pago_ids: List[int]) -> Dict:
+        """
+        Distribuye muchos pagos a la vez (mismo reparto que distribuir_pago).
+        
+        Carga pagos, propiedades y distribuciones existentes con una consulta
+        por tabla, toma los copropietarios de la caché de participaciones e
+        inserta todas las distribuciones con un INSERT multi-fila. Los pagos
+        de propiedad propia o ya distribuidos se omiten, así que repetir la
+        llamada no duplica nada.
+        
+        Un pago distribuido cuando era PARCIAL y completado después reparte
+        solo la diferencia (monto_pagado menos lo ya distribuido) en
+        distribuciones nuevas: las anteriores pueden estar pagadas o en un
+        lote exportado y no se tocan. Si lo distribuido supera lo cobrado,
+        el pago queda en errores.
+        
+        Args:
+            db: Sesión de base de datos
+            pago_ids: IDs de los pagos a distribuir
+            
+        Returns:
+            Dict con: distribuidos, omitidos, errores {pago_id: motivo}
+        """
+        pagos = db.query(
+            Pago.id, Pago.monto_pagado, Propiedad.id.label("propiedad_id"), Propiedad.tipo
+        ).join(Contrato, Contrato.id == Pago.contrato_id).join(
+            Propiedad, Propiedad.id == Contrato.propiedad_id
+        ).filter(Pago.id.in_(pago_ids)).all()
+        
+        ya_distribuido = dict(db.query(
+            DistribucionPago.pago_id, func.sum(DistribucionPago.monto_asignado)
+        ).filter(
+            DistribucionPago.pago_id.in_(pago_ids)
+        ).group_by(DistribucionPago.pago_id).all())
+        
+        repartos = participaciones.obtener_repartos(
+            db, {p.propiedad_id for p in pagos if p.tipo == "copropiedad"}
+        )
+        
+        filas = []
+        distribuidos = omitidos = 0
+        errores = {}
+        hoy = datetime.now().date()
+        for pago in pagos:
+            distribuido = round(ya_distribuido.get(pago.id) or 0, 2)
+            monto = round((pago.monto_pagado or 0) - distribuido, 2)
+            if pago.tipo != "copropiedad" or monto == 0:
+                omitidos += 1
+                continue
+            if monto < 0:
+                errores[pago.id] = (
+                    f"El pago {pago.id} tiene distribuido {distribuido}, más que lo cobrado ({pago.monto_pagado})"
+                )
+                continue
+            
+            reparto = repartos[pago.propiedad_id]
+            lista = reparto.socios
+            if not lista:
+                errores[pago.id] = f"No hay copropietarios registrados para la propiedad {pago.propiedad_id}"
+                continue
+            if not reparto.valido:
+                errores[pago.id] = f"Los porcentajes no suman 100% (suma actual: {reparto.total_porcentaje}%)"
+                continue
+            
+            suma_distribuciones = 0
+            for i, coprop in enumerate(lista):
+                # El último copropietario absorbe la diferencia de redondeo
+                # (sobre los montos ya redondeados: la suma es exactamente monto)
+                if i == len(lista) - 1:
+                    monto_asignado = round(monto - suma_distribuciones, 2)
+                else:
+                    monto_asignado = round(monto * coprop.porcentaje_participacion / 100, 2)
+                    suma_distribuciones += monto_asignado
+                filas.append({
+                    "pago_id": pago.id,
+                    "copropietario_id": coprop.id,
+                    "monto_asignado": monto_asignado,
+                    "porcentaje_aplicado": coprop.porcentaje_participacion,
+                    "fecha_distribucion": hoy,
+                    "estado": EstadoDistribucion.PENDIENTE
+                })
+            distribuidos += 1
+        
+        if filas:
+            db.execute(insert(DistribucionPago), filas)
+        db.commit()
+        
+        return {
+            "distribuidos": distribuidos,
+            "omitidos": omitidos,
+            "errores": errores
+        }
+    
     @staticmethod
     def obtener_reporte_copropietario(
         db: Session,
@@ -237,6 +322,7 @@ class PaymentDistributor:
         if not distribucion:
             raise ValueError(f"Distribución con ID {distribucion_id} no encontrada")
         
+        ya_pagada = distribucion.estado == EstadoDistribucion.PAGADO
         distribucion.estado = EstadoDistribucion.PAGADO
         distribucion.numero_transferencia = numero_transferencia
         distribucion.fecha_pago_efectivo = fecha_pago or datetime.now().date()
@@ -244,4 +330,12 @@ class PaymentDistributor:
         db.commit()
         db.refresh(distribucion)
         
+        if not ya_pagada:
+            eventos_tablero.publicar("distribucion_pagada", {
+                "distribucion_id": distribucion.id,
+                "pago_id": distribucion.pago_id,
+                "copropietario_id": distribucion.copropietario_id,
+                "monto": distribucion.monto_asignado
+            })
+        
         return distribucion
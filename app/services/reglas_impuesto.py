@@ -0,0 +1,167 @@
+"""
+Reglas de impuestos con vigencia por fecha
+==========================================
+Las alícuotas y límites de compensación se guardan en la tabla
+reglas_impuesto, cada fila vigente desde el periodo de `vigente_desde`.
+Así un cambio de tasa no requiere despliegue y los periodos históricos se
+recalculan con la regla que correspondía en su momento.
+
+Las reglas se mantienen en memoria, ordenadas por periodo, y
+regla_para(anio, mes) las busca con bisect (O(log n)). Sin tabla o para
+periodos anteriores a la primera fila rige REGLA_BASE (las tasas legales
+vigentes al crear el sistema).
+
+Recarga en caliente:
+  - en el mismo proceso, al confirmar una sesión que modificó reglas;
+  - en otros procesos, cada REGLAS_IMPUESTO_TTL segundos se compara el sello
+    (cantidad y max(updated_at)) y se recarga si cambió.
+
+Sin configurar() (scripts sueltos, generador de datos) solo rige REGLA_BASE.
+"""
+import threading
+import time
+from bisect import bisect_right
+from datetime import date
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.impuesto import ReglaImpuesto
+
+
+class Regla(NamedTuple):
+    vigente_desde: date
+    alicuota_iva: float
+    alicuota_it: float
+    alicuota_rc_iva: float
+    limite_comp_iva: float      # % del alquiler
+    limite_comp_rc_iva: float   # % del RC-IVA determinado
+
+
+REGLA_BASE = Regla(
+    vigente_desde=date(1900, 1, 1),
+    alicuota_iva=13.0,
+    alicuota_it=3.0,
+    alicuota_rc_iva=12.5,
+    limite_comp_iva=30.0,
+    limite_comp_rc_iva=100.0,
+)
+
+_lock = threading.Lock()
+_reglas: List[Regla] = [REGLA_BASE]
+_indices: List[int] = [0]
+_sello = None
+_fabrica_sesiones: Optional[Callable[[], Session]] = None
+_proxima_verificacion = 0.0
+_oyentes: List[Callable[[], None]] = []
+
+
+def _indice_periodo(anio: int, mes: int) -> int:
+    return anio * 12 + mes - 1
+
+
+def configurar(fabrica_sesiones: Callable[[], Session]) -> None:
+    """Usa esta fábrica de sesiones para leer la tabla y carga las reglas"""
+    global _fabrica_sesiones
+    _fabrica_sesiones = fabrica_sesiones
+    recargar()
+
+
+def al_recargar(funcion: Callable[[], None]) -> None:
+    """Registra una función a ejecutar después de cada recarga (p. ej. limpiar memos)"""
+    _oyentes.append(funcion)
+
+
+def _leer_sello(db: Session):
+    return tuple(db.execute(
+        select(func.count(ReglaImpuesto.id), func.max(ReglaImpuesto.updated_at))
+    ).one())
+
+
+def recargar() -> None:
+    """Lee la tabla completa y reemplaza las reglas en memoria"""
+    global _reglas, _indices, _sello, _proxima_verificacion
+    if _fabrica_sesiones is None:
+        return
+
+    db = _fabrica_sesiones()
+    try:
+        sello = _leer_sello(db)
+        filas = db.execute(select(ReglaImpuesto).where(
+            ReglaImpuesto.deleted_at == None
+        ).order_by(ReglaImpuesto.vigente_desde)).scalars().all()
+    finally:
+        db.close()
+
+    reglas = [REGLA_BASE] + [
+        Regla(
+            vigente_desde=f.vigente_desde,
+            alicuota_iva=f.alicuota_iva,
+            alicuota_it=f.alicuota_it,
+            alicuota_rc_iva=f.alicuota_rc_iva,
+            limite_comp_iva=f.limite_comp_iva,
+            limite_comp_rc_iva=f.limite_comp_rc_iva,
+        )
+        for f in filas
+    ]
+    with _lock:
+        _reglas = reglas
+        _indices = [_indice_periodo(r.vigente_desde.year, r.vigente_desde.month) for r in reglas]
+        _sello = sello
+        _proxima_verificacion = time.monotonic() + settings.REGLAS_IMPUESTO_TTL
+    for funcion in _oyentes:
+        funcion()
+
+
+def _verificar_cambios() -> None:
+    """Recarga si otro proceso modificó la tabla (a lo sumo una consulta por TTL)"""
+    global _proxima_verificacion
+    if _fabrica_sesiones is None or time.monotonic() < _proxima_verificacion:
+        return
+    with _lock:
+        if time.monotonic() < _proxima_verificacion:
+            return
+        _proxima_verificacion = time.monotonic() + settings.REGLAS_IMPUESTO_TTL
+
+    db = _fabrica_sesiones()
+    try:
+        sello = _leer_sello(db)
+    finally:
+        db.close()
+    if sello != _sello:
+        recargar()
+
+
+def regla_para(anio: int, mes: int) -> Regla:
+    """Regla vigente en el periodo anio-mes (búsqueda binaria)"""
+    _verificar_cambios()
+    reglas, indices = _reglas, _indices
+    return reglas[bisect_right(indices, _indice_periodo(anio, mes)) - 1]
+
+
+def reglas_vigentes() -> List[Regla]:
+    _verificar_cambios()
+    return list(_reglas)
+
+
+# ── RECARGA AL CONFIRMAR CAMBIOS EN ESTE PROCESO ─────────────────────────────
+
+@event.listens_for(Session, "before_flush")
+def _detectar_cambios(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, ReglaImpuesto):
+            session.info["reglas_impuesto_modificadas"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _recargar_tras_commit(session):
+    if session.info.pop("reglas_impuesto_modificadas", False):
+        recargar()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_cambios(session):
+    session.info.pop("reglas_impuesto_modificadas", None)
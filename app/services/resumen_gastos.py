@@ -0,0 +1,172 @@
+"""
+Resumen mensual de gastos por propiedad y tipo
+==============================================
+La tabla resumen_gastos_mensual guarda, por (propiedad, año, mes, tipo),
+cantidad y monto de los gastos vigentes. Los resúmenes anuales y los totales
+de los listados se leen de ahí (a lo sumo 12 × tipos filas) en vez de
+recorrer los gastos.
+
+Se mantiene en el mismo flush que modifica los gastos:
+  - before_flush anota los meses tocados por cada GastoPropiedad nuevo,
+    modificado o borrado (también el mes/propiedad anterior si cambiaron);
+  - after_flush recalcula esos meses con un GROUP BY sobre
+    ix_gastos_propiedad_propiedad_fecha, en la misma transacción.
+
+Las cargas masivas que no pasan por el ORM (generar_datos) llaman a
+reconstruir(); al arrancar la API, completar_si_falta() reconstruye el
+resumen de una base que ya tenía gastos cuando se creó la tabla.
+"""
+from datetime import date
+from typing import Iterable, Set, Tuple
+
+from sqlalchemy import delete, event, exists, extract, func, inspect, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.database.session import conservar_historial
+from app.models.propiedad import Propiedad
+from app.models.unidad_gasto import GastoPropiedad, ResumenGastoMensual
+
+Clave = Tuple[int, int, int]  # (propiedad_id, anio, mes)
+
+_gastos = GastoPropiedad.__table__
+_resumen = ResumenGastoMensual.__table__
+
+
+def rango_anio(anio: int) -> Tuple[date, date]:
+    """[1 de enero, 1 de enero siguiente): filtro por rango que usa el índice"""
+    return date(anio, 1, 1), date(anio + 1, 1, 1)
+
+
+def rango_mes(anio: int, mes: int) -> Tuple[date, date]:
+    return date(anio, mes, 1), (date(anio + 1, 1, 1) if mes == 12 else date(anio, mes + 1, 1))
+
+
+def recalcular(conexion, claves: Iterable[Clave]) -> None:
+    """Reemplaza las filas del resumen de los meses dados a partir de los gastos"""
+    claves = sorted(set(claves))
+    # Bloquear las propiedades serializa dos transacciones que recalculan el
+    # mismo mes (sin esto ambas borrarían y reinsertarían las mismas filas).
+    # NO KEY UPDATE: no choca con el KEY SHARE que toma la FK del gasto insertado
+    conexion.execute(select(Propiedad.id).where(
+        Propiedad.id.in_({propiedad_id for propiedad_id, _, _ in claves})
+    ).order_by(Propiedad.id).with_for_update(key_share=True))
+    for propiedad_id, anio, mes in claves:
+        desde, hasta = rango_mes(anio, mes)
+        conexion.execute(delete(_resumen).where(
+            _resumen.c.propiedad_id == propiedad_id,
+            _resumen.c.anio == anio,
+            _resumen.c.mes == mes
+        ))
+        conexion.execute(insert(_resumen).from_select(
+            ["propiedad_id", "anio", "mes", "tipo_gasto", "cantidad", "monto_total", "updated_at"],
+            select(
+                literal(propiedad_id), literal(anio), literal(mes), _gastos.c.tipo_gasto,
+                func.count(), func.sum(_gastos.c.monto), func.current_timestamp()
+            ).where(
+                _gastos.c.propiedad_id == propiedad_id,
+                _gastos.c.fecha_gasto >= desde,
+                _gastos.c.fecha_gasto < hasta,
+                _gastos.c.deleted_at == None
+            ).group_by(_gastos.c.tipo_gasto)
+        ))
+
+
+def reconstruir(db: Session) -> int:
+    """Recalcula todo el resumen (después de cargas masivas). Devuelve filas"""
+    anio = extract("year", _gastos.c.fecha_gasto)
+    mes = extract("month", _gastos.c.fecha_gasto)
+    db.execute(delete(_resumen))
+    filas = db.execute(insert(_resumen).from_select(
+        ["propiedad_id", "anio", "mes", "tipo_gasto", "cantidad", "monto_total", "updated_at"],
+        select(
+            _gastos.c.propiedad_id, anio, mes, _gastos.c.tipo_gasto,
+            func.count(), func.sum(_gastos.c.monto), func.current_timestamp()
+        ).where(_gastos.c.deleted_at == None).group_by(
+            _gastos.c.propiedad_id, anio, mes, _gastos.c.tipo_gasto
+        )
+    )).rowcount
+    db.commit()
+    return filas
+
+
+def completar_si_falta(fabrica_sesiones) -> None:
+    """Reconstruye el resumen si está vacío pero ya hay gastos (tabla recién creada)"""
+    db = fabrica_sesiones()
+    try:
+        vacio_con_gastos = db.execute(select(
+            exists().where(_gastos.c.deleted_at == None),
+            ~exists(select(_resumen.c.id))
+        )).one()
+        if all(vacio_con_gastos):
+            reconstruir(db)
+    finally:
+        db.close()
+
+
+def resumen_anual(db: Session, propiedad_id: int, anio: int):
+    """Filas (mes, tipo_gasto, cantidad, monto_total) del año, del resumen"""
+    return db.query(
+        ResumenGastoMensual.mes,
+        ResumenGastoMensual.tipo_gasto,
+        ResumenGastoMensual.cantidad,
+        ResumenGastoMensual.monto_total
+    ).filter(
+        ResumenGastoMensual.propiedad_id == propiedad_id,
+        ResumenGastoMensual.anio == anio
+    ).order_by(ResumenGastoMensual.mes, ResumenGastoMensual.tipo_gasto).all()
+
+
+def totales_por_tipo(db: Session, propiedad_id: int, anio: int = None, tipo_gasto: str = None):
+    """Filas (tipo_gasto, cantidad, monto_total) de la propiedad, del resumen"""
+    query = db.query(
+        ResumenGastoMensual.tipo_gasto,
+        func.sum(ResumenGastoMensual.cantidad).label("cantidad"),
+        func.sum(ResumenGastoMensual.monto_total).label("monto_total")
+    ).filter(ResumenGastoMensual.propiedad_id == propiedad_id)
+    if anio:
+        query = query.filter(ResumenGastoMensual.anio == anio)
+    if tipo_gasto:
+        query = query.filter(ResumenGastoMensual.tipo_gasto == tipo_gasto)
+    return query.group_by(ResumenGastoMensual.tipo_gasto).order_by(ResumenGastoMensual.tipo_gasto).all()
+
+
+# ── MANTENIMIENTO POR EVENTOS ORM ────────────────────────────────────────────
+
+def _claves_gasto(gasto: GastoPropiedad) -> Set[Clave]:
+    """Mes actual del gasto y, si cambió propiedad o fecha, también el anterior"""
+    historial = inspect(gasto).attrs
+    actuales = (gasto.propiedad_id, gasto.fecha_gasto)
+    anteriores = tuple(
+        (historial[nombre].history.deleted or [actual])[0]
+        for nombre, actual in zip(("propiedad_id", "fecha_gasto"), actuales)
+    )
+    return {
+        (propiedad_id, fecha.year, fecha.month)
+        for propiedad_id, fecha in {actuales, anteriores}
+        if propiedad_id is not None and fecha is not None
+    }
+
+
+# Al reasignar la fecha o la propiedad de un gasto expirado se carga el valor
+# anterior, para recalcular también el mes de origen
+conservar_historial(GastoPropiedad.propiedad_id, GastoPropiedad.fecha_gasto)
+
+
+@event.listens_for(Session, "before_flush")
+def _registrar_gastos_modificados(session, flush_context, instances):
+    claves = session.info.setdefault("resumen_gastos_claves", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, GastoPropiedad):
+            claves.update(_claves_gasto(obj))
+
+
+@event.listens_for(Session, "after_flush")
+def _recalcular_tras_flush(session, flush_context):
+    claves = session.info.pop("resumen_gastos_claves", None)
+    if claves:
+        recalcular(session.connection(), claves)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_claves(session):
+    session.info.pop("resumen_gastos_claves", None)
@@ -0,0 +1,156 @@
+"""
+Tareas disponibles para la cola de trabajos
+===========================================
+Cada tarea declara el esquema de sus parámetros (se valida al encolar) y
+recibe (db, parametros, avance). Lo que devuelve queda en trabajo.resultado.
+
+  cierre_impuestos   → cerrar_periodo() de un mes
+  asignar_facturas   → asignar_facturas() de un contrato o del portafolio
+  mora_portafolio    → recalcula la mora de todos los pagos no cobrados
+  distribuir_periodo → crea las distribuciones faltantes de los pagos de un mes
+  liquidacion_copropietarios → liquidar_periodo() de un mes
+  exportar_sin       → archivo de declaración al SIN (descarga en /trabajos/{id}/archivo)
+"""
+from datetime import date
+from typing import Optional
+
+from pydantic import BaseModel, Field
+from sqlalchemy import and_, exists, func, select
+from sqlalchemy.orm import Session
+
+from app.models.contrato import Contrato
+from app.models.distribucion_pago import DistribucionPago
+from app.models.impuesto import ImpuestoAlquiler
+from app.models.pago import EstadoPago, Pago
+from app.models.propiedad import Propiedad
+from app.services.asignacion_facturas import VENTANA_COMPENSACION_MESES, asignar_facturas
+from app.services.cierre_impuestos import cerrar_periodo
+from app.services.exportacion_sin import escribir_declaracion
+from app.services.liquidacion_copropietarios import liquidar_periodo
+from app.services.mora_calculator import MoraCalculator
+from app.services.payment_distributor import PaymentDistributor
+from app.services.trabajos import Avance, tarea
+
+PATRON_PERIODO = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+# Pagos por bloque de distribuir_periodo
+LOTE_DISTRIBUCION = 1000
+
+
+# ── PARÁMETROS ───────────────────────────────────────────────────────────────
+
+class PeriodoParametros(BaseModel):
+    anio: int = Field(..., ge=2000, le=2100)
+    mes: int  = Field(..., ge=1, le=12)
+
+class CierreParametros(PeriodoParametros):
+    fecha_declaracion: Optional[date] = None
+    simular: bool = False
+
+class LiquidacionParametros(PeriodoParametros):
+    propiedad_id: Optional[int] = None
+    simular: bool = False
+
+class AsignarFacturasParametros(BaseModel):
+    contrato_id: Optional[int] = None
+    ventana_meses: int = Field(VENTANA_COMPENSACION_MESES, ge=0, le=12)
+    simular: bool = False
+
+class MoraParametros(BaseModel):
+    fecha_calculo: Optional[date] = None
+
+class ExportarSinParametros(BaseModel):
+    desde: str = Field(..., pattern=PATRON_PERIODO)
+    hasta: str = Field(..., pattern=PATRON_PERIODO)
+    formato: str = Field("csv", pattern="^(csv|txt)$")
+
+
+# ── TAREAS ───────────────────────────────────────────────────────────────────
+
+@tarea("cierre_impuestos", CierreParametros)
+def cierre_impuestos(db: Session, p: CierreParametros, avance: Avance) -> dict:
+    """Cierre mensual de impuestos de todos los pagos del periodo"""
+    avance(0, f"Cerrando {p.anio}-{p.mes:02d}")
+    return cerrar_periodo(db, p.anio, p.mes, p.fecha_declaracion, p.simular)
+
+
+@tarea("asignar_facturas", AsignarFacturasParametros)
+def asignar_facturas_libres(db: Session, p: AsignarFacturasParametros, avance: Avance) -> dict:
+    """Asignar facturas libres a los impuestos pendientes"""
+    avance(0, "Asignando facturas")
+    return asignar_facturas(db, p.contrato_id, p.ventana_meses, p.simular)
+
+
+@tarea("mora_portafolio", MoraParametros)
+def mora_portafolio(db: Session, p: MoraParametros, avance: Avance) -> dict:
+    """Recalcular la mora de todos los pagos no cobrados"""
+    return MoraCalculator.actualizar_mora_portafolio(
+        db, p.fecha_calculo,
+        al_avanzar=lambda hechos, total: avance(100 * hechos / max(total, 1), f"{hechos:,} de {total:,} pagos")
+    )
+
+
+@tarea("distribuir_periodo", PeriodoParametros)
+def distribuir_periodo(db: Session, p: PeriodoParametros, avance: Avance) -> dict:
+    """Crear las distribuciones faltantes de los pagos cobrados del periodo"""
+    tiene_distribucion = exists().where(and_(
+        DistribucionPago.pago_id == Pago.id,
+        DistribucionPago.deleted_at == None
+    ))
+    pagos = db.execute(select(Pago.id).join(
+        Contrato, Contrato.id == Pago.contrato_id
+    ).join(
+        Propiedad, Propiedad.id == Contrato.propiedad_id
+    ).where(
+        Pago.anio == p.anio,
+        Pago.mes == p.mes,
+        Pago.estado.in_([EstadoPago.PAGADO, EstadoPago.PARCIAL]),
+        Pago.deleted_at == None,
+        Propiedad.tipo == "copropiedad",
+        ~tiene_distribucion
+    ).order_by(Pago.id)).scalars().all()
+
+    # Un INSERT y un commit por bloque (distribuir_pagos), no por pago
+    distribuidos, errores = 0, {}
+    for inicio in range(0, len(pagos), LOTE_DISTRIBUCION):
+        resultado = PaymentDistributor.distribuir_pagos(db, pagos[inicio:inicio + LOTE_DISTRIBUCION])
+        distribuidos += resultado["distribuidos"]
+        errores.update(resultado["errores"])
+        hechos = min(inicio + LOTE_DISTRIBUCION, len(pagos))
+        avance(100 * hechos / len(pagos), f"{hechos:,} de {len(pagos):,} pagos")
+
+    return {
+        "periodo": f"{p.anio}-{p.mes:02d}",
+        "pagos_sin_distribucion": len(pagos),
+        "distribuidos": distribuidos,
+        "errores": errores,
+    }
+
+
+@tarea("liquidacion_copropietarios", LiquidacionParametros)
+def liquidacion_copropietarios(db: Session, p: LiquidacionParametros, avance: Avance) -> dict:
+    """Liquidar el periodo a los copropietarios (cobrado - impuestos - gastos)"""
+    avance(0, f"Liquidando {p.anio}-{p.mes:02d}")
+    return liquidar_periodo(db, p.anio, p.mes, p.propiedad_id, p.simular)
+
+
+@tarea("exportar_sin", ExportarSinParametros)
+def exportar_sin(db: Session, p: ExportarSinParametros, avance: Avance) -> dict:
+    """Exportar la declaración al SIN a un archivo"""
+    total = db.query(func.count(ImpuestoAlquiler.id)).filter(
+        ImpuestoAlquiler.periodo.between(p.desde, p.hasta),
+        ImpuestoAlquiler.deleted_at == None
+    ).scalar()
+    ruta = avance.archivo(p.formato)
+    with open(ruta, "w", encoding="utf-8", newline="") as destino:
+        registros = escribir_declaracion(
+            db, p.desde, p.hasta, p.formato, destino,
+            al_avanzar=lambda hechos: avance(100 * hechos / max(total, 1), f"{hechos:,} de {total:,} registros")
+        )
+    return {
+        "desde": p.desde,
+        "hasta": p.hasta,
+        "formato": p.formato,
+        "registros": registros,
+        "archivo": ruta,
+    }
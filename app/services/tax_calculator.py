@@ -9,20 +9,43 @@ Reglas implementadas:
   IVA 13%      → compensable con facturas, límite = 30% del alquiler
   IT  3%       → NO compensable, determinado = efectivo siempre
   RC-IVA 12.5% → trimestral (Mar/Jun/Sep/Dic), compensable al 100%
+
+Las alícuotas y límites del periodo salen de reglas_impuesto.regla_para();
+las constantes de abajo son la regla base (sin filas en reglas_impuesto).
+Los resultados se memorizan por (regla, entradas): los lotes y recálculos
+repiten muchas veces los mismos montos.
 """
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.services import reglas_impuesto
+from app.services.reglas_impuesto import REGLA_BASE, Regla, regla_para
 
 # Meses de cierre trimestral
 MESES_TRIMESTRALES = {3, 6, 9, 12}
 
-# Alícuotas legales (porcentajes)
-ALICUOTA_IVA    = 13.0
-ALICUOTA_IT     =  3.0
-ALICUOTA_RC_IVA = 12.5
+# Alícuotas legales de la regla base (porcentajes)
+ALICUOTA_IVA    = REGLA_BASE.alicuota_iva
+ALICUOTA_IT     = REGLA_BASE.alicuota_it
+ALICUOTA_RC_IVA = REGLA_BASE.alicuota_rc_iva
+
+# Límites de compensación de la regla base (porcentaje del impuesto/alquiler)
+LIMITE_COMP_IVA    = REGLA_BASE.limite_comp_iva      # hasta 30% del ALQUILER
+LIMITE_COMP_RC_IVA = REGLA_BASE.limite_comp_rc_iva   # hasta 100% del RC-IVA determinado
 
-# Límites de compensación (porcentaje del impuesto/alquiler)
-LIMITE_COMP_IVA    = 30.0   # hasta 30% del ALQUILER
-LIMITE_COMP_RC_IVA = 100.0  # hasta 100% del RC-IVA determinado
+# Resultados distintos que se conservan en memoria
+TAMANO_MEMO = 4096
+
+
+# Columnas numéricas del cálculo, en el orden que devuelve _calcular_montos()
+COLUMNAS_MONTOS = (
+    "iva_determinado", "iva_limite_compensacion", "iva_facturas_aplicadas", "iva_efectivo", "iva_estado",
+    "it_determinado",
+    "rc_iva_base_trimestral", "rc_iva_determinado", "rc_iva_facturas_aplicadas", "rc_iva_efectivo",
+    "rc_iva_estado",
+    "total_determinado", "total_facturas_aplicadas", "total_efectivo", "total_ahorro",
+    "monto_neto_distribuir",
+)
 
 
 def get_trimestre(mes: int) -> int:
@@ -32,6 +55,71 @@ def get_trimestre(mes: int) -> int:
     return 4
 
 
+def _estado_compensacion(aplicadas: float, efectivo: float) -> str:
+    if aplicadas == 0:
+        return "sin_compensacion"
+    if efectivo == 0:
+        return "compensado_total"
+    return "compensado_parcial"
+
+
+def _calcular_montos(
+    regla: Regla,
+    monto_alquiler: float,
+    es_trimestral: bool,
+    facturas_iva: float,
+    facturas_rc_iva: float,
+    monto_acumulado_trimestre: Optional[float],
+) -> Tuple:
+    """
+    Núcleo numérico compartido por calcular_impuestos() y el cálculo en lote.
+    Devuelve los montos en el orden de COLUMNAS_MONTOS.
+    """
+    # ── IVA 13% ─────────────────────────────────────────────────────────────
+    iva_determinado         = round(monto_alquiler * regla.alicuota_iva / 100, 2)
+    iva_limite_compensacion = round(monto_alquiler * regla.limite_comp_iva / 100, 2)
+    iva_facturas_aplicadas  = round(min(facturas_iva, iva_limite_compensacion), 2)
+    iva_efectivo            = round(max(0.0, iva_determinado - iva_facturas_aplicadas), 2)
+
+    # ── IT 3% (NO compensable) ──────────────────────────────────────────────
+    it_determinado = round(monto_alquiler * regla.alicuota_it / 100, 2)
+
+    # ── RC-IVA 12.5% trimestral ─────────────────────────────────────────────
+    rc_base          = 0.0
+    rc_determinado   = 0.0
+    rc_facturas_aplic= 0.0
+    rc_efectivo      = 0.0
+    rc_estado        = "no_aplica"
+
+    if es_trimestral:
+        rc_base         = monto_acumulado_trimestre if monto_acumulado_trimestre \
+                          else round(monto_alquiler * 3, 2)
+        rc_determinado  = round(rc_base * regla.alicuota_rc_iva / 100, 2)
+        # Límite = porcentaje del propio determinado (100% en la regla base)
+        rc_limite         = round(rc_determinado * regla.limite_comp_rc_iva / 100, 2)
+        rc_facturas_aplic = round(min(facturas_rc_iva, rc_limite), 2)
+        rc_efectivo     = round(max(0.0, rc_determinado - rc_facturas_aplic), 2)
+        rc_estado       = _estado_compensacion(rc_facturas_aplic, rc_efectivo)
+
+    # ── TOTALES ──────────────────────────────────────────────────────────────
+    total_determinado        = round(iva_determinado + it_determinado + rc_determinado, 2)
+    total_facturas_aplicadas = round(iva_facturas_aplicadas + rc_facturas_aplic, 2)
+    total_efectivo           = round(iva_efectivo + it_determinado + rc_efectivo, 2)
+    total_ahorro             = round(total_determinado - total_efectivo, 2)
+
+    # ── NETO PARA DISTRIBUIR ─────────────────────────────────────────────────
+    monto_neto = round(max(0.0, monto_alquiler - total_efectivo), 2)
+
+    return (
+        iva_determinado, iva_limite_compensacion, iva_facturas_aplicadas, iva_efectivo,
+        _estado_compensacion(iva_facturas_aplicadas, iva_efectivo),
+        it_determinado,
+        rc_base, rc_determinado, rc_facturas_aplic, rc_efectivo, rc_estado,
+        total_determinado, total_facturas_aplicadas, total_efectivo, total_ahorro,
+        monto_neto,
+    )
+
+
 def calcular_impuestos(
     monto_alquiler: float,
     mes: int,
@@ -41,7 +129,8 @@ def calcular_impuestos(
     monto_acumulado_trimestre: Optional[float] = None,
 ) -> Dict[str, Any]:
     """
-    Calcula todos los impuestos bolivianos para un alquiler.
+    Calcula todos los impuestos bolivianos para un alquiler, con la regla
+    vigente en el periodo anio-mes.
 
     Retorna para cada impuesto:
       - alicuota         → porcentaje legal
@@ -62,60 +151,39 @@ def calcular_impuestos(
         monto_acumulado_trimestre: Suma de los 3 meses (para RC-IVA).
                                    Si no se pasa, se estima como alquiler × 3.
     """
-    es_trimestral = mes in MESES_TRIMESTRALES
-    trimestre     = get_trimestre(mes)
-
-    # ── IVA 13% ─────────────────────────────────────────────────────────────
-    iva_determinado         = round(monto_alquiler * ALICUOTA_IVA / 100, 2)
-    iva_limite_compensacion = round(monto_alquiler * LIMITE_COMP_IVA / 100, 2)
-    iva_facturas_aplicadas  = round(min(facturas_iva, iva_limite_compensacion), 2)
-    iva_efectivo            = round(max(0.0, iva_determinado - iva_facturas_aplicadas), 2)
-    iva_ahorro              = round(iva_facturas_aplicadas, 2)
-
-    if iva_facturas_aplicadas == 0:
-        iva_estado = "sin_compensacion"
-    elif iva_efectivo == 0:
-        iva_estado = "compensado_total"
-    else:
-        iva_estado = "compensado_parcial"
-
-    # ── IT 3% (NO compensable) ──────────────────────────────────────────────
-    it_determinado = round(monto_alquiler * ALICUOTA_IT / 100, 2)
-    it_efectivo    = it_determinado   # siempre igual
-    it_ahorro      = 0.0
-
-    # ── RC-IVA 12.5% trimestral ─────────────────────────────────────────────
-    rc_base          = 0.0
-    rc_determinado   = 0.0
-    rc_facturas_aplic= 0.0
-    rc_efectivo      = 0.0
-    rc_ahorro        = 0.0
-    rc_estado        = "no_aplica"
-
-    if es_trimestral:
-        rc_base         = monto_acumulado_trimestre if monto_acumulado_trimestre \
-                          else round(monto_alquiler * 3, 2)
-        rc_determinado  = round(rc_base * ALICUOTA_RC_IVA / 100, 2)
-        # Compensable al 100%: límite = el propio determinado
-        rc_facturas_aplic = round(min(facturas_rc_iva, rc_determinado), 2)
-        rc_efectivo     = round(max(0.0, rc_determinado - rc_facturas_aplic), 2)
-        rc_ahorro       = round(rc_facturas_aplic, 2)
+    resultado = _calcular_memo(
+        regla_para(anio, mes), monto_alquiler, mes, anio,
+        facturas_iva, facturas_rc_iva, monto_acumulado_trimestre
+    )
+    # Copia: quien llama puede modificar el resultado sin tocar la memoria
+    return {clave: dict(valor) if isinstance(valor, dict) else valor
+            for clave, valor in resultado.items()}
 
-        if rc_facturas_aplic == 0:
-            rc_estado = "sin_compensacion"
-        elif rc_efectivo == 0:
-            rc_estado = "compensado_total"
-        else:
-            rc_estado = "compensado_parcial"
 
-    # ── TOTALES ──────────────────────────────────────────────────────────────
-    total_determinado        = round(iva_determinado + it_determinado + rc_determinado, 2)
-    total_facturas_aplicadas = round(iva_facturas_aplicadas + rc_facturas_aplic, 2)
-    total_efectivo           = round(iva_efectivo + it_efectivo + rc_efectivo, 2)
-    total_ahorro             = round(total_determinado - total_efectivo, 2)
+@lru_cache(maxsize=TAMANO_MEMO)
+def _calcular_memo(
+    regla: Regla,
+    monto_alquiler: float,
+    mes: int,
+    anio: int,
+    facturas_iva: float,
+    facturas_rc_iva: float,
+    monto_acumulado_trimestre: Optional[float],
+) -> Dict[str, Any]:
+    es_trimestral = mes in MESES_TRIMESTRALES
+    trimestre     = get_trimestre(mes)
 
-    # ── NETO PARA DISTRIBUIR ─────────────────────────────────────────────────
-    monto_neto = round(max(0.0, monto_alquiler - total_efectivo), 2)
+    (iva_determinado, iva_limite_compensacion, iva_facturas_aplicadas, iva_efectivo, iva_estado,
+     it_determinado,
+     rc_base, rc_determinado, rc_facturas_aplic, rc_efectivo, rc_estado,
+     total_determinado, total_facturas_aplicadas, total_efectivo, total_ahorro,
+     monto_neto) = _calcular_montos(
+        regla, monto_alquiler, es_trimestral, facturas_iva, facturas_rc_iva, monto_acumulado_trimestre
+    )
+    iva_ahorro = iva_facturas_aplicadas
+    it_efectivo = it_determinado   # siempre igual
+    it_ahorro = 0.0
+    rc_ahorro = rc_facturas_aplic
 
     return {
         # Contexto
@@ -128,8 +196,8 @@ def calcular_impuestos(
 
         # ── IVA ────────────────────────────────────────────────────────────
         "iva": {
-            "alicuota"           : ALICUOTA_IVA,
-            "pct_max_compensacion": LIMITE_COMP_IVA,
+            "alicuota"           : regla.alicuota_iva,
+            "pct_max_compensacion": regla.limite_comp_iva,
             "determinado"        : iva_determinado,
             "limite_compensacion": iva_limite_compensacion,
             "facturas_presentadas": facturas_iva,
@@ -137,27 +205,27 @@ def calcular_impuestos(
             "efectivo"           : iva_efectivo,
             "ahorro"             : iva_ahorro,
             "estado"             : iva_estado,
-            "nota"               : f"Alícuota {ALICUOTA_IVA}% | "
-                                   f"Compensable hasta {LIMITE_COMP_IVA}% del alquiler "
+            "nota"               : f"Alícuota {regla.alicuota_iva}% | "
+                                   f"Compensable hasta {regla.limite_comp_iva}% del alquiler "
                                    f"(Bs. {iva_limite_compensacion})",
         },
 
         # ── IT ─────────────────────────────────────────────────────────────
         "it": {
-            "alicuota"    : ALICUOTA_IT,
+            "alicuota"    : regla.alicuota_it,
             "compensable" : False,
             "determinado" : it_determinado,
             "efectivo"    : it_efectivo,
             "ahorro"      : it_ahorro,
             "estado"      : "no_compensable",
-            "nota"        : f"Alícuota {ALICUOTA_IT}% | "
+            "nota"        : f"Alícuota {regla.alicuota_it}% | "
                             f"NO compensable. Siempre se paga Bs. {it_determinado}",
         },
 
         # ── RC-IVA ─────────────────────────────────────────────────────────
         "rc_iva": {
-            "alicuota"            : ALICUOTA_RC_IVA,
-            "pct_max_compensacion": LIMITE_COMP_RC_IVA,
+            "alicuota"            : regla.alicuota_rc_iva,
+            "pct_max_compensacion": regla.limite_comp_rc_iva,
             "aplica_este_mes"     : es_trimestral,
             "meses_cierre"        : "Marzo, Junio, Septiembre, Diciembre",
             "base_trimestral"     : rc_base,
@@ -168,8 +236,8 @@ def calcular_impuestos(
             "ahorro"              : rc_ahorro,
             "estado"              : rc_estado,
             "nota"                : (
-                f"Alícuota {ALICUOTA_RC_IVA}% sobre acumulado trimestral | "
-                f"Compensable al {LIMITE_COMP_RC_IVA}%"
+                f"Alícuota {regla.alicuota_rc_iva}% sobre acumulado trimestral | "
+                f"Compensable al {regla.limite_comp_rc_iva}%"
             ) if es_trimestral else
                 "No aplica este mes (solo en Marzo, Junio, Sep, Dic)",
         },
@@ -192,6 +260,11 @@ def calcular_impuestos(
     }
 
 
+
+# La memoria se descarta cuando cambian las reglas
+reglas_impuesto.al_recargar(_calcular_memo.cache_clear)
+
+
 def calcular_solo_determinado(monto_alquiler: float, mes: int, anio: int) -> Dict[str, Any]:
     """
     Calcula solo los impuestos DETERMINADOS (sin facturas).
@@ -204,3 +277,87 @@ def calcular_solo_determinado(monto_alquiler: float, mes: int, anio: int) -> Dic
         facturas_iva=0.0,
         facturas_rc_iva=0.0,
     )
+
+
+def calcular_impuestos_lote(items: List[Dict[str, Any]], columnar: bool = False) -> Dict[str, Any]:
+    """
+    Calcula impuestos para muchos (monto, mes, año, facturas) en una pasada.
+
+    Cada item acepta las mismas claves que calcular_impuestos(). Con
+    columnar=False devuelve una lista de resultados idénticos a
+    calcular_impuestos(); con columnar=True solo los montos, como una lista
+    por columna (sin notas ni textos), mucho más compacta.
+    """
+    if not columnar:
+        return {
+            "cantidad": len(items),
+            "resultados": [calcular_impuestos(**item) for item in items],
+        }
+
+    contexto = []
+    montos = []
+    for item in items:
+        monto_alquiler, mes = item["monto_alquiler"], item["mes"]
+        es_trimestral = mes in MESES_TRIMESTRALES
+        contexto.append((monto_alquiler, mes, item["anio"], get_trimestre(mes), es_trimestral))
+        montos.append(_calcular_montos(
+            regla_para(item["anio"], mes),
+            monto_alquiler,
+            es_trimestral,
+            item.get("facturas_iva", 0.0),
+            item.get("facturas_rc_iva", 0.0),
+            item.get("monto_acumulado_trimestre"),
+        ))
+
+    nombres = ("monto_alquiler", "mes", "anio", "trimestre", "es_mes_trimestral") + COLUMNAS_MONTOS
+    valores = list(zip(*contexto)) + list(zip(*montos)) if items else [()] * len(nombres)
+    return {
+        "cantidad": len(items),
+        "columnas": {nombre: list(columna) for nombre, columna in zip(nombres, valores)},
+    }
+
+
+def campos_registro(calculo: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convierte el resultado de calcular_impuestos() en las columnas de
+    ImpuestoAlquiler (sin pago_id/contrato_id ni datos de declaración).
+    """
+    iva, it, rc, resumen = calculo["iva"], calculo["it"], calculo["rc_iva"], calculo["resumen"]
+    return {
+        "periodo"       : calculo["periodo"],
+        "anio"          : calculo["anio"],
+        "mes"           : calculo["mes"],
+        "trimestre"     : calculo["trimestre"],
+        "monto_alquiler": calculo["monto_alquiler"],
+
+        # IVA
+        "iva_alicuota"            : iva["alicuota"],
+        "iva_pct_max_compensacion": iva["pct_max_compensacion"],
+        "iva_determinado"         : iva["determinado"],
+        "iva_limite_compensacion" : iva["limite_compensacion"],
+        "iva_facturas_presentadas": iva["facturas_presentadas"],
+        "iva_facturas_aplicadas"  : iva["facturas_aplicadas"],
+        "iva_efectivo"            : iva["efectivo"],
+
+        # IT
+        "it_alicuota"   : it["alicuota"],
+        "it_determinado": it["determinado"],
+        "it_efectivo"   : it["efectivo"],
+
+        # RC-IVA
+        "rc_iva_alicuota"            : rc["alicuota"],
+        "rc_iva_pct_max_compensacion": rc["pct_max_compensacion"],
+        "rc_iva_base_trimestral"     : rc["base_trimestral"],
+        "rc_iva_determinado"         : rc["determinado"],
+        "rc_iva_facturas_presentadas": rc["facturas_presentadas"],
+        "rc_iva_facturas_aplicadas"  : rc["facturas_aplicadas"],
+        "rc_iva_efectivo"            : rc["efectivo"],
+        "es_mes_trimestral"          : calculo["es_mes_trimestral"],
+
+        # Totales
+        "total_determinado"       : resumen["total_determinado"],
+        "total_facturas_aplicadas": resumen["total_facturas_aplicadas"],
+        "total_efectivo"          : resumen["total_efectivo"],
+        "total_ahorro"            : resumen["total_ahorro_con_facturas"],
+        "monto_neto_distribuir"   : resumen["monto_neto_distribuir"],
+    }
@@ -0,0 +1,313 @@
+"""
+Cola de trabajos en segundo plano
+=================================
+Las operaciones largas (cierre de impuestos, mora del portafolio,
+exportaciones, ...) se guardan como filas de `trabajos` y las ejecuta el
+worker (python -m app.cli.worker), fuera del ciclo de la petición HTTP.
+
+  encolar()   → valida los parámetros con el esquema de la tarea e inserta
+                la fila en estado "pendiente"
+  reclamar()  → SELECT ... FOR UPDATE SKIP LOCKED: varios workers pueden
+                tomar trabajos a la vez sin bloquearse ni repetirlos
+  ejecutar()  → corre la tarea con su propia sesión; un hilo renueva
+                latido_en y detecta la cancelación
+  cancelar()  → un pendiente se cancela al instante; uno en curso se detiene
+                en su próximo avance()
+
+Si la tarea falla se reintenta con espera creciente (TRABAJOS_REINTENTO_BASE
+× 2^(intento-1)) hasta max_intentos. Un trabajo en curso cuyo latido quedó
+viejo (el worker murió) vuelve a la cola con recuperar_abandonados().
+
+Las tareas se registran con el decorador @tarea en app/services/tareas.py.
+"""
+import json
+import os
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import Callable, Dict, NamedTuple, Optional, Tuple, Type
+
+from pydantic import BaseModel
+from sqlalchemy import select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.trabajo import EstadoTrabajo, Trabajo
+
+
+class Tarea(NamedTuple):
+    funcion: Callable
+    parametros: Type[BaseModel]
+    descripcion: str
+
+
+TAREAS: Dict[str, Tarea] = {}
+
+
+def tarea(tipo: str, parametros: Type[BaseModel]):
+    """Registra una función como tarea: funcion(db, parametros, avance) -> dict"""
+    def registrar(funcion):
+        descripcion = (funcion.__doc__ or tipo).strip().splitlines()[0]
+        TAREAS[tipo] = Tarea(funcion, parametros, descripcion)
+        return funcion
+    return registrar
+
+
+class TrabajoCancelado(Exception):
+    """La tarea se detuvo porque se pidió cancelar el trabajo"""
+
+
+class Avance:
+    """
+    Lo recibe cada tarea para informar progreso (0-100) y para enterarse de
+    una cancelación: avance() lanza TrabajoCancelado si se pidió cancelar.
+    """
+
+    # Como mínimo entre dos escrituras de progreso (salvo el 100%)
+    INTERVALO_ESCRITURA = 0.5
+
+    def __init__(self, trabajo_id: int, fabrica_sesiones: Callable[[], Session]):
+        self.trabajo_id = trabajo_id
+        self.cancelado = threading.Event()
+        self._fabrica_sesiones = fabrica_sesiones
+        self._ultima_escritura = 0.0
+        self._escribir = True
+
+    def __call__(self, progreso: float, mensaje: Optional[str] = None) -> None:
+        self.verificar()
+        ahora = time.monotonic()
+        if not self._escribir or (progreso < 100 and ahora - self._ultima_escritura < self.INTERVALO_ESCRITURA):
+            return
+        self._ultima_escritura = ahora
+        valores = {"progreso": round(min(max(progreso, 0.0), 100.0), 1), "latido_en": datetime.utcnow()}
+        if mensaje is not None:
+            valores["mensaje"] = mensaje[:300]
+        db = self._fabrica_sesiones()
+        try:
+            db.execute(update(Trabajo).where(Trabajo.id == self.trabajo_id).values(**valores))
+            db.commit()
+        except DBAPIError:
+            # El progreso es informativo: con la base bloqueada (SQLite con un
+            # cursor abierto de la tarea) se deja de informar y la tarea sigue
+            db.rollback()
+            self._escribir = False
+        finally:
+            db.close()
+
+    def verificar(self) -> None:
+        if self.cancelado.is_set():
+            raise TrabajoCancelado()
+
+    def archivo(self, extension: str) -> str:
+        """Ruta donde la tarea deja su archivo (descarga en GET /trabajos/{id}/archivo)"""
+        os.makedirs(settings.TRABAJOS_DIR, exist_ok=True)
+        return os.path.join(settings.TRABAJOS_DIR, f"trabajo_{self.trabajo_id}.{extension}")
+
+
+# ── COLA ─────────────────────────────────────────────────────────────────────
+
+def encolar(
+    db: Session,
+    tipo: str,
+    parametros: Optional[dict] = None,
+    usuario_id: Optional[int] = None,
+    max_intentos: int = 3,
+) -> Trabajo:
+    """
+    Crea un trabajo pendiente. Lanza ValueError si el tipo no existe o los
+    parámetros no cumplen el esquema de la tarea.
+    """
+    if tipo not in TAREAS:
+        raise ValueError(f"Tipo de trabajo desconocido: {tipo}. Disponibles: {', '.join(sorted(TAREAS))}")
+    datos = TAREAS[tipo].parametros(**(parametros or {})).model_dump(mode="json")
+
+    trabajo = Trabajo(
+        tipo=tipo,
+        parametros=datos,
+        estado=EstadoTrabajo.PENDIENTE.value,
+        max_intentos=max_intentos,
+        disponible_desde=datetime.utcnow(),
+        creado_por_id=usuario_id,
+    )
+    db.add(trabajo)
+    db.commit()
+    db.refresh(trabajo)
+    return trabajo
+
+
+def cancelar(db: Session, trabajo: Trabajo) -> Trabajo:
+    """
+    Cancela un pendiente o pide al worker que detenga uno en curso. Como en
+    reclamar(), cada UPDATE se condiciona al estado: si un worker lo tomó
+    entre la lectura y la cancelación, se le pide detenerlo.
+    """
+    cancelado = db.execute(update(Trabajo).where(
+        Trabajo.id == trabajo.id,
+        Trabajo.estado == EstadoTrabajo.PENDIENTE.value
+    ).values(
+        estado=EstadoTrabajo.CANCELADO.value,
+        finalizado_en=datetime.utcnow(),
+    )).rowcount
+    if not cancelado:
+        cancelado = db.execute(update(Trabajo).where(
+            Trabajo.id == trabajo.id,
+            Trabajo.estado == EstadoTrabajo.EN_CURSO.value
+        ).values(cancelacion_solicitada=True)).rowcount
+    db.commit()
+    db.refresh(trabajo)
+    if not cancelado:
+        raise ValueError(f"El trabajo ya terminó ({trabajo.estado})")
+    return trabajo
+
+
+def reclamar(db: Session, trabajador: str) -> Optional[int]:
+    """Toma el pendiente disponible más antiguo; None si no hay ninguno"""
+    ahora = datetime.utcnow()
+    trabajo_id = db.execute(
+        select(Trabajo.id).where(
+            Trabajo.estado == EstadoTrabajo.PENDIENTE.value,
+            Trabajo.disponible_desde <= ahora,
+            Trabajo.deleted_at == None
+        ).order_by(Trabajo.disponible_desde, Trabajo.id).limit(1).with_for_update(skip_locked=True)
+    ).scalar()
+    if trabajo_id is None:
+        db.rollback()
+        return None
+
+    # La condición sobre el estado cubre las bases sin FOR UPDATE (SQLite)
+    tomado = db.execute(update(Trabajo).where(
+        Trabajo.id == trabajo_id,
+        Trabajo.estado == EstadoTrabajo.PENDIENTE.value
+    ).values(
+        estado=EstadoTrabajo.EN_CURSO.value,
+        trabajador=trabajador,
+        intentos=Trabajo.intentos + 1,
+        iniciado_en=ahora,
+        latido_en=ahora,
+        error=None,
+    )).rowcount
+    db.commit()
+    return trabajo_id if tomado else None
+
+
+def recuperar_abandonados(db: Session) -> int:
+    """Devuelve a la cola los trabajos en curso sin latido reciente (worker caído)"""
+    limite = datetime.utcnow() - timedelta(seconds=settings.TRABAJOS_LATIDO * 3)
+    abandonado = (
+        (Trabajo.estado == EstadoTrabajo.EN_CURSO.value) & (Trabajo.latido_en < limite)
+    )
+    reintentables = db.execute(update(Trabajo).where(
+        abandonado, Trabajo.intentos < Trabajo.max_intentos
+    ).values(
+        estado=EstadoTrabajo.PENDIENTE.value,
+        disponible_desde=datetime.utcnow(),
+        mensaje="Reencolado: el worker dejó de responder",
+    )).rowcount
+    agotados = db.execute(update(Trabajo).where(abandonado).values(
+        estado=EstadoTrabajo.FALLIDO.value,
+        finalizado_en=datetime.utcnow(),
+        error="El worker dejó de responder y no quedan reintentos",
+    )).rowcount
+    db.commit()
+    return reintentables + agotados
+
+
+# ── EJECUCIÓN ────────────────────────────────────────────────────────────────
+
+def _latir(fabrica_sesiones: Callable[[], Session], avance: Avance, detener: threading.Event) -> None:
+    """Renueva latido_en y trae la marca de cancelación mientras corre la tarea"""
+    while not detener.wait(settings.TRABAJOS_LATIDO):
+        db = fabrica_sesiones()
+        try:
+            db.execute(update(Trabajo).where(Trabajo.id == avance.trabajo_id).values(
+                latido_en=datetime.utcnow()
+            ))
+            cancelar = db.execute(select(Trabajo.cancelacion_solicitada).where(
+                Trabajo.id == avance.trabajo_id
+            )).scalar()
+            db.commit()
+            if cancelar:
+                avance.cancelado.set()
+        except DBAPIError:
+            # Base ocupada (p. ej. SQLite con la tarea escribiendo): se reintenta en el próximo latido
+            db.rollback()
+        finally:
+            db.close()
+
+
+def _finalizar(fabrica_sesiones: Callable[[], Session], trabajo_id: int, **valores) -> None:
+    db = fabrica_sesiones()
+    try:
+        db.execute(update(Trabajo).where(Trabajo.id == trabajo_id).values(**valores))
+        db.commit()
+    finally:
+        db.close()
+
+
+def ejecutar(fabrica_sesiones: Callable[[], Session], trabajo_id: int) -> str:
+    """Corre un trabajo ya reclamado y deja su estado final; devuelve ese estado"""
+    db = fabrica_sesiones()
+    try:
+        trabajo = db.get(Trabajo, trabajo_id)
+        tipo, datos, intentos, max_intentos = trabajo.tipo, trabajo.parametros, trabajo.intentos, trabajo.max_intentos
+        cancelar_ya = trabajo.cancelacion_solicitada
+    finally:
+        db.close()
+
+    avance = Avance(trabajo_id, fabrica_sesiones)
+    if cancelar_ya:
+        avance.cancelado.set()
+    detener = threading.Event()
+    latido = threading.Thread(target=_latir, args=(fabrica_sesiones, avance, detener), daemon=True)
+    latido.start()
+
+    db = fabrica_sesiones()
+    try:
+        if tipo not in TAREAS:
+            raise ValueError(f"Tipo de trabajo desconocido: {tipo}")
+        definicion = TAREAS[tipo]
+        avance.verificar()
+        resultado = definicion.funcion(db, definicion.parametros(**datos), avance)
+    except TrabajoCancelado:
+        db.rollback()
+        estado = EstadoTrabajo.CANCELADO.value
+        _finalizar(fabrica_sesiones, trabajo_id, estado=estado, finalizado_en=datetime.utcnow(),
+                   mensaje="Cancelado a pedido del usuario")
+    except Exception:
+        db.rollback()
+        error = traceback.format_exc()[-4000:]
+        if intentos < max_intentos:
+            estado = EstadoTrabajo.PENDIENTE.value
+            espera = settings.TRABAJOS_REINTENTO_BASE * 2 ** (intentos - 1)
+            _finalizar(fabrica_sesiones, trabajo_id, estado=estado, error=error,
+                       disponible_desde=datetime.utcnow() + timedelta(seconds=espera),
+                       mensaje=f"Falló el intento {intentos} de {max_intentos}; se reintenta en {espera:.0f} s")
+        else:
+            estado = EstadoTrabajo.FALLIDO.value
+            _finalizar(fabrica_sesiones, trabajo_id, estado=estado, error=error,
+                       finalizado_en=datetime.utcnow(), mensaje=f"Falló tras {intentos} intentos")
+    else:
+        estado = EstadoTrabajo.COMPLETADO.value
+        # Fechas u otros valores no JSON del resultado se guardan como texto
+        resultado = json.loads(json.dumps(resultado, default=str))
+        _finalizar(fabrica_sesiones, trabajo_id, estado=estado, resultado=resultado,
+                   progreso=100.0, finalizado_en=datetime.utcnow(), mensaje="Completado")
+    finally:
+        detener.set()
+        db.close()
+    latido.join()
+    return estado
+
+
+def procesar_siguiente(fabrica_sesiones: Callable[[], Session], trabajador: str) -> Optional[Tuple[int, str]]:
+    """Reclama y ejecuta un trabajo; devuelve (id, estado final) o None si la cola está vacía"""
+    db = fabrica_sesiones()
+    try:
+        trabajo_id = reclamar(db, trabajador)
+    finally:
+        db.close()
+    if trabajo_id is None:
+        return None
+    return trabajo_id, ejecutar(fabrica_sesiones, trabajo_id)
@@ -0,0 +1,44 @@
+"""
+Benchmarks de endpoints HTTP (TestClient en proceso, incluye serialización)
+"""
+import pytest
+
+REPORTES = [
+    ("dashboard", "/api/v1/reportes/dashboard?anio={anio}"),
+    ("morosidad", "/api/v1/reportes/morosidad"),
+    ("rendimiento", "/api/v1/reportes/rendimiento-propiedades?anio={anio}"),
+    ("copropietario", "/api/v1/reportes/copropietarios/{copropietario_id}?anio={anio}"),
+    ("impuestos_contrato", "/api/v1/impuestos/contrato/{contrato_id}/anio/{anio}"),
+    ("impuestos_portafolio", "/api/v1/impuestos/portafolio/anio/{anio}?agrupar=propiedad"),
+    ("estado_resultados", "/api/v1/reportes/estado-resultados/{anio}?propiedad_id={propiedad_id}"),
+    ("ocupacion_portafolio", "/api/v1/unidades-gastos/unidades/ocupacion"),
+]
+
+LISTADOS = [
+    ("propiedades", "/api/v1/propiedades/?limit=100"),
+    ("inquilinos", "/api/v1/inquilinos?limit=100"),
+    ("buscar_inquilinos", "/api/v1/inquilinos/buscar?q=mamani"),
+    ("buscar_propiedades", "/api/v1/propiedades/buscar?q=sopocachi"),
+    ("contratos", "/api/v1/contratos?limit=100"),
+    ("pagos_contrato", "/api/v1/pagos/contrato/{contrato_id}"),
+    ("unidades_propiedad", "/api/v1/unidades-gastos/unidades/propiedad/{propiedad_id}"),
+    ("gastos_propiedad", "/api/v1/unidades-gastos/gastos/propiedad/{propiedad_id}?anio={anio}"),
+]
+
+
+def _medir(benchmark, cliente, url):
+    respuesta = benchmark(cliente.get, url)
+    assert respuesta.status_code == 200, respuesta.text
+    benchmark.extra_info["bytes"] = len(respuesta.content)
+
+
+@pytest.mark.benchmark(group="reportes")
+@pytest.mark.parametrize("nombre,url", REPORTES, ids=[n for n, _ in REPORTES])
+def test_reporte(benchmark, cliente, muestras, nombre, url):
+    _medir(benchmark, cliente, url.format(**muestras))
+
+
+@pytest.mark.benchmark(group="listados")
+@pytest.mark.parametrize("nombre,url", LISTADOS, ids=[n for n, _ in LISTADOS])
+def test_listado(benchmark, cliente, muestras, nombre, url):
+    _medir(benchmark, cliente, url.format(**muestras))
@@ -0,0 +1,38 @@
+"""
+Benchmarks de serialización de respuestas (sin base de datos)
+
+Compara el camino por defecto de FastAPI (jsonable_encoder + json.dumps)
+con ORJSONResponse sobre una carga del tamaño de un resumen de impuestos
+de 1000 contratos x 12 meses.
+"""
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.services.tax_calculator import calcular_impuestos
+
+CONTRATOS = 1000
+
+
+@pytest.fixture(scope="module")
+def payload():
+    calculos = {mes: calcular_impuestos(3500.0, mes, 2025, 300.0, 200.0, 10500.0) for mes in range(1, 13)}
+    return {
+        "anio": 2025,
+        "contratos": [
+            {"contrato_id": contrato_id, "registros": [calculos[mes] for mes in range(1, 13)]}
+            for contrato_id in range(1, CONTRATOS + 1)
+        ],
+    }
+
+
+@pytest.mark.benchmark(group="serializacion")
+def test_jsonable_encoder_json(benchmark, payload):
+    respuesta = benchmark(lambda: JSONResponse(jsonable_encoder(payload)))
+    benchmark.extra_info["bytes"] = len(respuesta.body)
+
+
+@pytest.mark.benchmark(group="serializacion")
+def test_orjson_directo(benchmark, payload):
+    respuesta = benchmark(ORJSONResponse, payload)
+    benchmark.extra_info["bytes"] = len(respuesta.body)
@@ -0,0 +1,89 @@
+"""
+Benchmarks de servicios (sin HTTP)
+"""
+from datetime import date
+
+import pytest
+
+from app.models import Contrato, DistribucionPago, Pago
+from app.models.pago import EstadoPago
+from app.services.mora_calculator import MoraCalculator
+from app.services.payment_distributor import PaymentDistributor
+from app.services.tax_calculator import calcular_impuestos, calcular_impuestos_lote
+
+from conftest import HOY
+
+
+@pytest.mark.benchmark(group="impuestos")
+def test_calcular_impuestos_mensual(benchmark):
+    resultado = benchmark(calcular_impuestos, 3500.0, 2, 2026, 300.0, 0.0)
+    assert resultado["resumen"]["total_efectivo"] > 0
+
+
+@pytest.mark.benchmark(group="impuestos")
+def test_calcular_impuestos_trimestral(benchmark):
+    resultado = benchmark(calcular_impuestos, 3500.0, 3, 2026, 300.0, 500.0, 10500.0)
+    assert resultado["rc_iva"]["determinado"] > 0
+
+
+@pytest.mark.benchmark(group="impuestos_lote")
+@pytest.mark.parametrize("columnar", [False, True], ids=["filas", "columnas"])
+def test_calcular_impuestos_lote(benchmark, columnar):
+    """Un año completo de 1000 contratos (12k cálculos)"""
+    items = [
+        {"monto_alquiler": 2000.0 + contrato, "mes": mes, "anio": 2026,
+         "facturas_iva": 300.0, "facturas_rc_iva": 500.0}
+        for contrato in range(1000) for mes in range(1, 13)
+    ]
+    resultado = benchmark(calcular_impuestos_lote, items, columnar)
+    assert resultado["cantidad"] == len(items)
+
+
+@pytest.mark.benchmark(group="mora")
+def test_calcular_mora(benchmark):
+    pago = Pago(
+        fecha_vencimiento=date(2026, 5, 5),
+        monto_esperado=3000.0,
+        monto_pagado=1000.0,
+        mora_calculada=0.0,
+        estado=EstadoPago.PARCIAL,
+    )
+    contrato = Contrato(tasa_mora_diaria=0.5)
+    resultado = benchmark(MoraCalculator.calcular_mora, pago, contrato, HOY)
+    assert resultado["dias_atraso"] == 56
+
+
+@pytest.mark.benchmark(group="mora")
+def test_calcular_mora_portafolio(benchmark, db):
+    """Mora de todos los pagos impagos del portafolio (pagos ya cargados)"""
+    pendientes = db.query(Pago, Contrato).join(Contrato).filter(
+        Pago.estado.in_([EstadoPago.PENDIENTE, EstadoPago.PARCIAL, EstadoPago.VENCIDO])
+    ).all()
+
+    def calcular():
+        return sum(
+            MoraCalculator.calcular_mora(pago, contrato, HOY)["mora_calculada"]
+            for pago, contrato in pendientes
+        )
+
+    benchmark.extra_info["pagos"] = len(pendientes)
+    assert benchmark(calcular) >= 0
+
+
+@pytest.mark.benchmark(group="distribucion")
+def test_distribuir_pago(benchmark, db, muestras):
+    pago_id = muestras["pago_copropiedad_id"]
+
+    def limpiar():
+        db.query(DistribucionPago).filter(DistribucionPago.pago_id == pago_id).delete()
+        db.commit()
+        return (db, pago_id), {}
+
+    resultado = benchmark.pedantic(PaymentDistributor.distribuir_pago, setup=limpiar, rounds=30)
+    assert resultado["tipo"] == "copropiedad"
+
+
+@pytest.mark.benchmark(group="distribucion")
+def test_validar_porcentajes(benchmark, db, muestras):
+    # Con la caché de participaciones: solo la lectura del sello de versión
+    assert benchmark(PaymentDistributor.validar_porcentajes, db, muestras["copropiedad_id"])
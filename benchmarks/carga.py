@@ -0,0 +1,260 @@
+"""
+Pruebas de carga HTTP con escenarios realistas
+==============================================
+Usuarios virtuales concurrentes (asyncio + httpx) que inician sesión una vez,
+reutilizan su token y repiten un escenario hasta agotar la duración:
+
+  cierre_mes → avalancha de pagos de fin de mes (crear + registrar pago)
+  dashboard  → muchos usuarios refrescando dashboard y listados
+  exportes   → tormenta de reportes pesados (morosidad, rendimiento, impuestos)
+
+Por defecto la app corre en proceso (httpx.ASGITransport) contra DATABASE_URL;
+con --url se apunta a un uvicorn ya levantado, para medir capacidad por worker.
+Los escenarios que escriben (cierre_mes crea pagos) exigen --database-url (una
+copia descartable) o --url: nunca caen en la DATABASE_URL configurada.
+
+Al final imprime throughput, percentiles de latencia, tasa de error (5xx y
+fallas de conexión) y de rechazos (4xx, respuestas esperadas del negocio) por
+endpoint, y opcionalmente los guarda en JSON con --json.
+
+Uso:
+    python -m benchmarks.carga --escenario dashboard --usuarios 50 --duracion 30
+    python -m benchmarks.carga --escenario cierre_mes --database-url sqlite:////tmp/copia.db
+    python -m benchmarks.carga --escenario cierre_mes --url http://localhost:8000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List, Optional
+
+import httpx
+
+PREFIJO = "/api/v1"
+
+
+class Metricas:
+    """
+    Latencias, errores y rechazos agrupados por nombre de endpoint.
+
+    Error: 5xx o falla de conexión (status_code None). Rechazo: 4xx, una
+    respuesta válida de la API (validación, recurso inexistente) que no debe
+    inflar la tasa de error del servidor.
+    """
+
+    def __init__(self):
+        self.latencias: Dict[str, List[float]] = defaultdict(list)
+        self.errores: Dict[str, int] = defaultdict(int)
+        self.rechazos: Dict[str, int] = defaultdict(int)
+
+    def registrar(self, endpoint: str, segundos: float, status_code: Optional[int]):
+        self.latencias[endpoint].append(segundos)
+        if status_code is None or status_code >= 500:
+            self.errores[endpoint] += 1
+        elif status_code >= 400:
+            self.rechazos[endpoint] += 1
+
+    @staticmethod
+    def _percentil(ordenadas: List[float], p: float) -> float:
+        indice = min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))
+        return ordenadas[indice]
+
+    def resumen(self, duracion: float) -> Dict[str, Dict]:
+        resultado = {}
+        for endpoint, valores in sorted(self.latencias.items()):
+            ordenadas = sorted(valores)
+            resultado[endpoint] = {
+                "peticiones": len(valores),
+                "rps": round(len(valores) / duracion, 2),
+                "errores": self.errores[endpoint],
+                "tasa_error": round(self.errores[endpoint] / len(valores), 4),
+                "rechazos": self.rechazos[endpoint],
+                "tasa_rechazo": round(self.rechazos[endpoint] / len(valores), 4),
+                **{
+                    f"p{p}_ms": round(self._percentil(ordenadas, p) * 1000, 1)
+                    for p in (50, 90, 95, 99)
+                },
+                "max_ms": round(ordenadas[-1] * 1000, 1),
+            }
+        return resultado
+
+
+class UsuarioVirtual:
+    """Cliente autenticado que mide cada petición"""
+
+    def __init__(self, cliente: httpx.AsyncClient, metricas: Metricas, email: str, password: str):
+        self.cliente = cliente
+        self.metricas = metricas
+        self.email = email
+        self.password = password
+        self.headers: Dict[str, str] = {}
+
+    async def iniciar_sesion(self):
+        datos = {"email": self.email, "password": self.password}
+        respuesta = await self.cliente.post(f"{PREFIJO}/auth/login", json=datos)
+        if respuesta.status_code == 401:
+            respuesta = await self.cliente.post(
+                f"{PREFIJO}/auth/register", json={**datos, "full_name": "Usuario de carga"}
+            )
+            if respuesta.status_code == 400:  # registrado en paralelo por otro usuario
+                respuesta = await self.cliente.post(f"{PREFIJO}/auth/login", json=datos)
+        respuesta.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {respuesta.json()['access_token']}"}
+
+    async def pedir(self, metodo: str, endpoint: str, url: str, **kwargs) -> httpx.Response:
+        inicio = time.perf_counter()
+        try:
+            respuesta = await self.cliente.request(metodo, PREFIJO + url, headers=self.headers, **kwargs)
+            if respuesta.status_code == 401:
+                await self.iniciar_sesion()
+                respuesta = await self.cliente.request(metodo, PREFIJO + url, headers=self.headers, **kwargs)
+        except httpx.HTTPError:
+            self.metricas.registrar(endpoint, time.perf_counter() - inicio, None)
+            return None
+        self.metricas.registrar(endpoint, time.perf_counter() - inicio, respuesta.status_code)
+        return respuesta
+
+
+# ── ESCENARIOS ───────────────────────────────────────────────────────────────
+
+async def escenario_cierre_mes(usuario: UsuarioVirtual, contexto: Dict):
+    contrato = random.choice(contexto["contratos"])
+    hoy = date.today()
+    respuesta = await usuario.pedir("POST", "POST /pagos", "/pagos", json={
+        "contrato_id": contrato["id"],
+        "periodo": f"{hoy.year}-{hoy.month:02d}",
+        "fecha_vencimiento": str(hoy.replace(day=5)),
+        "monto_esperado": contrato["canon_mensual"],
+    })
+    if respuesta is None or respuesta.status_code != 201:
+        return
+    await usuario.pedir("POST", "POST /pagos/{id}/registrar", f"/pagos/{respuesta.json()['id']}/registrar", json={
+        "monto_pagado": contrato["canon_mensual"],
+        "fecha_pago": str(hoy),
+        "forma_pago": random.choice(["transferencia", "efectivo", "qr"]),
+    })
+    await usuario.pedir("GET", "GET /pagos/contrato/{id}", f"/pagos/contrato/{contrato['id']}")
+
+
+async def escenario_dashboard(usuario: UsuarioVirtual, contexto: Dict):
+    await usuario.pedir("GET", "GET /reportes/dashboard", f"/reportes/dashboard?anio={contexto['anio']}")
+    await usuario.pedir("GET", "GET /propiedades", "/propiedades/")
+    await usuario.pedir("GET", "GET /inquilinos", "/inquilinos")
+    await usuario.pedir("GET", "GET /contratos", "/contratos")
+    await asyncio.sleep(contexto["pausa"])
+
+
+async def escenario_exportes(usuario: UsuarioVirtual, contexto: Dict):
+    contrato = random.choice(contexto["contratos"])
+    await usuario.pedir("GET", "GET /reportes/morosidad", "/reportes/morosidad")
+    await usuario.pedir(
+        "GET", "GET /reportes/rendimiento-propiedades",
+        f"/reportes/rendimiento-propiedades?anio={contexto['anio']}"
+    )
+    await usuario.pedir(
+        "GET", "GET /impuestos/contrato/{id}/anio/{anio}",
+        f"/impuestos/contrato/{contrato['id']}/anio/{contexto['anio']}"
+    )
+
+
+ESCENARIOS = {
+    "cierre_mes": escenario_cierre_mes,
+    "dashboard": escenario_dashboard,
+    "exportes": escenario_exportes,
+}
+
+# Escenarios que insertan datos: nunca contra la DATABASE_URL configurada
+ESCENARIOS_ESCRITURA = {"cierre_mes"}
+
+
+# ── EJECUCIÓN ────────────────────────────────────────────────────────────────
+
+async def _usuario(numero: int, cliente, metricas, escenario, contexto, fin: float, args):
+    usuario = UsuarioVirtual(cliente, metricas, f"carga{numero % args.cuentas}@alquileres.bo", args.password)
+    await usuario.iniciar_sesion()
+    while time.perf_counter() < fin:
+        await escenario(usuario, contexto)
+
+
+async def ejecutar(args) -> Dict[str, Dict]:
+    if args.url:
+        transporte = httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=args.usuarios))
+        base_url = args.url
+    else:
+        from app.main import app
+        transporte = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        base_url = "http://carga"
+
+    async with httpx.AsyncClient(transport=transporte, base_url=base_url, timeout=args.timeout) as cliente:
+        # Preparación: un usuario obtiene los contratos que usarán los escenarios
+        preparador = UsuarioVirtual(cliente, Metricas(), "carga0@alquileres.bo", args.password)
+        await preparador.iniciar_sesion()
+        respuesta = await preparador.pedir("GET", "preparacion", "/contratos?limit=1000")
+        contexto = {
+            "contratos": respuesta.json() if respuesta is not None else [],
+            "anio": args.anio,
+            "pausa": args.pausa,
+        }
+        if not contexto["contratos"]:
+            raise SystemExit("No hay contratos: cargue datos con python -m app.cli.generar_datos")
+
+        metricas = Metricas()
+        escenario = ESCENARIOS[args.escenario]
+        inicio = time.perf_counter()
+        fin = inicio + args.duracion
+        await asyncio.gather(*[
+            _usuario(n, cliente, metricas, escenario, contexto, fin, args)
+            for n in range(args.usuarios)
+        ])
+        return metricas.resumen(time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pruebas de carga HTTP por escenario")
+    parser.add_argument("--escenario", choices=ESCENARIOS, default="dashboard")
+    parser.add_argument("--usuarios", type=int, default=20, help="Usuarios virtuales concurrentes")
+    parser.add_argument("--duracion", type=float, default=30, help="Segundos de carga")
+    parser.add_argument("--url", help="URL de un uvicorn ya levantado (por defecto: en proceso)")
+    parser.add_argument("--database-url", help="Base para el modo en proceso (por defecto DATABASE_URL)")
+    parser.add_argument("--cuentas", type=int, default=5, help="Cuentas distintas entre los usuarios")
+    parser.add_argument("--password", default="carga123")
+    parser.add_argument("--anio", type=int, default=date.today().year)
+    parser.add_argument("--pausa", type=float, default=1.0, help="Pausa entre refrescos del dashboard")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--json", help="Guardar el resumen en este archivo")
+    args = parser.parse_args()
+    if args.escenario in ESCENARIOS_ESCRITURA and not (args.url or args.database_url):
+        parser.error(
+            f"el escenario {args.escenario} escribe en la base: indique --database-url "
+            "(una copia descartable) o --url de un servidor de pruebas"
+        )
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("ENVIRONMENT", "carga")  # sin echo de SQL en modo en proceso
+
+    resumen = asyncio.run(ejecutar(args))
+
+    print(f"\nEscenario '{args.escenario}' | {args.usuarios} usuarios | {args.duracion:.0f} s")
+    print(
+        f"{'endpoint':<42} {'n':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} "
+        f"{'error%':>7} {'4xx%':>7}"
+    )
+    for endpoint, m in resumen.items():
+        print(
+            f"{endpoint:<42} {m['peticiones']:>7} {m['rps']:>8.1f} {m['p50_ms']:>8.1f} "
+            f"{m['p95_ms']:>8.1f} {m['p99_ms']:>8.1f} {m['tasa_error'] * 100:>6.1f}% "
+            f"{m['tasa_rechazo'] * 100:>6.1f}%"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as archivo:
+            json.dump({"escenario": args.escenario, "usuarios": args.usuarios, "endpoints": resumen},
+                      archivo, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
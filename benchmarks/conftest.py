@@ -0,0 +1,102 @@
+"""
+Fixtures del suite de benchmarks
+================================
+Cada escala de BENCH_ESCALAS (por defecto "100,1000" contratos) se genera una
+sola vez por sesión con app.cli.generar_datos en una base SQLite temporal,
+con fecha de referencia fija para que los datos sean idénticos entre corridas.
+
+Con BENCH_DATABASE_URL se usa una base ya cargada (por ejemplo PostgreSQL con
+`python -m app.cli.generar_datos --escala grande`) en lugar de generar una.
+"""
+import os
+import tempfile
+from datetime import date
+
+_DIRECTORIO = tempfile.mkdtemp(prefix="bench_alquileres_")
+os.environ.setdefault("ENVIRONMENT", "benchmark")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DIRECTORIO}/app.db")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine, func  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.cli.generar_datos import generar_portafolio  # noqa: E402
+from app.core.dependencies import get_db, get_current_user, get_current_active_user  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Contrato, Copropietario, Pago, Propiedad, User  # noqa: E402
+
+HOY = date(2026, 6, 30)
+ESCALAS = [int(n) for n in os.getenv("BENCH_ESCALAS", "100,1000").split(",")]
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL")
+
+
+@pytest.fixture(
+    scope="session",
+    params=[None] if BENCH_DATABASE_URL else ESCALAS,
+    ids=lambda n: "externa" if n is None else f"{n}_contratos",
+)
+def portafolio(request):
+    """sessionmaker ligado a una base con el portafolio de la escala pedida"""
+    if BENCH_DATABASE_URL:
+        url = BENCH_DATABASE_URL
+    else:
+        url = f"sqlite:///{_DIRECTORIO}/portafolio_{request.param}.db"
+        generar_portafolio(url, contratos=request.param, crear_tablas=True, hoy=HOY)
+
+    engine = create_engine(url)
+    yield sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(portafolio):
+    sesion = portafolio()
+    try:
+        yield sesion
+    finally:
+        sesion.close()
+
+
+@pytest.fixture(scope="session")
+def muestras(portafolio):
+    """IDs representativos para parametrizar las URLs"""
+    db = portafolio()
+    try:
+        contrato_id = db.query(func.min(Contrato.id)).scalar()
+        propiedad_id = db.query(func.min(Copropietario.propiedad_id)).scalar()
+        pago_id = db.query(func.min(Pago.id)).join(Contrato).filter(
+            Contrato.propiedad_id == propiedad_id,
+            Pago.monto_pagado > 0
+        ).scalar()
+        return {
+            "anio": HOY.year - 1,
+            "contrato_id": contrato_id,
+            "propiedad_id": propiedad_id,
+            "copropiedad_id": propiedad_id,
+            "copropietario_id": db.query(func.min(Copropietario.id)).scalar(),
+            "pago_copropiedad_id": pago_id,
+            "total_propiedades": db.query(func.count(Propiedad.id)).scalar(),
+        }
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="session")
+def cliente(portafolio):
+    """TestClient con la base del portafolio y autenticación simulada"""
+    def _get_db():
+        sesion = portafolio()
+        try:
+            yield sesion
+        finally:
+            sesion.close()
+
+    usuario = User(id=1, email="bench@alquileres.bo", full_name="Benchmark",
+                   hashed_password="-", role="admin", is_active=True)
+    app.dependency_overrides[get_db] = _get_db
+    app.dependency_overrides[get_current_user] = lambda: usuario
+    app.dependency_overrides[get_current_active_user] = lambda: usuario
+    with TestClient(app) as c:
+        yield c
+    app.dependency_overrides.clear()
@@ -0,0 +1,36 @@
+"""
+Fixtures de las pruebas
+=======================
+Cada prueba corre sobre una base SQLite nueva (create_all en un archivo
+temporal), sin la API: los servicios reciben la sesión directamente.
+"""
+import os
+import tempfile
+
+_DIRECTORIO = tempfile.mkdtemp(prefix="pruebas_alquileres_")
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DIRECTORIO}/app.db")
+
+import pytest  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import app.models  # noqa: E402,F401  (registra todas las tablas en Base.metadata)
+from app.database.base import Base  # noqa: E402
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/pruebas.db")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    sesion = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    try:
+        yield sesion
+    finally:
+        sesion.close()
@@ -0,0 +1,98 @@
+"""
+Datos mínimos para las pruebas: propiedades, contratos, pagos, impuestos y facturas
+"""
+from datetime import date
+from itertools import count
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models import (
+    Contrato, Copropietario, DistribucionPago, FacturaCompensacion, ImpuestoAlquiler, Inquilino, Pago, Propiedad,
+)
+from app.models.pago import EstadoPago
+from app.services.tax_calculator import calcular_impuestos, campos_registro
+
+_secuencia = count(1)
+
+
+def propiedad(
+    db: Session,
+    copropietarios: List[Tuple[str, float, Optional[str]]] = (),
+    canon: float = 1000.0,
+) -> Propiedad:
+    """copropietarios: (nombre, porcentaje, cuenta_bancaria)"""
+    n = next(_secuencia)
+    prop = Propiedad(
+        direccion=f"Calle {n}", ciudad="La Paz", zona="Sopocachi",
+        tipo="copropiedad" if copropietarios else "propia", canon_base=canon, estado="ocupado",
+    )
+    prop.copropietarios = [
+        Copropietario(
+            nombre=nombre, ci=f"C{n}-{i}", porcentaje_participacion=porcentaje,
+            cuenta_bancaria=cuenta, banco="BNB" if cuenta else None,
+        )
+        for i, (nombre, porcentaje, cuenta) in enumerate(copropietarios)
+    ]
+    db.add(prop)
+    db.flush()
+    return prop
+
+
+def contrato(db: Session, prop: Propiedad, canon: float = 1000.0) -> Contrato:
+    n = next(_secuencia)
+    inq = Inquilino(nombre_completo=f"Inquilino {n}", ci=f"I{n}")
+    c = Contrato(
+        propiedad=prop, inquilino=inq, numero_contrato=f"CT-{n}",
+        fecha_inicio=date(2025, 1, 1), fecha_fin=date(2027, 12, 31),
+        canon_mensual=canon, garantia=canon, dia_pago=5,
+    )
+    db.add(c)
+    db.flush()
+    return c
+
+
+def pago(db: Session, c: Contrato, periodo: str, monto: Optional[float] = None) -> Pago:
+    """Pago cobrado completo del periodo YYYY-MM"""
+    anio, mes = (int(x) for x in periodo.split("-"))
+    monto = c.canon_mensual if monto is None else monto
+    p = Pago(
+        contrato_id=c.id, periodo=periodo, anio=anio, mes=mes,
+        fecha_vencimiento=date(anio, mes, c.dia_pago), fecha_pago=date(anio, mes, c.dia_pago),
+        monto_esperado=c.canon_mensual, monto_pagado=monto, estado=EstadoPago.PAGADO,
+    )
+    db.add(p)
+    db.flush()
+    return p
+
+
+def impuesto(db: Session, p: Pago, facturas_iva: float = 0.0) -> ImpuestoAlquiler:
+    """Impuesto pendiente del pago, calculado como lo registra la API"""
+    calculo = calcular_impuestos(p.monto_pagado, p.mes, p.anio, facturas_iva=facturas_iva)
+    registro = ImpuestoAlquiler(pago_id=p.id, contrato_id=p.contrato_id, **campos_registro(calculo))
+    db.add(registro)
+    db.flush()
+    return registro
+
+
+def distribucion(db: Session, p: Pago, copropietario: Copropietario, monto: float) -> DistribucionPago:
+    """Distribución PENDIENTE del pago para el copropietario"""
+    d = DistribucionPago(
+        pago_id=p.id, copropietario_id=copropietario.id, monto_asignado=monto,
+        porcentaje_aplicado=copropietario.porcentaje_participacion, fecha_distribucion=p.fecha_pago,
+    )
+    db.add(d)
+    db.flush()
+    return d
+
+
+def factura(db: Session, c: Contrato, periodo: str, monto: float, tipo: str = "iva") -> FacturaCompensacion:
+    """Factura de compensación libre del periodo YYYY-MM"""
+    anio, mes = (int(x) for x in periodo.split("-"))
+    f = FacturaCompensacion(
+        contrato_id=c.id, numero_factura=f"F{next(_secuencia)}", fecha_factura=date(anio, mes, 1),
+        monto_factura=monto, tipo_impuesto=tipo, periodo=periodo, anio=anio, mes=mes,
+    )
+    db.add(f)
+    db.flush()
+    return f
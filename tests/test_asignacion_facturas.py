@@ -0,0 +1,50 @@
+from app.models import ImpuestoAlquiler
+from app.services.asignacion_facturas import asignar, asignar_facturas
+from tests import fabricas
+
+
+def test_best_fit_llena_el_periodo_mas_justo():
+    # (id, mes, monto) / (impuesto, mes, saldo)
+    asignacion = asignar([(1, 0, 100.0), (2, 0, 50.0)], [(10, 0, 60.0), (11, 1, 120.0)])
+    assert asignacion == {1: 11, 2: 10}
+
+
+def test_factura_fuera_de_la_ventana_queda_libre():
+    assert asignar([(1, 0, 10.0)], [(10, 5, 100.0)], ventana=3) == {}
+
+
+def test_cada_periodo_logra_su_ahorro_maximo(db):
+    # Alquiler 1000: IVA determinado 130, límite legal 300 (30%)
+    contrato = fabricas.contrato(db, fabricas.propiedad(db))
+    impuestos = [fabricas.impuesto(db, fabricas.pago(db, contrato, periodo))
+                 for periodo in ("2026-01", "2026-02", "2026-04")]
+    for monto in (260.0, 130.0, 130.0):
+        fabricas.factura(db, contrato, "2026-01", monto)
+    db.commit()
+
+    resultado = asignar_facturas(db, contrato.id)
+
+    efectivos = {i.periodo: i for i in db.query(ImpuestoAlquiler).filter(
+        ImpuestoAlquiler.id.in_([i.id for i in impuestos])
+    )}
+    # Sin facturas pagaría IVA 130 + IT 30; con el IVA compensado solo el IT
+    assert {periodo: i.iva_efectivo for periodo, i in efectivos.items()} == {
+        "2026-01": 0.0, "2026-02": 0.0, "2026-04": 0.0,
+    }
+    assert resultado["facturas_asignadas"] == 3
+    assert resultado["compensacion_adicional"] == 390.0
+
+
+def test_compensacion_adicional_es_la_baja_del_impuesto(db):
+    contrato = fabricas.contrato(db, fabricas.propiedad(db))
+    registro = fabricas.impuesto(db, fabricas.pago(db, contrato, "2026-01"), facturas_iva=100.0)
+    fabricas.factura(db, contrato, "2026-01", 250.0)
+    db.commit()
+    efectivo_antes = registro.total_efectivo
+
+    resultado = asignar_facturas(db, contrato.id)
+
+    db.refresh(registro)
+    # La factura de 250 solo puede bajar los 30 de IVA que quedaban
+    assert resultado["compensacion_adicional"] == 30.0
+    assert round(efectivo_antes - registro.total_efectivo, 2) == 30.0
@@ -0,0 +1,20 @@
+import pytest
+
+from app.services import busqueda
+from tests import fabricas
+
+
+@pytest.mark.parametrize("texto", ["   ", " ab  "])
+def test_espacios_no_cuentan_para_el_largo_minimo(db, texto):
+    with pytest.raises(ValueError, match="al menos 3 caracteres"):
+        busqueda.buscar_propiedades(db, texto)
+
+
+def test_busca_el_texto_sin_espacios(db):
+    prop = fabricas.propiedad(db)
+    fabricas.propiedad(db).zona = "Calacoto"
+    db.commit()
+
+    resultados = busqueda.buscar_propiedades(db, f"  {prop.direccion}  ")
+
+    assert [(r["id"], r["relevancia"]) for r in resultados] == [(prop.id, 1.0)]
@@ -0,0 +1,47 @@
+from app.models import FacturaCompensacion, ImpuestoAlquiler
+from app.services.asignacion_facturas import asignar_facturas
+from app.services.cierre_impuestos import cerrar_periodo
+from tests import fabricas
+
+
+def _libres(db, contrato):
+    return sorted(f.monto_factura for f in db.query(FacturaCompensacion).filter_by(
+        contrato_id=contrato.id, utilizada=False
+    ))
+
+
+def test_excedente_de_facturas_queda_libre_para_otro_periodo(db):
+    # Alquiler 1000: el IVA determinado (130) es lo máximo que ahorra un mes
+    contrato = fabricas.contrato(db, fabricas.propiedad(db))
+    fabricas.pago(db, contrato, "2026-05")
+    fabricas.factura(db, contrato, "2026-05", 900.0)
+    fabricas.factura(db, contrato, "2026-05", 900.0)
+    db.commit()
+
+    resultado = cerrar_periodo(db, 2026, 5)
+
+    mayo = db.query(ImpuestoAlquiler).filter_by(periodo="2026-05").one()
+    assert (resultado["facturas_aplicadas"], mayo.iva_efectivo) == (1, 0.0)
+    assert _libres(db, contrato) == [900.0]
+
+    fabricas.pago(db, contrato, "2026-06")
+    db.commit()
+    cerrar_periodo(db, 2026, 6)
+    assert asignar_facturas(db, contrato.id)["compensacion_adicional"] == 130.0
+
+    junio = db.query(ImpuestoAlquiler).filter_by(periodo="2026-06").one()
+    assert junio.iva_efectivo == 0.0
+    assert _libres(db, contrato) == []
+
+
+def test_facturas_que_caben_se_aplican_todas(db):
+    contrato = fabricas.contrato(db, fabricas.propiedad(db))
+    fabricas.pago(db, contrato, "2026-05")
+    for monto in (60.0, 50.0):
+        fabricas.factura(db, contrato, "2026-05", monto)
+    db.commit()
+
+    assert cerrar_periodo(db, 2026, 5)["facturas_aplicadas"] == 2
+
+    mayo = db.query(ImpuestoAlquiler).filter_by(periodo="2026-05").one()
+    assert (mayo.iva_facturas_presentadas, mayo.iva_efectivo) == (110.0, 20.0)
@@ -0,0 +1,72 @@
+from datetime import date
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models import DistribucionPago, EventoPago, Pago
+from app.models.evento_pago import EstadoEventoPago
+from app.models.pago import EstadoPago, FormaPago
+from app.services.eventos_pago import procesar_eventos, registrar_pago
+from app.services.payment_distributor import PaymentDistributor
+from tests import fabricas
+
+
+@pytest.fixture
+def pago_pendiente(db):
+    prop = fabricas.propiedad(db, [("Ana", 60.0, "100-1"), ("Beto", 40.0, None)])
+    contrato = fabricas.contrato(db, prop)
+    pago = Pago(
+        contrato_id=contrato.id, periodo="2026-05", anio=2026, mes=5,
+        fecha_vencimiento=date(2026, 5, 5), monto_esperado=1000.0,
+    )
+    db.add(pago)
+    db.commit()
+    return pago
+
+
+def _registrar_y_procesar(db, engine, pago, monto):
+    registrar_pago(db, pago.id, monto, date(2026, 5, 5), FormaPago.EFECTIVO, fecha_calculo=date(2026, 5, 5))
+    return procesar_eventos(sessionmaker(bind=engine))
+
+
+def _por_copropietario(db, pago):
+    montos = {}
+    for d in db.query(DistribucionPago).filter_by(pago_id=pago.id):
+        montos[d.copropietario.nombre] = round(montos.get(d.copropietario.nombre, 0) + d.monto_asignado, 2)
+    return montos
+
+
+def test_pago_parcial_completado_distribuye_la_diferencia(db, engine, pago_pendiente):
+    assert _registrar_y_procesar(db, engine, pago_pendiente, 400.0)["con_error"] == 0
+    assert _por_copropietario(db, pago_pendiente) == {"Ana": 240.0, "Beto": 160.0}
+
+    resultado = _registrar_y_procesar(db, engine, pago_pendiente, 1000.0)
+
+    db.refresh(pago_pendiente)
+    assert pago_pendiente.estado == EstadoPago.PAGADO
+    assert resultado["con_error"] == 0
+    assert _por_copropietario(db, pago_pendiente) == {"Ana": 600.0, "Beto": 400.0}
+    assert db.query(DistribucionPago).filter_by(pago_id=pago_pendiente.id).count() == 4
+    assert {e.estado for e in db.query(EventoPago)} == {EstadoEventoPago.PROCESADO.value}
+
+
+def test_repetir_no_distribuye_centavos_de_redondeo(db):
+    prop = fabricas.propiedad(db, [("Ana", 33.33, None), ("Beto", 33.33, None), ("Caro", 33.34, None)])
+    pago = fabricas.pago(db, fabricas.contrato(db, prop), "2026-05", monto=1000.01)
+    db.commit()
+
+    assert PaymentDistributor.distribuir_pagos(db, [pago.id])["distribuidos"] == 1
+    assert PaymentDistributor.distribuir_pagos(db, [pago.id])["omitidos"] == 1
+    assert sum(_por_copropietario(db, pago).values()) == 1000.01
+
+
+def test_distribuido_mayor_que_lo_cobrado_es_error(db, pago_pendiente):
+    pago_pendiente.monto_pagado = 1000.0
+    db.commit()
+    PaymentDistributor.distribuir_pagos(db, [pago_pendiente.id])
+    pago_pendiente.monto_pagado = 800.0
+    db.commit()
+
+    resultado = PaymentDistributor.distribuir_pagos(db, [pago_pendiente.id])
+
+    assert "más que lo cobrado" in resultado["errores"][pago_pendiente.id]
@@ -0,0 +1,130 @@
+from datetime import date
+
+import pytest
+
+from app.models import Contrato, DistribucionPago, Inquilino, Pago
+from app.models.distribucion_pago import EstadoDistribucion
+from app.models.pago import EstadoPago
+from app.services.importacion_historial import importar_historial
+from tests import fabricas
+
+HOY = date(2026, 6, 30)
+
+
+@pytest.fixture
+def copropiedad(db):
+    prop = fabricas.propiedad(db, [("Ana", 60.0, "100-1"), ("Beto", 40.0, None)])
+    db.commit()
+    return prop
+
+
+@pytest.fixture
+def planillas(tmp_path, copropiedad):
+    ana, beto = copropiedad.copropietarios
+    contenidos = {
+        # Excel en español: ";" y encabezados propios (ver el mapeo)
+        "inquilinos": "Carnet;Nombre;Telefono\n"
+                      "4455667;Lucía Mamani;72000001\n"
+                      "4455668;Pedro Quispe;\n"
+                      "4455667;Lucía Mamani (repetida);\n",
+        "contratos": "numero_contrato,inquilino_ci,propiedad_id,fecha_inicio,fecha_fin,canon_mensual\n"
+                     f"H-1,4455667,{copropiedad.id},01/01/2025,31/12/2027,1000\n"
+                     f"H-2,9999999,{copropiedad.id},2025-01-01,2027-12-31,800\n"
+                     f"H-3,4455668,{copropiedad.id},2025-13-01,2027-12-31,900\n",
+        "pagos": "numero_contrato,periodo,fecha_vencimiento,monto_esperado,fecha_pago,monto_pagado\n"
+                 "H-1,2026-04,2026-04-05,1000,2026-04-08,1000\n"
+                 "H-1,05/2026,2026-05-05,1000,2026-05-05,400\n"
+                 "H-1,2026-04,2026-04-05,1000,2026-04-09,1000\n"
+                 "H-2,2026-04,2026-04-05,800,,\n",
+        "distribuciones": "numero_contrato,periodo,copropietario_ci,monto_asignado\n"
+                          f"H-1,2026-04,{ana.ci},600\n"
+                          f"H-1,2026-04,{beto.ci},400\n"
+                          f"H-1,2026-06,{ana.ci},600\n",
+    }
+    archivos = {}
+    for entidad, contenido in contenidos.items():
+        archivos[entidad] = str(tmp_path / f"{entidad}.csv")
+        with open(archivos[entidad], "w", encoding="utf-8") as archivo:
+            archivo.write(contenido)
+    return archivos
+
+
+MAPEOS = {"inquilinos": {"ci": "Carnet", "nombre_completo": "Nombre", "telefono": "Telefono"}}
+
+
+def _importar(engine, archivos, rechazos=None):
+    with engine.begin() as conexion:
+        return importar_historial(
+            conexion, archivos, MAPEOS, hoy=HOY,
+            rechazar=(lambda *fila: rechazos.append(fila)) if rechazos is not None else None,
+        )
+
+
+def test_importa_y_resuelve_por_clave_natural(db, engine, planillas, copropiedad):
+    rechazos = []
+
+    resumen = _importar(engine, planillas, rechazos)
+
+    assert {entidad: r["insertadas"] for entidad, r in resumen.items()} == {
+        "inquilinos": 2, "contratos": 1, "pagos": 2, "distribuciones": 2,
+    }
+    assert sorted(rechazos) == [
+        ("contratos", 3, "sin_inquilino"),
+        ("contratos", 4, "ilegible: fecha inválida '2025-13-01'"),
+        ("distribuciones", 4, "sin_pago"),
+        ("inquilinos", 4, "repetida"),
+        ("pagos", 4, "repetida"),
+        ("pagos", 5, "sin_contrato"),
+    ]
+
+    contrato = db.query(Contrato).filter_by(numero_contrato="H-1").one()
+    assert contrato.inquilino.nombre_completo == "Lucía Mamani"
+    assert (contrato.propiedad_id, contrato.fecha_inicio, contrato.estado) == (
+        copropiedad.id, date(2025, 1, 1), "activo",
+    )
+    pagos = {p.periodo: p for p in db.query(Pago).filter_by(contrato_id=contrato.id)}
+    assert pagos["2026-04"].estado == EstadoPago.PAGADO
+    assert (pagos["2026-04"].dias_atraso, pagos["2026-05"].estado) == (3, EstadoPago.PARCIAL)
+
+    distribuciones = db.query(DistribucionPago).filter_by(pago_id=pagos["2026-04"].id).all()
+    assert sorted((d.monto_asignado, d.porcentaje_aplicado) for d in distribuciones) == [(400.0, 40.0), (600.0, 60.0)]
+    # Historial ya pagado: no entra al lote de pago a copropietarios
+    assert {d.estado for d in distribuciones} == {EstadoDistribucion.PAGADO}
+    assert all(d.fecha_distribucion == date(2026, 4, 8) for d in distribuciones)
+
+
+def test_reimportar_no_duplica(db, engine, planillas):
+    _importar(engine, planillas)
+
+    resumen = _importar(engine, planillas)
+
+    assert all(r["insertadas"] == 0 for r in resumen.values())
+    assert resumen["inquilinos"]["omitidas"] == {"existente": 3}
+    assert resumen["pagos"]["omitidas"] == {"existente": 3, "sin_contrato": 1}
+    assert db.query(Inquilino).count() == 2
+    assert db.query(DistribucionPago).count() == 2
+
+
+def test_columna_requerida_faltante_revierte_todo(db, engine, planillas, tmp_path):
+    malo = tmp_path / "pagos_malos.csv"
+    malo.write_text("numero_contrato,fecha_vencimiento,monto_esperado\nH-1,2026-04-05,1000\n", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="faltan las columnas periodo"):
+        _importar(engine, {**planillas, "pagos": str(malo)})
+
+    assert db.query(Inquilino).count() == 0
+
+
+def test_planilla_xlsx(db, engine, copropiedad, tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    libro = openpyxl.Workbook()
+    hoja = libro.active
+    hoja.append(["Carnet", "Nombre"])
+    hoja.append([4455667.0, "Lucía Mamani"])  # Excel guarda el CI como número
+    ruta = str(tmp_path / "inquilinos.xlsx")
+    libro.save(ruta)
+
+    resumen = _importar(engine, {"inquilinos": ruta})
+
+    assert resumen["inquilinos"]["insertadas"] == 1
+    assert db.query(Inquilino).one().ci == "4455667"
@@ -0,0 +1,78 @@
+from app.models import LiquidacionCopropietario, ResumenGastoMensual
+from app.services.liquidacion_copropietarios import liquidar_periodo
+from tests import fabricas
+
+
+def _liquidaciones(db):
+    return {
+        l.copropietario_id: l
+        for l in db.query(LiquidacionCopropietario).order_by(LiquidacionCopropietario.copropietario_id)
+    }
+
+
+def _copropiedad(db, porcentajes=(33.33, 33.33, 33.34), canon=1000.0):
+    prop = fabricas.propiedad(db, [(f"Socio {i}", p, None) for i, p in enumerate(porcentajes)], canon)
+    return prop, fabricas.contrato(db, prop, canon)
+
+
+def test_neto_por_copropietario(db):
+    prop, contrato = _copropiedad(db)
+    registro = fabricas.impuesto(db, fabricas.pago(db, contrato, "2026-05"))
+    db.add(ResumenGastoMensual(propiedad_id=prop.id, anio=2026, mes=5, tipo_gasto="mantenimiento",
+                               cantidad=1, monto_total=100.0))
+    db.commit()
+
+    resultado = liquidar_periodo(db, 2026, 5)
+
+    liquidaciones = _liquidaciones(db)
+    assert resultado["liquidaciones"] == 3
+    assert resultado["totales"] == {
+        "ingresos_brutos": 1000.0,
+        "impuestos": registro.total_efectivo,
+        "gastos": 100.0,
+        "monto_neto": round(1000.0 - registro.total_efectivo - 100.0, 2),
+    }
+    # Partes redondeadas a centavos que suman exactamente el total
+    assert [l.ingresos_brutos for l in liquidaciones.values()] == [333.3, 333.3, 333.4]
+    assert round(sum(l.gastos for l in liquidaciones.values()), 2) == 100.0
+    for l in liquidaciones.values():
+        assert l.monto_neto == round(l.ingresos_brutos - l.impuestos - l.gastos, 2)
+
+
+def test_reliquidar_reemplaza_las_filas(db):
+    _, contrato = _copropiedad(db, (60.0, 40.0))
+    fabricas.pago(db, contrato, "2026-05")
+    db.commit()
+    liquidar_periodo(db, 2026, 5)
+
+    fabricas.pago(db, contrato, "2026-05", monto=500.0)
+    db.commit()
+    resultado = liquidar_periodo(db, 2026, 5)
+
+    assert resultado["reemplazadas"] == 2
+    assert [l.ingresos_brutos for l in _liquidaciones(db).values()] == [900.0, 600.0]
+
+
+def test_omite_porcentajes_incompletos_y_propiedades_propias(db):
+    incompleta, contrato = _copropiedad(db, (60.0, 30.0))
+    fabricas.pago(db, contrato, "2026-05")
+    fabricas.pago(db, fabricas.contrato(db, fabricas.propiedad(db)), "2026-05")
+    db.commit()
+
+    resultado = liquidar_periodo(db, 2026, 5)
+
+    assert resultado["liquidaciones"] == 0
+    assert resultado["omitidas"] == {
+        incompleta.id: "Los porcentajes no suman 100% (suma actual: 90.0%)",
+    }
+
+
+def test_simular_no_guarda(db):
+    _, contrato = _copropiedad(db, (100.0,))
+    fabricas.pago(db, contrato, "2026-05")
+    db.commit()
+
+    resultado = liquidar_periodo(db, 2026, 5, simular=True)
+
+    assert resultado["liquidaciones"] == 1
+    assert db.query(LiquidacionCopropietario).count() == 0
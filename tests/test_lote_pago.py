@@ -0,0 +1,97 @@
+import csv
+import io
+
+import pytest
+
+from app.models import DistribucionPago
+from app.models.distribucion_pago import EstadoDistribucion
+from app.services import lote_pago
+from tests import fabricas
+
+
+@pytest.fixture
+def cartera(db):
+    """Copropiedad 60/40 (solo el primero con cuenta) con dos pagos distribuidos"""
+    prop = fabricas.propiedad(db, [("Ana", 60.0, "100-1"), ("Beto", 40.0, None)])
+    ana, beto = prop.copropietarios
+    contrato = fabricas.contrato(db, prop)
+    for periodo in ("2026-04", "2026-05"):
+        pago = fabricas.pago(db, contrato, periodo)
+        fabricas.distribucion(db, pago, ana, 600.0)
+        fabricas.distribucion(db, pago, beto, 400.0)
+    db.commit()
+    return contrato, ana, beto
+
+
+def _archivo(db, lote_id):
+    return list(csv.DictReader(io.StringIO("".join(lote_pago.exportar_lote(db, lote_id)))))
+
+
+def _estados(db, copropietario):
+    return sorted(d.estado.value for d in db.query(DistribucionPago).filter_by(copropietario_id=copropietario.id))
+
+
+def test_archivo_con_los_beneficiarios_con_cuenta(db, cartera):
+    _, ana, _ = cartera
+    assert lote_pago.resumen_lote(db)["sin_cuenta_bancaria"] == {
+        "copropietarios": 1, "distribuciones": 2, "monto": 800.0,
+    }
+
+    lote = lote_pago.generar_lote(db)
+
+    assert (lote["beneficiarios"], lote["distribuciones"], lote["monto_total"]) == (1, 2, 1200.0)
+    [linea] = _archivo(db, lote["lote_id"])
+    assert linea["referencia"] == f"LOTE{lote['lote_id']}-{ana.id}"
+    assert (linea["cuenta_bancaria"], linea["distribuciones"], linea["monto"]) == ("100-1", "2", "1200.00")
+    assert lote_pago.resumen_lote(db)["distribuciones"] == 0
+
+
+def test_confirma_solo_lo_exportado(db, cartera):
+    contrato, ana, beto = cartera
+    lote = lote_pago.generar_lote(db)
+    # Después de exportar: Beto registra su cuenta y entra un pago nuevo
+    beto.cuenta_bancaria = "200-2"
+    fabricas.distribucion(db, fabricas.pago(db, contrato, "2026-06"), ana, 600.0)
+    db.commit()
+
+    resultado = lote_pago.confirmar_lote(db, lote["lote_id"])
+
+    assert (resultado["distribuciones_pagadas"], resultado["monto_total"]) == (2, 1200.0)
+    assert resultado["estado"] == "cerrado"
+    assert _estados(db, ana) == ["pagado", "pagado", "pendiente"]
+    assert _estados(db, beto) == ["pendiente", "pendiente"]
+    assert lote_pago.confirmar_lote(db, lote["lote_id"])["distribuciones_pagadas"] == 0
+
+
+def test_rechaza_beneficiario_cuyo_monto_cambio(db, cartera):
+    _, ana, _ = cartera
+    lote = lote_pago.generar_lote(db)
+    distribucion = db.query(DistribucionPago).filter_by(copropietario_id=ana.id).first()
+    distribucion.monto_asignado = 650.0
+    db.commit()
+
+    resultado = lote_pago.confirmar_lote(db, lote["lote_id"])
+
+    assert resultado["distribuciones_pagadas"] == 0
+    assert list(resultado["rechazados"]) == [ana.id]
+    assert resultado["estado"] == "abierto"
+    assert _estados(db, ana) == ["pendiente", "pendiente"]
+
+
+def test_anular_libera_las_distribuciones(db, cartera):
+    _, ana, _ = cartera
+    primero = lote_pago.generar_lote(db)
+    with pytest.raises(ValueError):
+        lote_pago.generar_lote(db)  # todo lo pendiente ya está en el primero
+
+    assert lote_pago.anular_lote(db, primero["lote_id"])["distribuciones_liberadas"] == 2
+    segundo = lote_pago.generar_lote(db)
+
+    assert segundo["distribuciones"] == 2
+    assert lote_pago.confirmar_lote(db, primero["lote_id"])["distribuciones_pagadas"] == 0
+    assert lote_pago.confirmar_lote(
+        db, segundo["lote_id"], transferencias={ana.id: "TRF-1"}
+    )["distribuciones_pagadas"] == 2
+    assert {d.numero_transferencia for d in db.query(DistribucionPago).filter_by(
+        estado=EstadoDistribucion.PAGADO
+    )} == {"TRF-1"}
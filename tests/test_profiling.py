@@ -0,0 +1,33 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.profiling import PerfiladoMiddleware
+
+
+@pytest.fixture
+def cliente():
+    app = FastAPI()
+    app.add_middleware(PerfiladoMiddleware)
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_sin_parametro_no_perfila(cliente):
+    assert cliente.get("/ping").json() == {"ok": True}
+
+
+@pytest.mark.parametrize("valor", ["0", "false", "htm"])
+def test_valor_desconocido_es_400(cliente, valor):
+    respuesta = cliente.get("/ping", params={"__profile": valor})
+
+    assert respuesta.status_code == 400
+    assert "1, collapsed, html" in respuesta.json()["detail"]
+
+
+def test_valor_conocido_exige_administrador(cliente):
+    assert cliente.get("/ping", headers={"X-Profile": "HTML"}).status_code == 403
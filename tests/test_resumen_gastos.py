@@ -0,0 +1,30 @@
+from datetime import date
+
+import app.services.resumen_gastos  # noqa: F401  (registra los eventos)
+from app.models.unidad_gasto import GastoPropiedad, ResumenGastoMensual
+from tests import fabricas
+
+
+def _resumen(db):
+    return {
+        (r.propiedad_id, r.mes): (r.cantidad, r.monto_total)
+        for r in db.query(ResumenGastoMensual) if r.cantidad
+    }
+
+
+def test_mover_gasto_expirado_recalcula_el_mes_de_origen(db):
+    prop = fabricas.propiedad(db)
+    otra = fabricas.propiedad(db)
+    gasto = GastoPropiedad(
+        propiedad_id=prop.id, tipo_gasto="mantenimiento", descripcion="Pintura",
+        monto=150.0, fecha_gasto=date(2026, 4, 10),
+    )
+    db.add(gasto)
+    db.commit()  # expira el gasto: el valor anterior ya no está cargado
+    assert _resumen(db) == {(prop.id, 4): (1, 150.0)}
+
+    gasto.fecha_gasto = date(2026, 5, 2)
+    gasto.propiedad_id = otra.id
+    db.commit()
+
+    assert _resumen(db) == {(otra.id, 5): (1, 150.0)}
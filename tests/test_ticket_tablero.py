@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+import pytest
+
+from app.core.dependencies import usuario_por_token
+from app.core.security import ALCANCE_TABLERO, create_access_token, crear_ticket_tablero
+from app.models.user import User
+
+
+@pytest.fixture
+def usuario(db):
+    user = User(email="ana@alquileres.bo", full_name="Ana", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_ticket_abre_solo_el_flujo(db, usuario):
+    ticket = crear_ticket_tablero(usuario.id)
+
+    assert usuario_por_token(db, ticket, ALCANCE_TABLERO) == usuario
+    assert usuario_por_token(db, ticket) is None  # no sirve como token de acceso
+
+
+def test_el_flujo_rechaza_el_token_de_acceso(db, usuario):
+    token = create_access_token({"sub": str(usuario.id)})
+
+    assert usuario_por_token(db, token) == usuario
+    assert usuario_por_token(db, token, ALCANCE_TABLERO) is None
+
+
+def test_ticket_vencido(db, usuario):
+    ticket = create_access_token(
+        {"sub": str(usuario.id), "scope": ALCANCE_TABLERO}, expires_delta=timedelta(seconds=-1)
+    )
+
+    assert usuario_por_token(db, ticket, ALCANCE_TABLERO) is None
@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+import app.services.tareas  # noqa: F401  (registra las tareas)
+from app.models import Trabajo
+from app.models.trabajo import EstadoTrabajo
+from app.services import trabajos
+
+
+def test_cancelar_pendiente(db):
+    trabajo = trabajos.encolar(db, "mora_portafolio")
+
+    trabajos.cancelar(db, trabajo)
+
+    assert trabajo.estado == EstadoTrabajo.CANCELADO.value
+    assert trabajos.reclamar(db, "worker-1") is None
+
+
+def test_cancelar_tomado_por_un_worker_despues_de_leerlo(db, engine):
+    trabajo = trabajos.encolar(db, "mora_portafolio")
+    leido = db.get(Trabajo, trabajo.id)  # la API lo lee PENDIENTE...
+
+    worker = sessionmaker(bind=engine)()
+    assert trabajos.reclamar(worker, "worker-1") == trabajo.id  # ...y un worker lo toma
+    worker.close()
+
+    trabajos.cancelar(db, leido)
+
+    assert leido.estado == EstadoTrabajo.EN_CURSO.value
+    assert leido.cancelacion_solicitada is True
+
+
+def test_cancelar_terminado(db):
+    trabajo = trabajos.encolar(db, "mora_portafolio")
+    trabajo.estado = EstadoTrabajo.COMPLETADO.value
+    db.commit()
+
+    with pytest.raises(ValueError, match="ya terminó"):
+        trabajos.cancelar(db, trabajo)
@@ -0,0 +1,28 @@
+from sqlalchemy import select
+
+from app.models import VersionCache
+from app.models.version_cache import incrementar_version
+from tests import fabricas
+
+
+def _version(db, nombre="copropietarios"):
+    return db.scalar(select(VersionCache.version).where(VersionCache.nombre == nombre))
+
+
+def test_incrementar_crea_y_suma(engine, db):
+    with engine.begin() as conexion:
+        incrementar_version(conexion, "prueba")
+        incrementar_version(conexion, "prueba")
+
+    assert _version(db, "prueba") == 2
+
+
+def test_cambiar_copropietarios_incrementa_la_version(db):
+    prop = fabricas.propiedad(db, [("Ana", 100.0, None)])
+    db.commit()
+    antes = _version(db)
+
+    prop.copropietarios[0].porcentaje_participacion = 99.0
+    db.commit()
+
+    assert _version(db) == antes + 1